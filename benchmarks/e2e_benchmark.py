@@ -0,0 +1,218 @@
+"""
+오프라인 end-to-end 벤치마크
+
+OpenAI / Ollama 대신 결정적 가짜 백엔드로 CodeChatbot.invoke 와 테스트 생성 경로를 실행하고,
+코드 크기 × 동시 요청 수 별로 req/s, p50/p99 지연시간, 메모리를 측정해 JSON 으로 저장합니다.
+
+    python -m benchmarks.e2e_benchmark                          # in-process 가짜 모델
+    python -m benchmarks.e2e_benchmark --backend http           # 로컬 stand-in HTTP 서버 (실제 클라이언트 경로)
+    python -m benchmarks.e2e_benchmark --compare benchmarks/results/e2e_inprocess_....json
+
+--compare 로 이전 결과를 주면 같은 설정끼리 비교하고, p50 이나 req/s 가 --max-regression 이상 나빠지면 exit code 1.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.retrieval_benchmark import synthetic_java
+from benchmarks.routing_benchmark import load_dataset, percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _rss_mb():
+    # 현재 RSS (리눅스), 없으면 None
+    try:
+        with open("/proc/self/status", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def _max_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+
+
+def measure(fn, inputs, concurrency):
+    """
+    inputs 를 concurrency 개의 스레드로 fn 에 넘기고 지연시간/처리량을 측정
+    """
+    latencies, errors = [], []
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            fn(item)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, inputs))
+    seconds = time.perf_counter() - start
+    return {
+        "requests": len(inputs),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": seconds,
+        "req_per_s": len(inputs) / seconds,
+        "p50_s": percentile(latencies, 50),
+        "p99_s": percentile(latencies, 99),
+        "rss_mb": _rss_mb(),
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+
+def setup_backends(args):
+    """
+    가짜 백엔드를 준비하고 (ChatbotEngine, 테스트 생성 모델 이름) 반환
+    """
+    os.environ["OLLAMA_PREWARM"] = "0"
+    os.environ.setdefault("CHATBOT_EMBEDDING_STORE", tempfile.mkdtemp(prefix="e2e_embeddings_"))
+    os.environ.setdefault("TESTGEN_CACHE", "0")
+
+    if args.backend == "http":
+        from benchmarks.fake_ollama import serve as serve_ollama
+        from benchmarks.fake_openai import serve as serve_openai
+
+        openai_server = serve_openai(ttft=args.ttft, token_latency=args.token_latency, answer_tokens=args.answer_tokens)
+        os.environ["OPENAI_API_BASE"] = os.environ["OPENAI_BASE_URL"] = openai_server.url
+        os.environ["OPENAI_API_KEY"] = "fake"
+        os.environ["OLLAMA_HOST"] = serve_ollama(load_seconds=0, generate_seconds=args.testgen_latency).url
+
+        from chatbot.custom_chatbot import ChatbotEngine
+
+        return ChatbotEngine(use_cache=False), "codellama"
+
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    from benchmarks.fake_llm import FakeChatModel, fake_embeddings, fake_test_backend
+    from chatbot.custom_chatbot import ChatbotEngine
+    from chatbot.testcode.model.model_response import BACKENDS
+
+    BACKENDS["fake"] = fake_test_backend(args.testgen_latency)
+    llm = FakeChatModel(ttft=args.ttft, token_latency=args.token_latency, answer_tokens=args.answer_tokens)
+    return ChatbotEngine(use_cache=False, llm=llm, embeddings=fake_embeddings()), "fake"
+
+
+def questions(mix):
+    dataset = [sample for sample in load_dataset() if sample["route"] != "generate_test_code"]
+    if mix != "all":
+        routes = set(mix.split(","))
+        dataset = [sample for sample in dataset if sample["route"] in routes]
+    return [sample["question"] for sample in dataset]
+
+
+def run_chat(engine, args):
+    from chatbot.custom_chatbot import CodeChatbot
+    from chatbot.scheduler import get_scheduler
+
+    mix = questions(args.mix)
+    results = []
+    for methods in args.sizes:
+        for concurrency in args.concurrency:
+            sessions = [
+                CodeChatbot(code=synthetic_java(methods).replace("Synthetic", f"Synthetic{i}"), engine=engine)
+                for i in range(concurrency)
+            ]
+            # 세션별 코드 인덱스 생성(임베딩)은 측정에서 제외
+            for session in sessions:
+                session.invoke(mix[0])
+            engine.metrics.clear()
+
+            inputs = [(sessions[i % concurrency], mix[i % len(mix)]) for i in range(args.requests)]
+            result = measure(lambda item: item[0].invoke(item[1]), inputs, concurrency)
+            results.append({
+                "path": "chat", "methods": methods, "concurrency": concurrency, **result,
+                "nodes": engine.metrics.summary(), "speculation": engine.speculation.summary(),
+                "scheduler": get_scheduler().stats(),
+            })
+            print(json.dumps(results[-1], ensure_ascii=False))
+    return results
+
+
+def run_testgen(model, args):
+    from chatbot.testcode.model.model_response import configure_concurrency
+    from chatbot.testcode.testcode_generator import generate_unit_test
+
+    results = []
+    for methods in args.sizes:
+        for concurrency in args.concurrency:
+            configure_concurrency(**{model: concurrency})
+            codes = [synthetic_java(methods).replace("Synthetic", f"Synthetic{i}") for i in range(args.requests)]
+            result = measure(lambda code: generate_unit_test(code, model=model, use_cache=False), codes, concurrency)
+            results.append({"path": "testgen", "methods": methods, "concurrency": concurrency, **result})
+            print(json.dumps(results[-1], ensure_ascii=False))
+    return results
+
+
+def compare(results, baseline_path, max_regression):
+    """
+    같은 (path, methods, concurrency) 끼리 비교해 회귀 목록을 반환
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {
+            (r["path"], r["methods"], r["concurrency"]): r for r in json.load(file)["results"]
+        }
+    regressions = []
+    for result in results:
+        before = baseline.get((result["path"], result["methods"], result["concurrency"]))
+        if before is None:
+            continue
+        change = {
+            "path": result["path"], "methods": result["methods"], "concurrency": result["concurrency"],
+            "p50_change": result["p50_s"] / before["p50_s"] - 1,
+            "req_per_s_change": result["req_per_s"] / before["req_per_s"] - 1,
+        }
+        print(json.dumps(change))
+        if change["p50_change"] > max_regression or change["req_per_s_change"] < -max_regression:
+            regressions.append(change)
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--backend", choices=["inprocess", "http"], default="inprocess")
+    arg_parser.add_argument("--paths", nargs="+", choices=["chat", "testgen"], default=["chat", "testgen"])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100], help="코드 크기(메서드 수)")
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    arg_parser.add_argument("--requests", type=int, default=64, help="설정별 요청 수")
+    arg_parser.add_argument("--mix", default="all", help="질문 route 목록 (쉼표 구분) 또는 all")
+    arg_parser.add_argument("--ttft", type=float, default=0.05)
+    arg_parser.add_argument("--token-latency", type=float, default=0.002)
+    arg_parser.add_argument("--answer-tokens", type=int, default=50)
+    arg_parser.add_argument("--testgen-latency", type=float, default=0.5)
+    arg_parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본: benchmarks/results/)")
+    arg_parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    arg_parser.add_argument("--max-regression", type=float, default=0.2)
+    args = arg_parser.parse_args()
+
+    engine, model = setup_backends(args)
+    results = []
+    if "chat" in args.paths:
+        results += run_chat(engine, args)
+    if "testgen" in args.paths:
+        results += run_testgen(model, args)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"e2e_{args.backend}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({"config": vars(args), "created": time.time(), "results": results}, file, ensure_ascii=False, indent=2)
+    print(f"results saved to {output}")
+
+    if args.compare and compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
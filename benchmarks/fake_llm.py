@@ -0,0 +1,149 @@
+"""
+벤치마크용 결정적(deterministic) 가짜 LLM 백엔드
+
+- FakeChatModel: ChatbotEngine(llm=...) 에 넣는 in-process 채팅 모델 (스트리밍 지원)
+- fake_embeddings(): 텍스트 해시 기반 임베딩
+- fake_test_backend(): model_response.BACKENDS 에 등록하는 테스트 생성 백엔드
+
+같은 입력에는 항상 같은 응답을 주며, 첫 토큰 지연(ttft)과 토큰당 지연(token_latency)을 흉내 냅니다.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from functools import lru_cache
+
+from chatbot.router import INTENT_SEPARATOR, LocalRouter
+
+WORDS = "the method returns value when input is null so we should check edge cases and refactor this logic".split()
+
+_router = LocalRouter()
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def is_route_prompt(system: str) -> bool:
+    # ChatbotEngine._router_chain 의 시스템 프롬프트
+    return "`route` key" in system
+
+
+def reply_for(system: str, user: str, answer_tokens: int = 50) -> str:
+    """
+    (시스템 프롬프트, 사용자 입력) 에 대한 결정적 응답
+    """
+    if is_route_prompt(system):
+        routes = []
+        for part in INTENT_SEPARATOR.split(user):
+            route = _router.route(part)[0]
+            if route not in routes:
+                routes.append(route)
+        return json.dumps({"route": routes if len(routes) > 1 else routes[0]})
+    rng = random.Random(_seed(user))
+    return " ".join(rng.choice(WORDS) for _ in range(answer_tokens))
+
+
+def reply_tokens(reply: str):
+    words = reply.split(" ")
+    return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+
+def fake_test_code(code: str) -> str:
+    from chatbot.source_index import class_name
+
+    name = class_name(code)
+    return (
+        "```java\nimport org.junit.jupiter.api.Test;\n"
+        f"class {name}Test {{\n    @Test\n    void smoke() {{ new {name}(); }}\n}}\n```"
+    )
+
+
+def fake_test_backend(latency: float = 0.5):
+    """
+    model_response.BACKENDS 에 등록할 테스트 생성 백엔드
+
+        BACKENDS['fake'] = fake_test_backend(latency=2.0)
+    """
+
+    def backend(messages):
+        time.sleep(latency)
+        return fake_test_code(messages[-1]["content"])
+
+    return backend
+
+
+def fake_embeddings(size: int = 256):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    return DeterministicFakeEmbedding(size=size)
+
+
+def _split_messages(messages):
+    system = "\n".join(str(m.content) for m in messages if m.type == "system")
+    user = str(messages[-1].content) if messages else ""
+    return system, user
+
+
+@lru_cache(maxsize=None)
+def _chat_model_class():
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    class FakeChatModel(BaseChatModel):
+        ttft: float = 0.05
+        token_latency: float = 0.002
+        answer_tokens: int = 50
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-chat"
+
+        def _reply(self, messages):
+            system, user = _split_messages(messages)
+            return reply_for(system, user, self.answer_tokens)
+
+        def _result(self, reply):
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            reply = self._reply(messages)
+            time.sleep(self.ttft + self.token_latency * len(reply_tokens(reply)))
+            return self._result(reply)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            reply = self._reply(messages)
+            await asyncio.sleep(self.ttft + self.token_latency * len(reply_tokens(reply)))
+            return self._result(reply)
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.ttft)
+            for token in reply_tokens(self._reply(messages)):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+                time.sleep(self.token_latency)
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            await asyncio.sleep(self.ttft)
+            for token in reply_tokens(self._reply(messages)):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    await run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+                await asyncio.sleep(self.token_latency)
+
+    return FakeChatModel
+
+
+def FakeChatModel(**kwargs):
+    """
+    가짜 채팅 모델 생성 (langchain_core 는 이 함수를 호출할 때 import)
+
+        FakeChatModel(ttft=0.2, token_latency=0.01, answer_tokens=100)
+    """
+    return _chat_model_class()(**kwargs)
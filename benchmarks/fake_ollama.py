@@ -0,0 +1,154 @@
+"""
+Ollama API 를 흉내 내는 로컬 HTTP 서버 (테스트/벤치마크용)
+
+/api/chat, /api/generate, /api/ps 를 non-streaming 으로 지원합니다. 모델이 메모리에 없으면
+--load-seconds 만큼 로드 시간을 흉내 내고, 요청의 keep_alive 가 지나면 모델을 내립니다.
+
+    python -m benchmarks.fake_ollama --port 11435 --load-seconds 3
+    OLLAMA_HOST=http://127.0.0.1:11435 python -m chatbot.testcode.testcode_generator ...
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_KEEP_ALIVE = 5 * 60  # ollama 기본값 5m
+RESPONSE = "```java\npublic class GeneratedTest {\n    @Test\n    void test() {}\n}\n```"
+
+
+def parse_keep_alive(value) -> float:
+    """
+    '30m' / '1h' / '10s' / 숫자(초) → 초. 음수면 무기한
+    """
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?[\d.]+)(ms|s|m|h)?", str(value).strip())
+    if not match:
+        return DEFAULT_KEEP_ALIVE
+    number = float(match.group(1))
+    if number < 0:
+        return float("inf")
+    return number * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+
+
+class FakeOllama(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, load_seconds=2.0, generate_seconds=0.5, response=RESPONSE):
+        super().__init__(address, FakeOllamaHandler)
+        self.load_seconds = load_seconds
+        self.generate_seconds = generate_seconds
+        self.response = response
+        self.loaded = {}  # model -> 언로드 시각
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def load(self, model, keep_alive) -> float:
+        """
+        모델을 (필요하면) 로드하고 로드에 걸린 시간을 반환합니다.
+        """
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            loaded = self.loaded.get(model, 0) > now
+        load = 0.0 if loaded else self.load_seconds
+        time.sleep(load)
+        with self.lock:
+            self.loaded[model] = time.monotonic() + parse_keep_alive(keep_alive)
+        return load
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    server: FakeOllama
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/ps":
+            now = time.monotonic()
+            models = [{"name": model, "model": model} for model, until in self.server.loaded.items() if until > now]
+            self._send({"models": models})
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path not in ("/api/chat", "/api/generate"):
+            self._send({"error": "not found"}, 404)
+            return
+
+        start = time.perf_counter()
+        model = request.get("model", "")
+        load = self.server.load(model, request.get("keep_alive"))
+        # 빈 요청(프롬프트/메시지 없음)은 모델 로드만 수행
+        empty = not request.get("messages") and not request.get("prompt")
+        generate = 0.0 if empty else self.server.generate_seconds
+        time.sleep(generate)
+
+        payload = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": True,
+            "done_reason": "load" if empty else "stop",
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": 0 if empty else 10,
+            "prompt_eval_duration": 0,
+            "eval_count": 0 if empty else 20,
+            "eval_duration": int(generate * 1e9),
+        }
+        if self.path == "/api/chat":
+            payload["message"] = {"role": "assistant", "content": "" if empty else self.server.response}
+        else:
+            payload["response"] = "" if empty else self.server.response
+        self._send(payload)
+
+
+def serve(host="127.0.0.1", port=0, background=True, **kwargs) -> FakeOllama:
+    """
+    서버를 시작합니다. port=0 이면 빈 포트 사용 (server.url 로 확인)
+    """
+    server = FakeOllama((host, port), **kwargs)
+    if background:
+        threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=11435)
+    arg_parser.add_argument("--load-seconds", type=float, default=2.0)
+    arg_parser.add_argument("--generate-seconds", type=float, default=0.5)
+    args = arg_parser.parse_args()
+
+    server = serve(
+        args.host, args.port, background=False,
+        load_seconds=args.load_seconds, generate_seconds=args.generate_seconds,
+    )
+    print(f"fake ollama listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
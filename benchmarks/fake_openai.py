@@ -0,0 +1,169 @@
+"""
+OpenAI API 를 흉내 내는 로컬 HTTP 서버 (벤치마크용)
+
+/v1/chat/completions (stream 포함) 와 /v1/embeddings 를 지원합니다. 응답은 benchmarks.fake_llm 의
+결정적 응답을 사용하며, 첫 토큰 지연과 토큰당 지연을 흉내 냅니다. 실제 ChatOpenAI / OpenAIEmbeddings 가
+llm_pool 의 커넥션 풀을 거쳐 이 서버로 요청하므로 HTTP 경로까지 포함한 측정이 가능합니다.
+
+    python -m benchmarks.fake_openai --port 8001
+    OPENAI_API_BASE=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake streamlit run home.py
+"""
+import argparse
+import base64
+import json
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_llm import _seed, reply_for, reply_tokens
+
+
+def _embedding(item, size):
+    rng = random.Random(_seed(json.dumps(item)))
+    return [rng.uniform(-1, 1) for _ in range(size)]
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, ttft=0.05, token_latency=0.002, answer_tokens=50, embedding_size=256):
+        super().__init__(address, FakeOpenAIHandler)
+        self.ttft = ttft
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+        self.embedding_size = embedding_size
+        self.requests = {"chat": 0, "embeddings": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, kind):
+        with self.lock:
+            self.requests[kind] += 1
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive (클라이언트 커넥션 풀 재사용)
+    server: FakeOpenAI
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            self.server.count("chat")
+            self.chat(request)
+        elif self.path.endswith("/embeddings"):
+            self.server.count("embeddings")
+            self.embeddings(request)
+        else:
+            self._send({"error": {"message": "not found"}}, 404)
+
+    def chat(self, request):
+        messages = request.get("messages", [])
+        system = "\n".join(str(m.get("content")) for m in messages if m.get("role") == "system")
+        user = str(messages[-1].get("content")) if messages else ""
+        reply = reply_for(system, user, self.server.answer_tokens)
+        tokens = reply_tokens(reply)
+        usage = {
+            "prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in messages),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "fake")}
+
+        time.sleep(self.server.ttft)
+        if not request.get("stream"):
+            time.sleep(self.server.token_latency * len(tokens))
+            self._send({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(payload):
+            self._chunk(f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', **payload})}\n\n".encode())
+
+        for i, token in enumerate(tokens):
+            delta = {"content": token, **({"role": "assistant"} if i == 0 else {})}
+            event({"choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            time.sleep(self.server.token_latency)
+        event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event({"choices": [], "usage": usage})
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def embeddings(self, request):
+        items = request.get("input", [])
+        if isinstance(items, str) or (items and isinstance(items[0], int)):
+            items = [items]
+        data = []
+        for index, item in enumerate(items):
+            vector = _embedding(item, self.server.embedding_size)
+            if request.get("encoding_format") == "base64":
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode()
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        self._send({
+            "object": "list",
+            "data": data,
+            "model": request.get("model", "fake"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+
+def serve(host="127.0.0.1", port=0, background=True, **kwargs) -> FakeOpenAI:
+    """
+    서버를 시작합니다. port=0 이면 빈 포트 사용 (server.url 을 OPENAI_API_BASE 로 사용)
+    """
+    server = FakeOpenAI((host, port), **kwargs)
+    if background:
+        threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8001)
+    arg_parser.add_argument("--ttft", type=float, default=0.05)
+    arg_parser.add_argument("--token-latency", type=float, default=0.002)
+    arg_parser.add_argument("--answer-tokens", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    server = serve(
+        args.host, args.port, background=False,
+        ttft=args.ttft, token_latency=args.token_latency, answer_tokens=args.answer_tokens,
+    )
+    print(f"fake openai listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+import 시간 벤치마크 (cold start 가드)
+
+새 인터프리터에서 `python -X importtime` 으로 chatbot.custom_chatbot 의 누적 import 시간을 측정하고,
+무거운 의존성이 import 시점에 로드되지 않는지 확인합니다. 예산을 넘으면 exit code 1.
+
+    python -m benchmarks.import_time --budget-ms 150
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+MODULE = "chatbot.custom_chatbot"
+
+# import 시점에 로드되면 안 되는 모듈 (처음 사용할 때 로드)
+LAZY_MODULES = [
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_openai",
+    "langgraph",
+    "faiss",
+    "numpy",
+    "openai",
+    "ollama",
+    "nltk",
+    "httpx",
+    "tiktoken",
+]
+
+PROBE = (
+    "import sys, json; import {module}; "
+    "print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))"
+)
+
+
+def measure(module=MODULE, runs=5):
+    """
+    Returns:
+        (최소 누적 import 시간(ms), import 후 로드된 top-level 모듈 목록)
+    """
+    timings, loaded = [], []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+            capture_output=True, text=True, check=True,
+        )
+        for line in result.stderr.splitlines():
+            match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)$", line)
+            if match and match.group(2) == module:
+                timings.append(int(match.group(1)) / 1000)
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return min(timings), loaded
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--budget-ms", type=float, default=150.0)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    import_ms, loaded = measure(runs=args.runs)
+    eager = [module for module in LAZY_MODULES if module in loaded]
+    print(json.dumps({"module": MODULE, "import_ms": import_ms, "budget_ms": args.budget_ms, "eager_modules": eager}))
+
+    if import_ms > args.budget_ms or eager:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+JaCoCo 파서 벤치마크
+
+클래스 수를 늘려 가며 합성 JaCoCo 리포트를 만들고, 다음의 소요 시간과 최대 메모리(tracemalloc)를 비교합니다.
+
+- streaming: iter_classes 로 class 를 하나씩 받고 보관하지 않음 (파서 자체의 메모리)
+- streaming_markdown: write_markdown 으로 class 단위로 파일에 씀
+- full_result: parse_report 로 CoverageReport 전체를 만듦 (결과 객체가 클래스 수에 비례)
+- legacy: 전체 트리를 읽는 기존 방식 (ET.parse)
+
+    python -m benchmarks.jacoco_parser_benchmark --classes 100 1000 10000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from chatbot.testcode.xml2markdown import iter_classes, parse_report, write_markdown
+
+HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<!DOCTYPE report PUBLIC "-//JACOCO//DTD Report 1.1//EN" "report.dtd">'
+)
+
+
+def _counters(indent, scale=1):
+    return "".join(
+        f'{indent}<counter type="{t}" missed="{m * scale}" covered="{c * scale}"/>\n'
+        for t, m, c in (("INSTRUCTION", 3, 12), ("BRANCH", 1, 1), ("LINE", 1, 4), ("COMPLEXITY", 1, 2), ("METHOD", 0, 1))
+    )
+
+
+def write_report(path, classes, methods=8, classes_per_package=50):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(HEADER + '\n<report name="synthetic">\n')
+        file.write('<sessioninfo id="bench" start="0" dump="0"/>\n')
+        for p in range(0, classes, classes_per_package):
+            file.write(f'<package name="com/example/p{p}">\n')
+            for c in range(p, min(classes, p + classes_per_package)):
+                file.write(f'<class name="com/example/p{p}/C{c}" sourcefilename="C{c}.java">\n')
+                for m in range(methods):
+                    file.write(f'<method name="m{m}" desc="(II)I" line="{m * 5 + 1}">\n{_counters("  ")}</method>\n')
+                file.write(_counters("", methods) + '<counter type="CLASS" missed="0" covered="1"/>\n</class>\n')
+                file.write(f'<sourcefile name="C{c}.java">\n')
+                for line in range(methods * 5):
+                    file.write(f'<line nr="{line + 1}" mi="0" ci="3" mb="0" cb="0"/>\n')
+                file.write(_counters("", methods) + '</sourcefile>\n')
+            file.write('</package>\n')
+        file.write(_counters("", classes * methods) + '</report>\n')
+
+
+def legacy_parse(path):
+    """
+    기존 방식: 전체 트리를 메모리에 올린 뒤 counter 마다 XPath 조회
+    """
+    root = ET.parse(path).getroot()
+    total = 0
+    for cls in root.findall(".//class"):
+        for method in cls.findall("method"):
+            for counter_type in ("INSTRUCTION", "LINE", "COMPLEXITY", "BRANCH", "METHOD"):
+                counter = method.find(f"counter[@type='{counter_type}']")
+                total += int(counter.attrib["covered"]) if counter is not None else 0
+    return total
+
+
+def stream_classes(path):
+    methods = 0
+    for cls in iter_classes(path):
+        methods += len(cls.methods)
+    return methods
+
+
+def stream_markdown(path):
+    with open(os.devnull, "w", encoding="utf-8") as file:
+        write_markdown(path, file)
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(path)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1024 / 1024}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--classes", type=int, nargs="+", default=[100, 1000, 5000])
+    args = arg_parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    for classes in args.classes:
+        path = os.path.join(workdir, f"jacoco_{classes}.xml")
+        write_report(path, classes)
+        print(
+            json.dumps(
+                {
+                    "classes": classes,
+                    "report_mb": os.path.getsize(path) / 1024 / 1024,
+                    "streaming": measure(stream_classes, path),
+                    "streaming_markdown": measure(stream_markdown, path),
+                    "full_result": measure(parse_report, path),
+                    "legacy": measure(legacy_parse, path),
+                }
+            )
+        )
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
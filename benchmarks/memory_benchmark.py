@@ -0,0 +1,46 @@
+"""
+대화 기억 벤치마크
+
+대화가 길어질 때 요청마다 프롬프트에 들어가는 대화 기록(ConversationMemory.context)의 토큰 수가
+일정하게 유지되는지, 전체 기록을 이어 붙이는 방식과 비교합니다. (LLM 없이 로컬 요약 사용)
+
+    python -m benchmarks.memory_benchmark --turns 200
+"""
+import argparse
+import json
+
+from benchmarks.routing_benchmark import load_dataset
+from chatbot.memory import ConversationMemory
+from chatbot.tokens import count_tokens
+
+ANSWER = "divide 메서드는 b 가 0 일 때 예외를 던지도록 수정하는 것이 좋습니다.\n" * 20
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--turns", type=int, default=200)
+    arg_parser.add_argument("--max-turns", type=int, default=4)
+    arg_parser.add_argument("--summary-tokens", type=int, default=400)
+    args = arg_parser.parse_args()
+
+    questions = [sample["question"] for sample in load_dataset()]
+    memory = ConversationMemory(max_turns=args.max_turns, summary_tokens=args.summary_tokens)
+    full_history = []
+    for turn in range(1, args.turns + 1):
+        question = questions[turn % len(questions)]
+        memory.add(question, ANSWER)
+        full_history.append(f"User: {question}\nAssistant: {ANSWER}")
+        if turn in (1, 10, 50) or turn % 100 == 0:
+            print(
+                json.dumps(
+                    {
+                        "turn": turn,
+                        "memory_tokens": count_tokens(memory.context()),
+                        "full_history_tokens": count_tokens("\n".join(full_history)),
+                    }
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
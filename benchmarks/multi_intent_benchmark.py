@@ -0,0 +1,76 @@
+"""
+여러 요청이 섞인 질문(multi-intent) 벤치마크
+
+"리뷰하고 컨벤션도 확인해줘" 같은 질문을 요청마다 따로 물었을 때(순차)와, 한 번에 물어 intent 별 노드를
+병렬로 실행했을 때의 응답 시간을 가짜 LLM 으로 비교합니다.
+
+    python -m benchmarks.multi_intent_benchmark --ttft 0.2 --answer-tokens 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.retrieval_benchmark import synthetic_java
+from benchmarks.routing_benchmark import percentile
+
+QUESTIONS = [
+    ["이 코드 리뷰해줘", "코딩 컨벤션에 맞는지 검사해줘"],
+    ["이 코드 리팩토링 해줘", "네이밍 규칙을 지켰는지 봐줘"],
+    ["잠재적인 오류나 취약점을 찾아줘", "중복 코드를 제거해줘", "들여쓰기와 포맷팅 규칙을 확인해줘"],
+]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--methods", type=int, default=100, help="코드 크기(메서드 수)")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--ttft", type=float, default=0.1)
+    arg_parser.add_argument("--token-latency", type=float, default=0.002)
+    arg_parser.add_argument("--answer-tokens", type=int, default=100)
+    arg_parser.add_argument("--router-mode", choices=["hybrid", "llm", "local"], default="hybrid",
+                            help="기본값은 ChatbotEngine 의 기본 라우팅(hybrid)")
+    args = arg_parser.parse_args()
+
+    os.environ["OLLAMA_PREWARM"] = "0"
+    os.environ["CHATBOT_SPECULATION"] = "0"
+    os.environ.setdefault("CHATBOT_EMBEDDING_STORE", tempfile.mkdtemp(prefix="multi_intent_embeddings_"))
+    from benchmarks.fake_llm import FakeChatModel, fake_embeddings
+    from chatbot.custom_chatbot import ChatbotEngine, CodeChatbot
+
+    llm = FakeChatModel(ttft=args.ttft, token_latency=args.token_latency, answer_tokens=args.answer_tokens)
+    engine = ChatbotEngine(use_cache=False, router_mode=args.router_mode, llm=llm, embeddings=fake_embeddings())
+    code = synthetic_java(args.methods)
+    CodeChatbot(code=code, engine=engine).invoke(QUESTIONS[0][0])  # 인덱스 생성은 측정에서 제외
+
+    results = []
+    for parts in QUESTIONS:
+        sequential, fan_out, ttfts = [], [], []
+        for _ in range(args.repeat):
+            chatbot = CodeChatbot(code=code, engine=engine)
+            start = time.perf_counter()
+            for part in parts:
+                chatbot.invoke(part)
+            sequential.append(time.perf_counter() - start)
+
+            chatbot = CodeChatbot(code=code, engine=engine)
+            answer = "".join(chatbot.stream(" 그리고 ".join(parts)))
+            fan_out.append(chatbot.last_stream_stats["total"])
+            ttfts.append(chatbot.last_stream_stats["ttft"])
+        results.append({
+            "intents": len(parts),
+            "local_routes": [route for route, _ in engine.local_router.route_intents(" 그리고 ".join(parts))]
+            if engine.local_router is not None else None,
+            "sequential_p50_s": percentile(sequential, 50),
+            "fan_out_p50_s": percentile(fan_out, 50),
+            "fan_out_ttft_p50_s": percentile(ttfts, 50),
+            "speedup": percentile(sequential, 50) / percentile(fan_out, 50),
+            "answer_chars": len(answer),
+        })
+        print(json.dumps(results[-1], ensure_ascii=False))
+    print(json.dumps({"router": engine.router_stats, "nodes": engine.metrics.summary()}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Ollama keep-alive / prewarm 벤치마크
+
+요청 사이에 간격을 두고 반복 호출할 때, keep_alive 가 짧은 경우(매번 재로드)와
+keep_alive + prewarm 을 사용한 경우의 로드 시간과 생성 시간을 비교합니다.
+
+    python -m benchmarks.ollama_benchmark                         # 로컬 stand-in 서버 사용
+    python -m benchmarks.ollama_benchmark --host http://localhost:11434 --model codellama:7b
+"""
+import argparse
+import json
+import time
+
+from chatbot.testcode.model.ollama_client import OllamaManager
+
+MESSAGES = [
+    {"role": "system", "content": "generate a junit5 test case for the following Java code."},
+    {"role": "user", "content": "public class Calculator { public int add(int a, int b) { return a + b; } }"},
+]
+
+
+def run(name, manager, model, requests, interval, prewarm):
+    if prewarm:
+        manager.prewarm([model])
+    for _ in range(requests):
+        manager.chat(model, MESSAGES)
+        time.sleep(interval)
+    stats = manager.stats()[model]
+    wall = [timing.wall_seconds for timing in manager.timings if not timing.prewarm]
+    return {
+        "mode": name,
+        "requests": requests,
+        "mean_load_seconds": stats["mean_load_seconds"],
+        "mean_generation_seconds": stats["mean_generation_seconds"],
+        "mean_wall_seconds": sum(wall) / len(wall),
+        "first_wall_seconds": wall[0],
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--host", default=None, help="실제 ollama 서버 (기본: stand-in 서버)")
+    arg_parser.add_argument("--model", default="codellama:7b")
+    arg_parser.add_argument("--requests", type=int, default=5)
+    arg_parser.add_argument("--interval", type=float, default=1.0, help="요청 간 간격(초)")
+    arg_parser.add_argument("--load-seconds", type=float, default=2.0, help="stand-in 서버의 모델 로드 시간")
+    args = arg_parser.parse_args()
+
+    host = args.host
+    if host is None:
+        from benchmarks.fake_ollama import serve
+
+        host = serve(load_seconds=args.load_seconds, generate_seconds=0.2).url
+
+    # keep_alive 가 요청 간격보다 짧으면 매 요청마다 모델을 다시 로드
+    cold = OllamaManager(host=host, keep_alive=f"{args.interval / 2}s")
+    cold.client.generate(model=args.model, prompt="", keep_alive=0)  # 언로드
+    time.sleep(0.1)
+    warm = OllamaManager(host=host, keep_alive="30m")
+
+    for result in (
+        run("short_keep_alive", cold, args.model, args.requests, args.interval, prewarm=False),
+        run("keep_alive+prewarm", warm, args.model, args.requests, args.interval, prewarm=True),
+    ):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+재인덱싱 벤치마크
+
+코드 일부를 수정해 다시 제출할 때, 전체 재구축과 CodeIndex.fork(영속 임베딩 저장소 사용)의
+임베딩 수와 소요 시간을 비교합니다. 임베딩은 결정적인 가짜 모델을 사용합니다.
+
+    python -m benchmarks.reindex_benchmark --methods 500 --edits 1 5 50
+"""
+import argparse
+import hashlib
+import json
+import tempfile
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.retrieval_benchmark import synthetic_java
+from chatbot.code_index import CodeIndex
+from chatbot.embedding_store import CachedEmbeddings, EmbeddingStore
+
+
+class CountingEmbeddings(Embeddings):
+    """
+    텍스트 해시로 만든 벡터를 반환하고 임베딩한 텍스트 수를 셉니다.
+    """
+
+    def __init__(self, size: int = 256) -> None:
+        self.size = size
+        self.embedded = 0
+
+    def _vector(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [digest[i % len(digest)] / 255.0 for i in range(self.size)]
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def edit(code: str, edits: int) -> str:
+    for i in range(edits):
+        code = code.replace(f"int result = a * {i} + b;", f"int result = a * {i} - b;")
+    return code
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--methods", type=int, default=500)
+    arg_parser.add_argument("--edits", type=int, nargs="+", default=[1, 5, 50])
+    args = arg_parser.parse_args()
+
+    code = synthetic_java(args.methods)
+    for edits in args.edits:
+        edited = edit(code, edits)
+
+        # 전체 재구축
+        base = CountingEmbeddings()
+        CodeIndex(code, base).retrieve("review")
+        base.embedded = 0
+        start = time.perf_counter()
+        CodeIndex(edited, base).retrieve("review")
+        rebuild = {"seconds": time.perf_counter() - start, "embedded": base.embedded}
+
+        # 증분 갱신
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingStore(tempfile.mkdtemp()))
+        index = CodeIndex(code, embeddings)
+        index.retrieve("review")
+        base.embedded = 0
+        start = time.perf_counter()
+        _, patch = index.fork(edited)
+        incremental = {"seconds": time.perf_counter() - start, "embedded": base.embedded, **patch}
+
+        print(json.dumps({"methods": args.methods, "edits": edits, "rebuild": rebuild, "incremental": incremental}))
+
+
+if __name__ == "__main__":
+    main()
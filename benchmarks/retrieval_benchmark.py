@@ -0,0 +1,66 @@
+"""
+코드 검색(context) 벤치마크
+
+코드 크기별로 전체 코드를 context 로 보낼 때와 CodeIndex 로 검색한 청크만 보낼 때의
+프롬프트 토큰 수를 비교합니다.
+
+    python -m benchmarks.retrieval_benchmark            # OpenAI 임베딩 사용
+    python -m benchmarks.retrieval_benchmark --fake     # 임의 임베딩 (토큰 수만 비교)
+"""
+import argparse
+import json
+
+from chatbot.code_index import CodeIndex
+
+QUESTIONS = [
+    "divide 메서드에 버그가 있는지 리뷰해줘",
+    "refactor the add methods",
+    "변수 이름이 컨벤션에 맞는지 확인해줘",
+]
+
+
+def synthetic_java(methods: int) -> str:
+    """
+    methods 개의 메서드를 가진 Java 클래스
+    """
+    body = []
+    for i in range(methods):
+        body.append(
+            f"""
+    /** operation {i} */
+    public int operation{i}(int a, int b) {{
+        int result = a * {i} + b;
+        if (result < 0) {{
+            throw new IllegalArgumentException("negative result in operation{i}");
+        }}
+        return result;
+    }}
+"""
+        )
+    return "public class Synthetic {\n" + "".join(body) + "}\n"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--fake", action="store_true", help="임의 임베딩 사용")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = arg_parser.parse_args()
+
+    if args.fake:
+        from langchain_community.embeddings import FakeEmbeddings
+
+        embeddings = FakeEmbeddings(size=256)
+    else:
+        from chatbot import llm_pool
+
+        embeddings = llm_pool.get_embeddings()
+
+    for methods in args.sizes:
+        index = CodeIndex(synthetic_java(methods), embeddings)
+        for question in QUESTIONS:
+            _, stats = index.retrieve(question)
+            print(json.dumps({"methods": methods, "question": question, **stats}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+라우팅 벤치마크
+
+라벨링된 질문 셋으로 라우터별 정확도와 p50/p99 라우팅 지연시간을 측정합니다.
+"fallback": true 인 질문은 어느 route 에도 속하지 않는 요청(예시 질문에 없는 표현)으로,
+로컬 라우터가 답하지 않고 LLM 라우팅으로 넘겨야 합니다. (local 결과의 false_local 이 0 이어야 함)
+
+    python -m benchmarks.routing_benchmark          # 로컬 라우터만
+    python -m benchmarks.routing_benchmark --llm    # LLM / hybrid 라우터 포함 (OPENAI_API_KEY 필요)
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from chatbot.router import LocalRouter
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "routing_questions.jsonl")
+
+
+def load_dataset(path=DATA_PATH):
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(name, route_fn, dataset, repeat=1):
+    """
+    route_fn(question) -> (route, LLM 호출 없이 로컬 라우터가 분류했는지)
+    """
+    latencies, correct, local, local_correct, false_local = [], 0, 0, 0, 0
+    for _ in range(repeat):
+        for sample in dataset:
+            start = time.perf_counter()
+            route, is_local = route_fn(sample["question"])
+            latencies.append(time.perf_counter() - start)
+            if sample.get("fallback"):
+                false_local += is_local
+                continue
+            correct += route == sample["route"]
+            local += is_local
+            local_correct += is_local and route == sample["route"]
+    total = len(dataset) * repeat
+    in_scope = sum(1 for sample in dataset if not sample.get("fallback")) * repeat
+    return {
+        "router": name,
+        "samples": total,
+        "accuracy": correct / in_scope,
+        "local_coverage": local / in_scope,  # LLM 호출 없이 분류한 비율
+        "local_precision": local_correct / local if local else None,
+        "false_local": false_local / repeat,  # 로컬로 분류해 버린 fallback 질문 수 (0 이어야 함)
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--llm", action="store_true", help="LLM / hybrid 라우터도 측정")
+    arg_parser.add_argument("--threshold", type=float, default=0.3)
+    arg_parser.add_argument("--repeat", type=int, default=100, help="로컬 라우터 반복 횟수")
+    args = arg_parser.parse_args()
+
+    dataset = load_dataset()
+    local_router = LocalRouter()
+
+    def route_locally(question):
+        route, confidence = local_router.route(question)
+        return route, confidence >= args.threshold
+
+    results = [run("local", route_locally, dataset, args.repeat)]
+
+    if args.llm:
+        from chatbot.custom_chatbot import CodeChatbot
+
+        for mode in ("llm", "hybrid"):
+            chatbot = CodeChatbot(
+                use_cache=False, router_mode=mode, router_threshold=args.threshold
+            )
+            def route_fn(question, chatbot=chatbot):
+                output = chatbot.engine.route_question({"question": question})
+                return output["generation"], output["route_source"] == "local"
+
+            result = run(mode, route_fn, dataset)
+            result["llm_calls"] = chatbot.router_stats["llm"]
+            results.append(result)
+
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
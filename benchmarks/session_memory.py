@@ -0,0 +1,57 @@
+"""
+세션 메모리 / 그래프 생성 시간 벤치마크
+
+공유 ChatbotEngine 생성 시간과, 세션(CodeChatbot)을 추가할 때마다 늘어나는 메모리를 측정합니다.
+(LLM 호출은 하지 않으므로 API 키 없이 실행 가능)
+
+    python -m benchmarks.session_memory --sessions 200
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.retrieval_benchmark import synthetic_java
+from chatbot.custom_chatbot import ChatbotEngine, CodeChatbot
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sessions", type=int, default=200)
+    arg_parser.add_argument("--methods", type=int, default=50, help="세션별 코드 크기(메서드 수)")
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    engine = ChatbotEngine.shared()
+    engine_seconds = time.perf_counter() - start
+
+    codes = [synthetic_java(args.methods).replace("Synthetic", f"Synthetic{i}") for i in range(args.sessions)]
+    code_bytes = sum(len(code.encode("utf-8")) for code in codes) / len(codes)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    sessions = [CodeChatbot(code=code) for code in codes]
+    session_seconds = time.perf_counter() - start
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        json.dumps(
+            {
+                "engine_build_seconds": engine.build_seconds,
+                "first_engine_seconds": engine_seconds,
+                "sessions": len(sessions),
+                "session_create_ms": session_seconds / len(sessions) * 1000,
+                "bytes_per_session": (after - before) / len(sessions),
+                "code_bytes_per_session": code_bytes,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
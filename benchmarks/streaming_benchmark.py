@@ -0,0 +1,53 @@
+"""
+스트리밍 벤치마크
+
+CodeChatbot.stream 의 time-to-first-token 과 전체 응답 시간을 비교합니다. (OPENAI_API_KEY 필요)
+
+    python -m benchmarks.streaming_benchmark --limit 10
+"""
+import argparse
+import json
+import os
+
+from benchmarks.routing_benchmark import load_dataset, percentile
+
+CODE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "coverity_test", "src", "main", "java", "com", "example", "Calculator.java"
+)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--limit", type=int, default=None, help="측정할 질문 수")
+    args = arg_parser.parse_args()
+
+    from chatbot.custom_chatbot import CodeChatbot
+
+    with open(CODE_PATH, "r", encoding="utf-8") as file:
+        code = file.read()
+    chatbot = CodeChatbot(code=code, use_cache=False)
+
+    ttfts, totals = [], []
+    for sample in load_dataset()[: args.limit]:
+        if sample["route"] == "generate_test_code":
+            continue  # 테스트 생성은 토큰 스트리밍 대상이 아님
+        for _ in chatbot.stream(sample["question"]):
+            pass
+        ttfts.append(chatbot.last_stream_stats["ttft"])
+        totals.append(chatbot.last_stream_stats["total"])
+
+    print(
+        json.dumps(
+            {
+                "samples": len(totals),
+                "ttft_p50_s": percentile(ttfts, 50),
+                "ttft_p99_s": percentile(ttfts, 99),
+                "total_p50_s": percentile(totals, 50),
+                "total_p99_s": percentile(totals, 99),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
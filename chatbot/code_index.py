@@ -0,0 +1,238 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain.text_splitter import Language, RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+
+from chatbot.embedding_store import content_hash
+from chatbot.response_cache import hash_code
+from chatbot.tokens import count_tokens
+
+CHUNK_SEPARATOR = "\n// ...\n"
+
+
+class CodeIndex:
+    """
+    제출된 코드 하나에 대한 FAISS 검색 인덱스
+
+    코드를 언어 문법 경계(class / method 등)에서 나누어 한 번만 임베딩하고,
+    질문마다 관련도가 높은 상위 k 개 청크를 토큰 예산 안에서 context 로 반환합니다.
+    코드 전체가 토큰 예산 안에 들어가면 인덱스를 만들지 않고 코드 전체를 그대로 사용합니다.
+    청크 id 는 내용 해시이므로 fork() 로 코드가 바뀐 새 인덱스를 만들 때 바뀐 청크만 다시 임베딩합니다.
+    만든 뒤에는 code / chunks / vectorstore 를 바꾸지 않으므로(vectorstore 는 처음 한 번만 생성) 검색은 잠금 없이 읽습니다.
+    """
+
+    def __init__(
+        self,
+        code: str,
+        embeddings: Any,
+        language: Language = Language.JAVA,
+        chunk_size: int = 1200,
+        chunk_overlap: int = 100,
+        k: int = 4,
+        token_budget: int = 2000,
+    ) -> None:
+        """
+        Args:
+            code (str): 코드
+            embeddings (Any): 청크 임베딩에 사용할 모델
+            language (Language): 코드 분할 기준 언어
+            chunk_size (int): 청크 최대 길이(문자)
+            chunk_overlap (int): 청크 간 겹치는 길이(문자)
+            k (int): 질문마다 검색할 청크 수
+            token_budget (int): context 로 보낼 최대 토큰 수
+        """
+        self.embeddings = embeddings
+        self.k = k
+        self.token_budget = token_budget
+        self._splitter = RecursiveCharacterTextSplitter.from_language(
+            language=language, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        self._set_code(code)
+        self.vectorstore: Optional[FAISS] = None
+        self._lock = threading.Lock()
+
+    def _set_code(self, code: str) -> None:
+        self.code = code or ""
+        self.full_tokens = count_tokens(self.code)
+        self.chunks: List[str] = self._splitter.split_text(self.code) if self.code else []
+
+    def _unique_chunks(self) -> List[Tuple[str, int, str]]:
+        """
+        (내용 해시, 위치, 청크) 목록. 내용이 같은 청크는 처음 위치 하나만 사용합니다.
+        """
+        unique = {}
+        for position, chunk in enumerate(self.chunks):
+            unique.setdefault(content_hash(chunk), (position, chunk))
+        return [(key, position, chunk) for key, (position, chunk) in unique.items()]
+
+    @property
+    def needs_retrieval(self) -> bool:
+        return self.full_tokens > self.token_budget and len(self.chunks) > 1
+
+    def _get_vectorstore(self) -> FAISS:
+        with self._lock:
+            if self.vectorstore is None:
+                chunks = self._unique_chunks()
+                self.vectorstore = FAISS.from_texts(
+                    [chunk for _, _, chunk in chunks],
+                    self.embeddings,
+                    metadatas=[{"chunk": position} for _, position, _ in chunks],
+                    ids=[key for key, _, _ in chunks],
+                )
+            return self.vectorstore
+
+    async def _aget_vectorstore(self) -> FAISS:
+        if self.vectorstore is None:
+            chunks = self._unique_chunks()
+            vectorstore = await FAISS.afrom_texts(
+                [chunk for _, _, chunk in chunks],
+                self.embeddings,
+                metadatas=[{"chunk": position} for _, position, _ in chunks],
+                ids=[key for key, _, _ in chunks],
+            )
+            with self._lock:
+                if self.vectorstore is None:
+                    self.vectorstore = vectorstore
+        return self.vectorstore
+
+    def fork(self, code: str) -> Tuple["CodeIndex", Dict[str, int]]:
+        """
+        수정된 코드의 새 인덱스를 만듭니다. (이 인덱스는 다른 세션이 계속 쓰므로 바꾸지 않음)
+
+        유지된 청크의 벡터는 이 인덱스에서 그대로 가져오고, 바뀐 청크만 임베딩합니다.
+
+        Returns:
+            Tuple[CodeIndex, Dict[str, int]]: (새 인덱스, 추가 / 삭제 / 유지된 청크 수)
+        """
+        index = copy.copy(self)  # 임베딩 모델, 분할기, 설정만 공유
+        index._lock = threading.Lock()
+        index.vectorstore = None
+        index._set_code(code)
+        chunks = index._unique_chunks()
+        with self._lock:
+            vectorstore = self.vectorstore
+        if vectorstore is None:
+            # 아직 인덱스를 만들지 않았으면 처음 검색할 때 새 코드로 생성
+            return index, {"added": len(chunks), "removed": 0, "kept": 0}
+
+        old_positions = {key: position for position, key in vectorstore.index_to_docstore_id.items()}
+        added = [chunk for key, _, chunk in chunks if key not in old_positions]
+        new_vectors = iter(self.embeddings.embed_documents(added) if added else [])
+        vectors = [
+            vectorstore.index.reconstruct(old_positions[key]).tolist() if key in old_positions else next(new_vectors)
+            for key, _, _ in chunks
+        ]
+        index.vectorstore = FAISS.from_embeddings(
+            list(zip([chunk for _, _, chunk in chunks], vectors)),
+            self.embeddings,
+            metadatas=[{"chunk": position} for _, position, _ in chunks],
+            ids=[key for key, _, _ in chunks],
+        )
+        return index, {
+            "added": len(added),
+            "removed": len(set(old_positions) - {key for key, _, _ in chunks}),
+            "kept": len(chunks) - len(added),
+        }
+
+    def retrieve(self, question: str) -> Tuple[str, Dict[str, int]]:
+        """
+        질문과 관련된 코드 청크를 context 문자열로 반환합니다.
+
+        Returns:
+            Tuple[str, Dict[str, int]]: (context, 전체 코드 / context 토큰 수와 청크 수)
+        """
+        if not self.needs_retrieval:
+            return self._finish(self.code, len(self.chunks))
+        docs = self._get_vectorstore().similarity_search(question, k=self.k)
+        return self._select(docs)
+
+    async def aretrieve(self, question: str) -> Tuple[str, Dict[str, int]]:
+        if not self.needs_retrieval:
+            return self._finish(self.code, len(self.chunks))
+        vectorstore = await self._aget_vectorstore()
+        docs = await vectorstore.asimilarity_search(question, k=self.k)
+        return self._select(docs)
+
+    def _select(self, docs) -> Tuple[str, Dict[str, int]]:
+        # 관련도 순으로 예산 안에 들어가는 청크만 고른 뒤, 원래 코드 순서로 정렬
+        selected, used = [], 0
+        for doc in docs:
+            tokens = count_tokens(doc.page_content)
+            if selected and used + tokens > self.token_budget:
+                break
+            selected.append(doc)
+            used += tokens
+        selected.sort(key=lambda doc: doc.metadata["chunk"])
+        context = CHUNK_SEPARATOR.join(doc.page_content for doc in selected)
+        return self._finish(context, len(selected))
+
+    def _finish(self, context: str, chunks: int) -> Tuple[str, Dict[str, int]]:
+        return context, {
+            "full_tokens": self.full_tokens,
+            "context_tokens": count_tokens(context),
+            "chunks": chunks,
+            "total_chunks": len(self.chunks),
+        }
+
+
+class CodeIndexCache:
+    """
+    코드 해시별 CodeIndex LRU 캐시
+
+    같은 코드를 제출한 세션들은 하나의 인덱스를 공유하고, max_entries 를 넘으면
+    가장 오래 사용되지 않은 인덱스부터 제거합니다. (임베딩은 영속 저장소에 남으므로 재생성 비용은 작음)
+    """
+
+    def __init__(self, embeddings_factory: Callable[[], Any], max_entries: int = 32) -> None:
+        """
+        Args:
+            embeddings_factory (Callable[[], Any]): 인덱스를 만들 때 사용할 임베딩 모델을 반환하는 함수
+            max_entries (int): 보관할 최대 인덱스 수
+        """
+        self.embeddings_factory = embeddings_factory
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[str, CodeIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def get(self, code: Optional[str]) -> CodeIndex:
+        key = hash_code(code)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = CodeIndex(code, self.embeddings_factory())
+        with self._lock:
+            index = self._indexes.setdefault(key, index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def update(self, old_code: Optional[str], new_code: str) -> Dict[str, int]:
+        """
+        old_code 의 인덱스에서 new_code 의 인덱스를 만들어 등록합니다. (copy-on-write)
+
+        old_code 인덱스는 그대로 남으므로 같은 코드를 쓰던 다른 세션의 검색에는 영향이 없습니다.
+        """
+        key = hash_code(new_code)
+        with self._lock:
+            index = self._indexes.get(hash_code(old_code))
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return {}
+        if index is None:
+            return {}
+        index, stats = index.fork(new_code)
+        with self._lock:
+            self._indexes.setdefault(key, index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return stats
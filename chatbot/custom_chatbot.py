@@ -1,21 +1,29 @@
+import asyncio
+import operator
 import os
-from typing import Optional, TypedDict
+import threading
+import time
+from typing import TYPE_CHECKING, Annotated, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, TypedDict
 
 from dotenv import load_dotenv
-from langchain.chat_models import ChatOpenAI
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langgraph.graph import END, StateGraph
-import nltk
 
-from chatbot.testcode.testcode_generator import generate_unit_test, save_test, save_src
+from chatbot import llm_pool
+from chatbot.memory import ConversationMemory, is_follow_up
+from chatbot.metrics import Metrics, NodeEvent, add_usage, track_usage
+from chatbot.response_cache import ResponseCache
+from chatbot.router import ROUTES, LocalRouter
+from chatbot.scheduler import INTERACTIVE, get_scheduler, model_name
+from chatbot.speculation import Speculation, SpeculationAborted, TokenBuffer
 
-nltk.download('punkt_tab')
-nltk.download('averaged_perceptron_tagger_eng')
+# langchain / langgraph / FAISS / openai / ollama 는 import 가 무거우므로 처음 사용할 때 import
+# (Streamlit cold start 와 rerun 시간 단축)
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models import BaseChatModel
+
+    from chatbot.code_index import CodeIndexCache
+    from chatbot.source_index import SourceIndex
+    from chatbot.testcode.coverity_chekcr import TestResult
 
 load_dotenv()
 api_key = os.environ.get("OPENAI_API_KEY")
@@ -23,37 +31,255 @@ api_key = os.environ.get("OPENAI_API_KEY")
 
 class State(TypedDict):
     question: str
+    code: Optional[str]  # 요청마다 전달되는 세션의 코드
+    classes: Optional[List[str]]  # code 가 프로젝트에서 읽은 것이면 포함된 클래스 이름 (직접 입력한 코드는 None)
+    class_source: Optional[str]  # 프로젝트의 클래스 하나를 가리키면 그 클래스 전체 소스 (code 는 excerpt 일 수 있음)
     generation: str
     data: str
     category: Optional[str]
     code_uploaded: bool  # code 파일 업로드 여부
+    retrieval_stats: Dict[str, int]
+    test_job_id: Optional[int]  # 백그라운드 빌드/테스트 잡 id
+    route_source: Optional[str]  # "local" | "llm" (init_answer 가 라우팅한 방식)
+    history: str  # 세션 대화 기록 (ConversationMemory.context)
+    speculative: Optional[Dict]  # 라우팅과 동시에 생성 중인 답변의 task / 토큰 버퍼 (예측이 맞은 경우에만)
+    routes: List[str]  # 질문의 intent 목록 (둘 이상이면 answer_intent 로 병렬 실행)
+    intent: Optional[str]  # answer_intent 가 처리할 intent (Send 로 전달)
+    answers: Annotated[List[Dict], operator.add]  # 병렬 intent 별 답변 (merge_answers 가 합침)
+    sections: List[str]  # 합친 답변의 intent 별 부분 (routes 순서)
 
 
-class CodeChatbot:
+# 답변 토큰을 스트리밍하는 노드 (라우팅 노드의 토큰은 제외)
+STREAMING_NODES = ("plain_answer", "answer_with_retrieval", "answer_intent")
+
+# 여러 intent 를 병렬로 실행하는 노드 (하나의 intent 만 스트리밍)
+FAN_OUT_NODES = ("answer_intent",)
+
+# 여러 intent 를 한 번에 답할 때 intent 별 답변의 초점
+INTENT_FOCUS = {
+    "code_review": "코드 리뷰(버그, 문제점, 개선점)",
+    "code_refactor": "리팩토링 제안과 수정된 코드",
+    "check_convention": "코딩 컨벤션(네이밍, 포맷팅) 준수 여부",
+}
+
+# 노드별 프롬프트 토큰 추정에 쓰는 State 필드 (프롬프트 템플릿 제외)
+# LLM 응답에 usage_metadata 가 없을 때(사용량을 보고하지 않는 모델 등)만 사용
+NODE_PROMPT_FIELDS = {
+    "init_answer": ("question",),
+    "plain_answer": ("question", "history"),
+    "answer_with_retrieval": ("question", "data", "history"),
+    "answer_intent": ("question", "history"),
+    "generate_test_code": ("code",),
+}
+
+
+# 투기 실행 스트림이 중간에 끊겼을 때 이미 보인 토큰 뒤에 붙이는 표시 (이후 답변은 처음부터 다시 반환)
+RESTART_NOTICE = "\n\n(답변 생성이 중단되어 처음부터 다시 답변합니다)\n\n"
+
+
+_usage_handler = None
+
+
+def _usage_config() -> Dict:
+    """
+    LLM 응답(AIMessage.usage_metadata)의 실제 토큰 사용량을 metrics.add_usage 로 보고하는 콜백 config
+    (라우터의 시스템 프롬프트, 재시도, 스트리밍 호출까지 포함. 노드/투기 실행별 합계는 track_usage 에서 모음)
+    """
+    global _usage_handler
+    if _usage_handler is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class UsageHandler(BaseCallbackHandler):
+            run_inline = True  # async 실행에서도 호출한 task 의 context 에서 실행
+
+            def on_llm_end(self, response, **kwargs) -> None:
+                for generations in response.generations:
+                    for generation in generations:
+                        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                        if usage:
+                            add_usage(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+        _usage_handler = UsageHandler()
+    return {"callbacks": [_usage_handler]}
+
+
+class _StreamCollector:
+    """
+    graph.stream / graph.astream 의 (mode, chunk)를 받아 반환할 토큰과 최종 응답을 모읍니다.
+    """
+
+    def __init__(self, question: str) -> None:
+        self.start = time.perf_counter()
+        self.answer = {"question": question}
+        self.streamed = []
+        self.stream_task = None  # 병렬 intent 중 스트리밍하는 task
+        self.speculative: Optional[TokenBuffer] = None  # 라우팅이 맞은 투기 실행의 토큰 (아직 반환 전)
+        self.stats = {"ttft": None, "total": None, "cached": False}
+
+    def _mark_first_token(self) -> None:
+        if self.stats["ttft"] is None:
+            self.stats["ttft"] = time.perf_counter() - self.start
+
+    def add_token(self, token: str) -> str:
+        self._mark_first_token()
+        self.streamed.append(token)
+        return token
+
+    def restart(self) -> str:
+        """
+        지금까지 보낸 토큰을 버리고 처음부터 다시 보낸다는 표시. 이후 토큰(또는 finish)은 답변 전체를 다시 반환
+        """
+        self.streamed = []
+        return RESTART_NOTICE
+
+    def take_speculative(self) -> Optional[TokenBuffer]:
+        """
+        라우팅이 투기 실행과 맞았으면 그 토큰 버퍼 (한 번만 반환). 답변 노드는 LLM 을 호출하지 않으므로 이 버퍼를 스트리밍
+        """
+        speculative, self.speculative = self.speculative, None
+        return speculative
+
+    def feed(self, mode: str, chunk) -> Optional[str]:
+        """
+        반환할 토큰이 있으면 토큰, 없으면 None
+        """
+        if mode == "messages":
+            message, metadata = chunk
+            node = metadata.get("langgraph_node")
+            if node in STREAMING_NODES and message.content:
+                if node in FAN_OUT_NODES:
+                    # 처음 토큰을 보낸 intent 하나만 스트리밍하고, 나머지 intent 의 답변은 finish 에서 이어 붙임
+                    task = metadata.get("langgraph_checkpoint_ns")
+                    if self.stream_task is None:
+                        self.stream_task = task
+                    elif task != self.stream_task:
+                        return None
+                return self.add_token(message.content)
+        else:
+            for update in chunk.values():
+                update = update or {}
+                if update.get("speculative"):
+                    self.speculative = update["speculative"]["stream"]
+                self.answer.update(update)
+        return None
+
+    def finish(self) -> Optional[str]:
+        """
+        출처 태그처럼 노드에서 덧붙인 나머지(혹은 토큰 없이 생성된 답변)를 반환합니다.
+        """
+        generation = self.answer.get("generation") or ""
+        streamed_text = "".join(self.streamed)
+        sections = self.answer.get("sections")
+        if sections and streamed_text and not generation.startswith(streamed_text):
+            # 스트리밍한 intent 의 답변을 앞으로 옮겨 화면에 보인 순서와 저장되는 답변을 맞춤
+            first = next((section for section in sections if section.startswith(streamed_text)), None)
+            if first is not None:
+                generation = "\n\n".join([first] + [section for section in sections if section is not first])
+                self.answer["generation"] = generation
+        rest = generation[len(streamed_text):] if generation.startswith(streamed_text) else ""
+        if rest:
+            self._mark_first_token()
+        self.stats["total"] = time.perf_counter() - self.start
+        return rest or None
+
+
+class ChatbotEngine:
+    """
+    프로세스 전역에서 공유하는 챗봇 엔진
+
+    컴파일된 그래프, LLM 클라이언트, 라우터, 응답 캐시, 코드별 검색 인덱스 캐시를 가집니다.
+    코드는 요청마다 State 로 전달되므로 세션(CodeChatbot)마다 그래프를 다시 만들 필요가 없습니다.
+    """
+
+    _shared: Dict[Tuple, "ChatbotEngine"] = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(
+        cls,
+        use_cache: bool = True,
+        router_mode: str = "hybrid",
+        router_threshold: float = 0.3,
+    ) -> "ChatbotEngine":
+        """
+        설정별로 프로세스에 하나만 만들어지는 엔진
+        """
+        key = (use_cache, router_mode, router_threshold)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(
+                    use_cache=use_cache,
+                    router_mode=router_mode,
+                    router_threshold=router_threshold,
+                )
+            return cls._shared[key]
+
     def __init__(
         self,
-        code : Optional[str] = None,
-        code_path: Optional[str] = None,
-        code_uploaded: bool = False,  # code 파일 업로드 여부
+        cache: Optional[ResponseCache] = None,
+        use_cache: bool = True,
+        router_mode: str = "hybrid",
+        router_threshold: float = 0.3,
+        max_code_indexes: int = 32,
+        metrics: Optional[Metrics] = None,
+        llm: Optional["BaseChatModel"] = None,
+        embeddings: Optional["Embeddings"] = None,
+        speculation: Optional[Speculation] = None,
     ) -> None:
         """
-        Chatbot을 초기화합니다.
-
         Args:
-            code : Optional[str]: 코드
-            code_path (Optional[str], optional): Code 경로
-            code_uploaded (bool, optional): Code 업로드 상태
+            cache (Optional[ResponseCache], optional): 응답 캐시, None 이면 기본 캐시 생성
+            use_cache (bool, optional): 응답 캐시 사용 여부
+            router_mode (str, optional): "llm" | "local" | "hybrid"
+                hybrid 는 로컬 라우터의 confidence 가 router_threshold 이상이면 LLM 호출을 생략
+            router_threshold (float, optional): 로컬 라우터 결과를 채택할 최소 confidence
+            max_code_indexes (int, optional): 보관할 코드별 검색 인덱스 수 (LRU)
+            metrics (Optional[Metrics], optional): 노드별 실행 기록, None 이면 환경 변수 설정으로 생성
+            llm (Optional[BaseChatModel], optional): 답변/라우팅에 사용할 채팅 모델, None 이면 공유 gpt-4o-mini
+            embeddings (Optional[Embeddings], optional): 캐시/코드 검색에 사용할 임베딩, None 이면 공유 OpenAI 임베딩
+            speculation (Optional[Speculation], optional): LLM 라우팅 중 예상 답변을 미리 생성하는 정책,
+                None 이면 환경 변수 설정으로 생성 (CHATBOT_SPECULATION=0 이면 사용 안 함)
         """
-        self.code_uploaded = code_uploaded  # code_uploaded 상태 저장
-        self.code = code
+        start = time.perf_counter()
+        self.metrics = metrics or Metrics.from_env()
 
         # RAG에 활용할 LLM
         if "OPENAI_API_KEY" not in os.environ:
             os.environ["OPENAI_API_KEY"] = os.getenv('OPENAI_API_KEY')
-        self.llm = ChatOpenAI(temperature=0, model="gpt-4o-mini")
+        # (프로세스 전역 풀에서 공유하는 클라이언트)
+        self.llm = llm or llm_pool.get_chat_model("gpt-4o-mini", temperature=0)
 
         # 질문 프롬프트 라우팅에 활용할 LLM
-        self.route_llm =  ChatOpenAI(temperature=0, model="gpt-4o-mini")
+        self.route_llm = llm or llm_pool.get_chat_model("gpt-4o-mini", temperature=0)
+
+        # 응답 캐시 (exact + semantic)
+        # CHATBOT_RESPONSE_CACHE 경로가 지정되면 디스크에 영속화
+        if cache is None and use_cache:
+            cache = ResponseCache(
+                path=os.environ.get("CHATBOT_RESPONSE_CACHE"),
+                embeddings=embeddings or llm_pool.get_embeddings(),
+            )
+        self.cache = cache if use_cache else None
+
+        # 로컬 라우터 (LLM 라우팅 fast-path)
+        if router_mode not in ("llm", "local", "hybrid"):
+            raise ValueError(f"unknown router_mode: {router_mode}")
+        self.router_mode = router_mode
+        self.router_threshold = router_threshold
+        self.local_router = LocalRouter() if router_mode != "llm" else None
+        self.router_stats = {"local": 0, "llm": 0}
+        self.speculation = speculation or Speculation.from_env()
+
+        # 코드별 검색 인덱스 (전체 코드 대신 질문과 관련된 청크만 context 로 전달)
+        from chatbot.code_index import CodeIndexCache
+
+        self.code_indexes: "CodeIndexCache" = CodeIndexCache(
+            (lambda: embeddings) if embeddings is not None else llm_pool.get_code_embeddings,
+            max_entries=max_code_indexes,
+        )
+
+        from langchain_core.runnables import RunnableLambda
+        from langgraph.graph import END, StateGraph
 
         # 그래프 초기화
         self.graph = StateGraph(State)
@@ -64,13 +290,25 @@ class CodeChatbot:
         # "code_refactor" 노드는 self.refactor을 호출
         # "plain_answer" 노드는 self.answer를 호출
         # "answer_with_retrieval" 노드는 self.answer_with_retrieved_data를 호출
-        self.graph.add_node('init_answer',self.route_question)
-        self.graph.add_node('code_review', self.code_review)
-        self.graph.add_node('code_refactor',self.code_refactor)
-        self.graph.add_node('check_convention',self.check_convention)
-        self.graph.add_node('generate_test_code',self.generate_test_code)
-        self.graph.add_node('plain_answer', self.answer)
-        self.graph.add_node('answer_with_retrieval', self.answer_with_retrieved_data)
+        # "answer_intent" 노드는 intent 가 여러 개일 때 intent 마다 병렬로 self.answer_intent를 호출
+        # "merge_answers" 노드는 병렬로 생성한 답변을 self.merge_answers로 합침
+        # LLM 을 호출하는 노드는 ainvoke 경로에서 사용할 async 구현을 함께 등록
+        # 모든 노드는 self.metrics 로 실행 시간/토큰/라우팅 결과를 기록
+        def node(name, func, afunc):
+            func, afunc = self.metrics.instrument(
+                name, func, afunc, lambda state, output: self._describe_node(name, state, output)
+            )
+            return RunnableLambda(func, afunc=afunc)
+
+        self.graph.add_node('init_answer', node('init_answer', self.route_question, self.aroute_question))
+        self.graph.add_node('code_review', node('code_review', self.code_review, self.acode_review))
+        self.graph.add_node('code_refactor', node('code_refactor', self.code_refactor, self.acode_refactor))
+        self.graph.add_node('check_convention', node('check_convention', self.check_convention, self.acheck_convention))
+        self.graph.add_node('generate_test_code', node('generate_test_code', self.generate_test_code, self.agenerate_test_code))
+        self.graph.add_node('plain_answer', node('plain_answer', self.answer, self.aanswer))
+        self.graph.add_node('answer_with_retrieval', node('answer_with_retrieval', self.answer_with_retrieved_data, self.aanswer_with_retrieved_data))
+        self.graph.add_node('answer_intent', node('answer_intent', self.answer_intent, self.aanswer_intent))
+        self.graph.add_node('merge_answers', node('merge_answers', self.merge_answers, self.amerge_answers))
 
         # 시작점 설정
         self.graph.set_entry_point("init_answer")
@@ -84,9 +322,12 @@ class CodeChatbot:
         self.graph.add_edge('code_refactor','answer_with_retrieval')
         self.graph.add_edge('check_convention','answer_with_retrieval')
         self.graph.add_edge('generate_test_code',END)
+        self.graph.add_edge('answer_intent','merge_answers')
+        self.graph.add_edge('merge_answers',END)
 
         # 조건부 간선 추가
         # "plain_answer" 조건은 "plain_answer" 노드로 연결
+        # intent 가 여러 개면 _extract_route 가 intent 마다 Send("answer_intent") 를 반환
         self.graph.add_conditional_edges(
             "init_answer",
             self._extract_route,
@@ -96,69 +337,166 @@ class CodeChatbot:
                 "check_convention": "check_convention",
                 "generate_test_code": "generate_test_code",
                 "plain_answer": "plain_answer",
+                "answer_intent": "answer_intent",
             },
         )
 
         self.graph = self.graph.compile()
+        self.retrieval_chain = self._retrieval_chain()
+        self.router_chain = self._router_chain()
 
-    def invoke(self, question) -> str:
-        # TODO: self.graph의 invoke 메서드를 사용하여 {"question": question}을 입력으로 전달하고, 결과를 answer 변수에 저장하는 코드를 작성하세요.
-        answer = self.graph.invoke({"question": question})
-        return answer
+        # 테스트 생성에 쓰는 로컬 ollama 모델을 백그라운드에서 미리 로드 (OLLAMA_PREWARM=0 이면 생략)
+        if os.environ.get("OLLAMA_PREWARM", "1") != "0":
+            from chatbot.testcode.model.ollama_client import get_manager
+
+            get_manager().prewarm(background=True)
+        self.build_seconds = time.perf_counter() - start
+
+    @staticmethod
+    async def _aspeculative(state: State) -> Optional[Dict]:
+        """
+        라우팅이 맞은 투기 실행의 결과 (생성이 끝날 때까지 기다림). 투기 실행이 없거나 실패했으면 None
+        """
+        speculative = state.get("speculative")
+        return await speculative["task"] if speculative else None
+
+    def _speculative(self, state: State) -> Optional[Dict]:
+        # 투기 실행 task 는 공유 이벤트 루프에 있음
+        return llm_pool.run(self._aspeculative(state)) if state.get("speculative") else None
+
+    def _retrieve(self, state: State):
+        # 투기 실행에서 이미 검색했으면 그 결과를 사용
+        speculative = self._speculative(state)
+        if speculative and "data" in speculative:
+            return speculative["data"], speculative["retrieval_stats"]
+        return self.code_indexes.get(state.get("code")).retrieve(state["question"])
+
+    async def _aretrieve(self, state: State):
+        speculative = await self._aspeculative(state)
+        if speculative and "data" in speculative:
+            return speculative["data"], speculative["retrieval_stats"]
+        return await self.code_indexes.get(state.get("code")).aretrieve(state["question"])
 
     def code_review(self, state: State):
         """
         code review 
         """
         question = state["question"]
-        data = self.code
+        data, stats = self._retrieve(state)
+
+        return {"question": question, "data": data, "category": "code_review", "retrieval_stats": stats}
+
+    async def acode_review(self, state: State):
+        question = state["question"]
+        data, stats = await self._aretrieve(state)
 
-        return {"question": question, "data": data, "category": "code_review"}
+        return {"question": question, "data": data, "category": "code_review", "retrieval_stats": stats}
 
     def code_refactor(self, state: State):
         """
         code review 
         """
         question = state["question"]
-        data = self.code
+        data, stats = self._retrieve(state)
+
+        return {"question": question, "data": data, "category": "code_refactor", "retrieval_stats": stats}
 
-        return {"question": question, "data": data, "category": "code_refactor"}
+    async def acode_refactor(self, state: State):
+        question = state["question"]
+        data, stats = await self._aretrieve(state)
+
+        return {"question": question, "data": data, "category": "code_refactor", "retrieval_stats": stats}
 
     def check_convention(self, state: State):
         """
         code review 
         """
         question = state["question"]
-        data = self.code
+        data, stats = self._retrieve(state)
 
-        return {"question": question, "data": data, "category": "check_convention"}
+        return {"question": question, "data": data, "category": "check_convention", "retrieval_stats": stats}
+
+    async def acheck_convention(self, state: State):
+        question = state["question"]
+        data, stats = await self._aretrieve(state)
+
+        return {"question": question, "data": data, "category": "check_convention", "retrieval_stats": stats}
 
     def generate_test_code(self, state: State):
         """
         code review 
         """
         question = state["question"]
-        data = self.code
-        test_code = generate_unit_test(data)
-        
-        save_src(self.code)
-        save_test(test_code)
+        data = state.get("code")
+        classes = state.get("classes")
+        if classes is not None and len(classes) != 1:
+            # 프로젝트 전체나 여러 클래스를 한 파일로 저장/빌드할 수 없으므로 대상 클래스를 물어봄
+            names = ", ".join(classes[:20]) + (" ..." if len(classes) > 20 else "")
+            return {
+                "question": question,
+                "generation": f"테스트를 생성할 클래스를 하나만 지정해 주세요. (예: \"{classes[0] if classes else 'Calculator'} 테스트 코드 만들어줘\")\n"
+                f"클래스: {names}\n(generate_test_code)",
+                "category": 'generate_test_code',
+                "test_job_id": None,
+            }
+        from chatbot.testcode.coverity_chekcr import get_checker
+        from chatbot.testcode.testcode_generator import generate_compiled_test
+
+        # 컴파일/실행은 excerpt 가 아닌 클래스 전체 소스로
+        source = state.get("class_source") or data
+        # 컴파일 오류가 있으면 오류를 붙여 다시 생성 (gradle 빌드 전에 javac 로 검사)
+        test_code, compiled = generate_compiled_test(data, priority=INTERACTIVE, src_code=source)
+        if not compiled.ok:
+            return {
+                "question": question,
+                "generation": '```java' + test_code + '\n```\n컴파일 오류가 남아 테스트를 실행하지 않았습니다.\n```\n'
+                + compiled.summary() + '\n```' + '\n(generate_test_code)',
+                "category": 'generate_test_code',
+                "test_job_id": None,
+            }
+
+        # 빌드/테스트/커버리지는 백그라운드 워커의 격리된 작업 디렉토리에서 실행하고 결과는 CodeChatbot.poll_test_results 로 전달
+        # (공유 coverity_test/src 에는 쓰지 않음: 세션끼리 덮어쓰고 다른 세션의 javac -sourcepath 에 섞임)
+        job = get_checker().submit(source, test_code, compiled=not compiled.skipped)
 
         return {
             "question": question,
             "generation": '```java'+test_code+'\n```' + '\n(generate_test_code)',
             "category": 'generate_test_code',
+            "test_job_id": job.job_id,
         }
 
+    async def agenerate_test_code(self, state: State):
+        # 테스트 생성은 동기 라이브러리(openai/ollama)를 사용하므로 스레드에서 실행
+        async with llm_pool.limit():
+            return await asyncio.to_thread(self.generate_test_code, state)
+
     def answer(self, state: State):
         """
         일반 답변 생성
         """
         question = state["question"]
+        speculative = self._speculative(state)
+        generation = speculative["generation"] if speculative else self._call("llm", self._with_history(state)).content
+
+        return {
+            "question": question,
+            "generation": generation,
+            "category": None,
+        }
+
+    async def aanswer(self, state: State):
+        question = state["question"]
+        speculative = await self._aspeculative(state)
+        if speculative:
+            generation = speculative["generation"]
+        else:
+            async with llm_pool.limit():
+                generation = (await self._acall("llm", self._with_history(state))).content
 
         return {
             "question": question,
-            "generation": self.llm.invoke(question).content,
+            "generation": generation,
             "category": None,
         }
 
@@ -171,6 +509,102 @@ class CodeChatbot:
         data = state["data"]
         category = state.get("category", None)  # 출처 정보 가져오기
 
+        speculative = self._speculative(state)
+        if speculative:
+            generation = speculative["generation"]
+        else:
+            generation = self._call(
+                "retrieval", {"context": data, "question": question, "history": state.get("history") or "없음"}
+            )
+
+        return {
+            "question": question,
+            "data": data,
+            "generation": self._tag_generation(generation, category),
+            "category": category,
+        }
+
+    async def aanswer_with_retrieved_data(self, state: State):
+        question = state["question"]
+        data = state["data"]
+        category = state.get("category", None)
+
+        speculative = await self._aspeculative(state)
+        if speculative:
+            generation = speculative["generation"]
+        else:
+            async with llm_pool.limit():
+                generation = await self._acall(
+                    "retrieval", {"context": data, "question": question, "history": state.get("history") or "없음"}
+                )
+
+        return {
+            "question": question,
+            "data": data,
+            "generation": self._tag_generation(generation, category),
+            "category": category,
+        }
+
+    def _intent_inputs(self, state: State, data: str) -> Dict:
+        intent = state["intent"]
+        return {
+            "context": data,
+            "question": f"{state['question']}\n(이 답변에서는 {INTENT_FOCUS[intent]}에 대해서만 답하세요.)",
+            "history": state.get("history") or "없음",
+        }
+
+    def answer_intent(self, state: State):
+        """
+        여러 intent 중 state["intent"] 하나에 대한 답변 (intent 마다 병렬 실행, merge_answers 에서 합침)
+        """
+        intent = state["intent"]
+        if intent == "generate_test_code":
+            output = self.generate_test_code(state)
+            return {"answers": [{"intent": intent, "generation": output["generation"], "test_job_id": output["test_job_id"]}]}
+
+        data, stats = self._retrieve(state)
+        generation = self._call("retrieval", self._intent_inputs(state, data))
+        return {"answers": [{"intent": intent, "generation": self._tag_generation(generation, intent), "retrieval_stats": stats}]}
+
+    async def aanswer_intent(self, state: State):
+        intent = state["intent"]
+        if intent == "generate_test_code":
+            output = await self.agenerate_test_code(state)
+            return {"answers": [{"intent": intent, "generation": output["generation"], "test_job_id": output["test_job_id"]}]}
+
+        data, stats = await self._aretrieve(state)
+        async with llm_pool.limit():
+            generation = await self._acall("retrieval", self._intent_inputs(state, data))
+        return {"answers": [{"intent": intent, "generation": self._tag_generation(generation, intent), "retrieval_stats": stats}]}
+
+    def merge_answers(self, state: State):
+        """
+        intent 별 답변을 routes 순서로 합침
+        """
+        order = {route: i for i, route in enumerate(state.get("routes") or [])}
+        answers = sorted(state.get("answers") or [], key=lambda answer: order.get(answer["intent"], len(order)))
+        sections = [answer["generation"] for answer in answers]
+        merged = {
+            "question": state["question"],
+            "generation": "\n\n".join(sections),
+            "sections": sections,
+            "category": "+".join(answer["intent"] for answer in answers),
+        }
+        stats = next((answer["retrieval_stats"] for answer in answers if answer.get("retrieval_stats")), None)
+        if stats is not None:
+            merged["retrieval_stats"] = stats
+        job_id = next((answer["test_job_id"] for answer in answers if answer.get("test_job_id") is not None), None)
+        if job_id is not None:
+            merged["test_job_id"] = job_id
+        return merged
+
+    async def amerge_answers(self, state: State):
+        return self.merge_answers(state)
+
+    def _retrieval_chain(self):
+        """
+        검색 데이터 기반 답변 체인
+        """
         # 데이터 출처별 시스템 프롬프트 설정
         base_prompt = """
             당신은 사용자의 질문에 자세하게 답변하는 QA 챗봇입니다. 
@@ -190,16 +624,77 @@ class CodeChatbot:
 
         messages = [
             ("system", system_prompt),
-            ("human", "\n질문: {question}.\n문서: {context}.\n"),
+            ("human", "\n이전 대화: {history}\n질문: {question}.\n문서: {context}.\n"),
         ]
 
         # messages를 사용해 ChatPromptTemplate을 생성하고 이를 prompt에 저장하세요.
         # prompt를 self.llm 및 StrOutputParser()와 연결하여 체인을 구성하세요.
-        # {"context": data, "question": question}을 입력으로 전달하여 generation 변수에 저장하는 코드를 작성하세요.
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+
         prompt = ChatPromptTemplate(messages)
-        chain = prompt | self.llm | StrOutputParser()
-        generation = chain.invoke({"context": data, "question": question})
+        return prompt | self.llm | StrOutputParser()
+
+    @staticmethod
+    def _with_history(state: State):
+        """
+        일반 답변 입력. 대화 기록이 있으면 시스템 메시지로 함께 전달
+        """
+        history = state.get("history")
+        if not history:
+            return state["question"]
+        return [
+            ("system", "아래는 사용자와의 이전 대화입니다. 필요하면 참고해서 답변하세요.\n\n" + history),
+            ("human", state["question"]),
+        ]
+
+    def _chain(self, name: str):
+        # (runnable, rate limit 을 적용할 모델)
+        if name == "router":
+            return self.router_chain, self.route_llm
+        return (self.retrieval_chain if name == "retrieval" else self.llm), self.llm
+
+    def _call(self, name: str, inputs, priority: int = INTERACTIVE):
+        """
+        LLM 호출 ("llm" | "retrieval" | "router"). 공유 스케줄러를 거쳐 rate limit / 재시도 / 같은 요청 합치기를 적용
+        """
+        runnable, llm = self._chain(name)
+        return get_scheduler().call(
+            model_name(llm), lambda: runnable.invoke(inputs, config=_usage_config()), payload=[name, inputs],
+            priority=priority,
+        )
+
+    async def _acall(self, name: str, inputs, priority: int = INTERACTIVE):
+        runnable, llm = self._chain(name)
+        return await get_scheduler().acall(
+            model_name(llm), lambda: runnable.ainvoke(inputs, config=_usage_config()), payload=[name, inputs],
+            priority=priority,
+        )
+
+    async def _astream_call(self, name: str, inputs, buffer: TokenBuffer, priority: int = INTERACTIVE) -> str:
+        """
+        _acall 과 같지만 생성되는 토큰을 buffer 에 넣으면서 생성하고 전체 텍스트를 반환합니다.
+        (토큰을 이 buffer 로 받아야 하므로 같은 요청 합치기는 하지 않음)
+        """
+        runnable, llm = self._chain(name)
+
+        async def generate():
+            # 이미 토큰을 보낸 뒤의 재시도면 buffer 는 실패로 처리되고, 생성한 답변은 반환값으로만 사용
+            buffer.reset()
+            chunks = []
+            async for chunk in runnable.astream(inputs, config=_usage_config()):
+                token = getattr(chunk, "content", chunk)
+                if token:
+                    chunks.append(token)
+                    buffer.append(token)
+            return "".join(chunks)
+
+        return await get_scheduler().acall(
+            model_name(llm), generate, payload=[name, inputs], priority=priority, coalesce=False
+        )
 
+    @staticmethod
+    def _tag_generation(generation: str, category: Optional[str]) -> str:
         # 출처 태그 추가
         if category == "code_review":
             generation += "\n(review)"
@@ -210,19 +705,69 @@ class CodeChatbot:
         elif category == "generate_test_code":
             generation += "\n(test code)"
         else: generation +="\n(일반)"
+        return generation
 
-        return {
-            "question": question,
-            "data": data,
-            "generation": generation,
-            "category": category,
-        }
+    @staticmethod
+    def _describe_node(node: str, state: State, output) -> Dict:
+        """
+        노드 실행 기록에 남길 토큰 수 추정치와 라우팅 결과 (LLM 이 사용량을 보고하면 Metrics 가 실제 값으로 교체)
+        """
+        from chatbot.tokens import count_tokens
+
+        output = output or {}
+        description = {}
+        if node == "init_answer":
+            description["route"] = output.get("generation")
+            if output.get("route_source") != "llm":
+                return description
+        fields = NODE_PROMPT_FIELDS.get(node)
+        if fields:
+            generation = output.get("generation") or "".join(
+                answer.get("generation") or "" for answer in output.get("answers") or []
+            )
+            description["prompt_tokens"] = sum(count_tokens(state.get(field) or "") for field in fields)
+            # answer_intent 는 노드 안에서 검색한 context 를 State 에 남기지 않으므로 검색 통계에서 더함
+            description["prompt_tokens"] += sum(
+                (answer.get("retrieval_stats") or {}).get("context_tokens", 0) for answer in output.get("answers") or []
+            )
+            description["completion_tokens"] = count_tokens(generation)
+        return description
+
+    def _extract_route(self, state: State):
+        """
+        라우팅 결과 추출. intent 가 여러 개면 intent 마다 answer_intent 를 병렬로 실행
+        """
+        routes = state.get("routes") or [state["generation"]]
+        for route in routes:
+            self.speculation.observe(route)
+        if len(routes) == 1:
+            return routes[0]
 
-    def _extract_route(self, state: State) -> str:
+        from langgraph.types import Send
+
+        return [Send("answer_intent", {**state, "intent": route}) for route in routes]
+
+    @staticmethod
+    def _parse_routes(result) -> List[str]:
         """
-        라우팅 결과 추출
+        LLM 라우팅 결과의 route (문자열, 쉼표로 구분한 문자열 또는 목록)를 intent 목록으로 정리
         """
-        return state["generation"]
+        routes = result.get("route") if isinstance(result, dict) else result
+        if isinstance(routes, str):
+            routes = routes.split(",")
+        parsed = []
+        for route in routes or []:
+            route = str(route).lower().strip().strip("`")
+            if route in ROUTES and route not in parsed:
+                parsed.append(route)
+        # 다른 intent 와 함께 나온 일반 답변은 생략
+        if len(parsed) > 1 and "plain_answer" in parsed:
+            parsed.remove("plain_answer")
+        return parsed or ["plain_answer"]
+
+    @staticmethod
+    def _route_output(question: str, routes: List[str], source: str) -> Dict[str, Any]:
+        return {"question": question, "generation": "+".join(routes), "routes": routes, "route_source": source}
 
 
 ## TODO : 라우팅 조건 확인
@@ -230,6 +775,152 @@ class CodeChatbot:
         """
         질문 라우팅 처리
         """
+        question = state["question"]
+
+        # 로컬 라우터가 충분히 확신하면 LLM 라우팅 생략
+        routes = self._route_locally(question)
+        if routes is not None:
+            return self._route_output(question, routes, "local")
+
+        # LLM 라우팅과 예상 route 의 답변 생성을 공유 이벤트 루프에서 동시에 실행
+        predicted = self._predict_route(question)
+        if predicted is not None:
+            return llm_pool.run(self._aroute_speculatively(state, predicted))
+
+        result = self._call("router", {"question": question})
+
+        return self._route_output(question, self._parse_routes(result), "llm")
+
+    async def aroute_question(self, state: State):
+        question = state["question"]
+
+        routes = self._route_locally(question)
+        if routes is not None:
+            return self._route_output(question, routes, "local")
+
+        predicted = self._predict_route(question)
+        if predicted is not None:
+            return await self._aroute_speculatively(state, predicted)
+
+        async with llm_pool.limit():
+            result = await self._acall("router", {"question": question})
+
+        return self._route_output(question, self._parse_routes(result), "llm")
+
+    def _route_locally(self, question: str) -> Optional[List[str]]:
+        """
+        로컬 라우터 결과를 채택할 수 있으면 route 목록, 아니면(LLM 라우팅 필요) None
+
+        접속 표현으로 이어진 요청은 요청마다 분류하고, 모든 요청이 threshold 이상일 때만 채택
+        """
+        if self.local_router is not None:
+            intents = self.local_router.route_intents(question)
+            if self.router_mode == "local" or all(confidence >= self.router_threshold for _, confidence in intents):
+                self.router_stats["local"] += 1
+                return [route for route, _ in intents]
+        self.router_stats["llm"] += 1
+        return None
+
+    def _predict_route(self, question: str) -> Optional[str]:
+        """
+        LLM 라우팅과 동시에 미리 실행할 route. 투기 실행을 하지 않으면 None
+        """
+        local_guess = None
+        if self.local_router is not None:
+            intents = self.local_router.route_intents(question)
+            if len(intents) > 1:
+                return None  # 여러 intent 는 answer_intent 로 나눠 실행하므로 미리 생성한 답변을 쓸 수 없음
+            local_guess = intents[0][0]
+        predicted = self.speculation.predict(local_guess)
+        if predicted is None or not self.speculation.acquire(llm_pool.stats()["available"]):
+            return None
+        return predicted
+
+    async def _aspeculate(self, state: State, route: str, buffer: TokenBuffer) -> Optional[Dict]:
+        """
+        route 로 라우팅됐다고 가정하고 답변(검색 포함)을 미리 생성. 생성되는 토큰은 buffer 에 모음
+        LLM 사용량은 라우팅 노드가 아니라 별도 "speculative" 항목으로 기록 (버려진 실행 포함)
+        """
+        start = time.perf_counter()
+        speculative = {"route": route}
+        with track_usage() as usage:
+            try:
+                if route == "plain_answer":
+                    async with llm_pool.limit():
+                        speculative["generation"] = await self._astream_call("llm", self._with_history(state), buffer)
+                else:
+                    data, stats = await self.code_indexes.get(state.get("code")).aretrieve(state["question"])
+                    async with llm_pool.limit():
+                        speculative["generation"] = await self._astream_call(
+                            "retrieval",
+                            {"context": data, "question": state["question"], "history": state.get("history") or "없음"},
+                            buffer,
+                        )
+                    speculative.update(data=data, retrieval_stats=stats)
+            except Exception as e:
+                print(f"speculative {route} failed: {type(e).__name__}: {e}")
+                buffer.fail()  # 보낸 토큰 뒤에 답변 노드의 새 생성을 이어 붙이지 않도록
+                return None
+            finally:
+                buffer.close()
+                self._record_speculative(time.perf_counter() - start, usage, buffer)
+        speculative["seconds"] = time.perf_counter() - start
+        return speculative
+
+    def _record_speculative(self, seconds: float, usage: Dict[str, int], buffer: TokenBuffer) -> None:
+        from chatbot.tokens import count_tokens
+
+        # 생성 중에 취소되면 usage_metadata 를 받지 못하므로 받은 토큰으로 응답 토큰만 추정
+        completion_tokens = usage["completion_tokens"] if usage["calls"] else count_tokens("".join(buffer.chunks))
+        self.metrics.record(NodeEvent(
+            "speculative", seconds, prompt_tokens=usage["prompt_tokens"], completion_tokens=completion_tokens,
+        ))
+
+    async def _aroute_speculatively(self, state: State, predicted: str):
+        """
+        LLM 라우팅과 predicted route 의 답변 생성을 동시에 실행합니다.
+        라우팅 결과가 predicted 와 같으면 생성이 끝나길 기다리지 않고 진행 중인 task 와 토큰 버퍼를
+        state["speculative"] 로 넘기고(스트리밍은 버퍼에서 바로 시작, 답변 노드는 task 결과 사용), 다르면 취소합니다.
+        """
+        question = state["question"]
+        start = time.perf_counter()
+        buffer = TokenBuffer()
+        task = asyncio.ensure_future(self._aspeculate(state, predicted, buffer))
+        try:
+            async with llm_pool.limit():
+                result = await self._acall("router", {"question": question})
+        except BaseException:
+            task.cancel()
+            self.speculation.finish(None)
+            raise
+        routes = self._parse_routes(result)
+        route_seconds = time.perf_counter() - start
+        output = self._route_output(question, routes, "llm")
+
+        if routes != [predicted]:
+            task.cancel()
+            self.speculation.finish(False, wasted_seconds=route_seconds)
+            return output
+
+        def finished(task):
+            speculative = None if task.cancelled() else task.result()
+            if speculative is None or buffer.failed:
+                self.speculation.finish(None)
+                return
+            # 순차 실행이었다면 라우팅 + 생성 시간이 걸렸을 것
+            saved = route_seconds + speculative["seconds"] - (time.perf_counter() - start)
+            self.speculation.finish(True, saved_seconds=saved)
+
+        task.add_done_callback(finished)
+        output["speculative"] = {"route": predicted, "task": task, "stream": buffer}
+        return output
+
+    def _router_chain(self):
+        """
+        LLM 라우팅 체인
+        """
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
 
         route_system_message = (
             "당신은 사용자의 질문에 답변하기 위한 소스를 선택해야 합니다."
@@ -256,19 +947,305 @@ class CodeChatbot:
         route_system_message += (
             f"주어진 질문에 맞춰 {usable_tools_text} 중 하나를 선택하세요.\n"
         )
+        route_system_message += (
+            "질문이 여러 요청을 함께 담고 있다면(예: 리뷰하고 컨벤션도 확인해줘) 해당하는 것을 모두 선택하세요.\n"
+        )
         route_system_message +=  f"어떤 {usable_tools_text}를 사용했는지 밝히세요\n"
-        route_system_message += "답변은 `route` key 하나만 있는 JSON으로 답변하고, 다른 텍스트나 설명을 생성하지 마세요."
+        route_system_message += (
+            "답변은 선택한 이름의 목록을 값으로 하는 `route` key 하나만 있는 JSON으로 답변하고 "
+            "(예: {{\"route\": [\"code_review\", \"check_convention\"]}}), 다른 텍스트나 설명을 생성하지 마세요."
+        )
 
         route_prompt = ChatPromptTemplate.from_messages(
             [("system", route_system_message), ("human", "{question}")]
         )
 
-        router_chain = route_prompt | self.route_llm | JsonOutputParser()
-        
-        question = state["question"]
-        route = router_chain.invoke({"question": question})["route"]
+        return route_prompt | self.route_llm | JsonOutputParser()
+
+
+class CodeChatbot:
+    """
+    사용자 세션 하나의 챗봇
+
+    코드와 세션별 통계만 가지며, 그래프와 LLM 클라이언트는 공유 ChatbotEngine 을 사용합니다.
+    """
+
+    def __init__(
+        self,
+        code : Optional[str] = None,
+        code_path: Optional[str] = None,
+        code_uploaded: bool = False,  # code 파일 업로드 여부
+        cache: Optional[ResponseCache] = None,
+        use_cache: bool = True,
+        router_mode: str = "hybrid",
+        router_threshold: float = 0.3,
+        engine: Optional[ChatbotEngine] = None,
+        memory_turns: int = 4,
+        summary_tokens: int = 400,
+        project: Optional["SourceIndex"] = None,
+    ) -> None:
+        """
+        Chatbot을 초기화합니다.
+
+        Args:
+            code : Optional[str]: 코드
+            code_path (Optional[str], optional): Code 경로
+            code_uploaded (bool, optional): Code 업로드 상태
+            cache (Optional[ResponseCache], optional): 응답 캐시, 지정하면 이 세션 전용 엔진을 생성
+            use_cache (bool, optional): 응답 캐시 사용 여부
+            router_mode (str, optional): "llm" | "local" | "hybrid"
+            router_threshold (float, optional): 로컬 라우터 결과를 채택할 최소 confidence
+            engine (Optional[ChatbotEngine], optional): 사용할 엔진, None 이면 공유 엔진
+            memory_turns (int, optional): 그대로 프롬프트에 넣을 최근 대화 수
+            summary_tokens (int, optional): 그보다 오래된 대화 요약의 최대 토큰 수
+            project (Optional[SourceIndex], optional): 업로드된 프로젝트의 클래스/메서드 인덱스.
+                지정하면 질문마다 언급된 클래스(메서드)의 소스만 code 로 사용
+        """
+        self.code_uploaded = code_uploaded  # code_uploaded 상태 저장
+        self.code = code
+        self.project = project
+        self._project_text: Optional[str] = None
+
+        if engine is None:
+            if cache is not None:
+                engine = ChatbotEngine(
+                    cache=cache, use_cache=use_cache,
+                    router_mode=router_mode, router_threshold=router_threshold,
+                )
+            else:
+                engine = ChatbotEngine.shared(
+                    use_cache=use_cache,
+                    router_mode=router_mode,
+                    router_threshold=router_threshold,
+                )
+        self.engine = engine
+        self.memory = ConversationMemory(
+            max_turns=memory_turns, summary_tokens=summary_tokens, summarizer=engine.llm
+        )
+
+        self.last_stream_stats = {"ttft": None, "total": None, "cached": False}
+        self.last_retrieval_stats = {}
+        self.last_reindex_stats = {}
+        self.test_jobs: List[int] = []
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self.engine.cache
 
+    @property
+    def router_stats(self) -> Dict[str, int]:
+        return self.engine.router_stats
+
+    def _code_for(self, question) -> Tuple[Optional[str], Optional[List[str]]]:
+        """
+        질문에 사용할 코드와, 프로젝트에서 읽은 경우 포함된 클래스 이름
+
+        프로젝트가 있으면 질문이 가리키는 클래스만 읽고, 특정 클래스를 가리키지 않으면
+        입력한 코드 또는 프로젝트 전체(검색/답변용. 테스트 생성은 클래스가 하나로 정해져야 실행)
+        """
+        if self.project is None:
+            return self.code, None
+        found = self.project.find(question)[:3]
+        if found:
+            return self.project.render(found), [entry.name for entry, _ in found]
+        if self.code:
+            return self.code, None
+        if self._project_text is None:
+            self._project_text = self.project.text()
+        return self._project_text, sorted(self.project.classes)
+
+    def _inputs(self, question, code, classes=None) -> State:
         return {
-            "question": state["question"],
-            "generation": route.lower().strip(),
+            "question": question, "code": code, "classes": classes, "class_source": self._class_source(classes),
+            "history": self.memory.context(),
         }
+
+    def _class_source(self, classes) -> Optional[str]:
+        # 테스트 생성 대상 클래스의 전체 소스 (code 는 질문한 메서드만 남긴 excerpt 일 수 있음)
+        if self.project is None or not classes or len(classes) != 1:
+            return None
+        entries = self.project.classes.get(classes[0]) or []
+        return self.project.source(entries[0]) if len(entries) == 1 else None
+
+    def _cache_scope(self, question, code) -> Optional[str]:
+        """
+        응답 캐시의 scope. 이전 대화를 가리키는 질문은 답이 대화 기록에 따라 달라지므로 기록까지 포함
+        (대화 기록과 관계없는 질문은 기록이 있어도 코드만으로 재사용)
+        """
+        history = self.memory.context()
+        if history and is_follow_up(question):
+            return f"{code or ''}\n[history]\n{history}"
+        return code
+
+    def update_code(self, code: str) -> None:
+        """
+        코드를 수정해 다시 제출합니다. 검색 인덱스는 바뀐 청크만 다시 임베딩한 새 인덱스를 만들고,
+        이전 코드의 인덱스는 같은 코드를 쓰는 다른 세션을 위해 그대로 둡니다.
+        """
+        self.last_reindex_stats = self.engine.code_indexes.update(self.code, code)
+        self.code = code
+
+    def poll_test_results(self) -> List["TestResult"]:
+        """
+        이 세션이 요청한 테스트 잡 중 끝난 것의 결과를 반환합니다. (반환된 잡은 목록에서 제거)
+        """
+        from chatbot.testcode.coverity_chekcr import get_checker
+
+        finished = []
+        for job_id in list(self.test_jobs):
+            result = get_checker().get_result(job_id)
+            if result is not None:
+                finished.append(result)
+                self.test_jobs.remove(job_id)
+        return finished
+
+    def _lookup(self, question, scope):
+        # 캐시 조회 결과도 노드 실행 기록에 남김 (node="response_cache")
+        start = time.perf_counter()
+        cached = self.cache.lookup(question, scope)
+        self.engine.metrics.record(
+            NodeEvent("response_cache", time.perf_counter() - start, cache_hit=cached is not None)
+        )
+        return cached
+
+    async def _alookup(self, question, scope):
+        start = time.perf_counter()
+        cached = await self.cache.alookup(question, scope)
+        self.engine.metrics.record(
+            NodeEvent("response_cache", time.perf_counter() - start, cache_hit=cached is not None)
+        )
+        return cached
+
+    def _track(self, question, answer) -> None:
+        self.memory.add(question, answer.get("generation") or "")
+        self.last_retrieval_stats = answer.get("retrieval_stats") or {}
+        if answer.get("test_job_id") is not None:
+            self.test_jobs.append(answer["test_job_id"])
+
+    def invoke(self, question) -> str:
+        # 같은 코드에 대한 같은(혹은 유사한) 질문이면 캐시된 응답을 반환
+        code, classes = self._code_for(question)
+        use_cache = self.cache is not None
+        scope = self._cache_scope(question, code)
+        if use_cache:
+            cached = self._lookup(question, scope)
+            if cached is not None:
+                self.memory.add(question, cached.get("generation") or "")
+                return cached
+
+        start = time.perf_counter()
+        answer = self.engine.graph.invoke(self._inputs(question, code, classes))
+        self._track(question, answer)
+
+        if use_cache:
+            self.cache.store(question, scope, answer, time.perf_counter() - start)
+        return answer
+
+    def stream(self, question) -> Iterator[str]:
+        """
+        답변 토큰을 생성되는 대로 반환합니다.
+
+        스트리밍 후 self.last_stream_stats 에 time-to-first-token(ttft)과 전체 응답 시간(total)을 기록합니다.
+        """
+        collector = _StreamCollector(question)
+        self.last_stream_stats = collector.stats
+
+        code, classes = self._code_for(question)
+        use_cache = self.cache is not None
+        scope = self._cache_scope(question, code)
+        if use_cache:
+            cached = self._lookup(question, scope)
+            if cached is not None:
+                elapsed = time.perf_counter() - collector.start
+                self.last_stream_stats = {"ttft": elapsed, "total": elapsed, "cached": True}
+                yield cached["generation"]
+                self.memory.add(question, cached["generation"])
+                return
+
+        for mode, chunk in self.engine.graph.stream(
+            self._inputs(question, code, classes), stream_mode=["messages", "updates"]
+        ):
+            token = collector.feed(mode, chunk)
+            if token is not None:
+                yield token
+            speculative = collector.take_speculative()
+            if speculative is not None:
+                # 라우팅 중 모아 둔 토큰부터 생성되는 대로 반환
+                try:
+                    for token in llm_pool.iterate(speculative.tokens()):
+                        yield collector.add_token(token)
+                except SpeculationAborted:
+                    yield collector.restart()
+        rest = collector.finish()
+        if rest is not None:
+            yield rest
+        self._track(question, collector.answer)
+
+        if use_cache:
+            self.cache.store(question, scope, collector.answer, collector.stats["total"])
+
+    async def ainvoke(self, question):
+        """
+        invoke 의 async 버전
+
+        공유 이벤트 루프에서 실행합니다. 동기 코드에서는 llm_pool.run(chatbot.ainvoke(question))
+        """
+        code, classes = self._code_for(question)
+        use_cache = self.cache is not None
+        scope = self._cache_scope(question, code)
+        if use_cache:
+            cached = await self._alookup(question, scope)
+            if cached is not None:
+                self.memory.add(question, cached.get("generation") or "")
+                return cached
+
+        start = time.perf_counter()
+        answer = await self.engine.graph.ainvoke(self._inputs(question, code, classes))
+        self._track(question, answer)
+
+        if use_cache:
+            await self.cache.astore(question, scope, answer, time.perf_counter() - start)
+        return answer
+
+    async def astream(self, question) -> AsyncIterator[str]:
+        """
+        stream 의 async 버전
+
+        동기 코드에서는 llm_pool.iterate(chatbot.astream(question))
+        """
+        collector = _StreamCollector(question)
+        self.last_stream_stats = collector.stats
+
+        code, classes = self._code_for(question)
+        use_cache = self.cache is not None
+        scope = self._cache_scope(question, code)
+        if use_cache:
+            cached = await self._alookup(question, scope)
+            if cached is not None:
+                elapsed = time.perf_counter() - collector.start
+                self.last_stream_stats = {"ttft": elapsed, "total": elapsed, "cached": True}
+                yield cached["generation"]
+                self.memory.add(question, cached["generation"])
+                return
+
+        async for mode, chunk in self.engine.graph.astream(
+            self._inputs(question, code, classes), stream_mode=["messages", "updates"]
+        ):
+            token = collector.feed(mode, chunk)
+            if token is not None:
+                yield token
+            speculative = collector.take_speculative()
+            if speculative is not None:
+                try:
+                    async for token in speculative.tokens():
+                        yield collector.add_token(token)
+                except SpeculationAborted:
+                    yield collector.restart()
+        rest = collector.finish()
+        if rest is not None:
+            yield rest
+        self._track(question, collector.answer)
+
+        if use_cache:
+            await self.cache.astore(question, scope, collector.answer, collector.stats["total"])
+
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 사용
+    fcntl = None
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def content_hash(text: str) -> str:
+    """
+    청크 내용의 sha256 해시
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embedding_namespace(embeddings: Embeddings) -> str:
+    """
+    임베딩 모델 이름과 차원 설정 (모델이 바뀌면 다른 저장소/키를 사용하도록)
+    """
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None) or type(embeddings).__name__
+    dimensions = getattr(embeddings, "dimensions", None)
+    namespace = f"{model}-{dimensions}" if dimensions else str(model)
+    return re.sub(r"[^\w.-]+", "_", namespace)
+
+
+class EmbeddingStore:
+    """
+    내용 해시 기반의 영속 임베딩 저장소
+
+    - 벡터: {path}/vectors.f32 (capacity x dim float32 memory-mapped 배열)
+    - 메타데이터: {path}/index.json (해시 -> [slot, 마지막 사용 시각])
+    capacity 를 넘으면 가장 오래 사용되지 않은 벡터의 slot 을 재사용합니다(LRU).
+    조회로 바뀐 사용 시각은 persist_interval 초마다(또는 다음 저장 때) 디스크에 기록합니다.
+
+    같은 디렉토리를 여러 프로세스가 함께 쓰므로 {path}/lock 파일 잠금을 잡고,
+    다른 프로세스가 index.json 을 바꿨으면 다시 읽은 뒤 조회/slot 배정을 합니다.
+
+    저장소 하나는 한 가지 차원의 벡터만 저장하므로 모델별로 다른 디렉토리를 사용합니다.
+    (llm_pool.get_code_embeddings 는 embedding_namespace 하위 디렉토리를 사용)
+    """
+
+    def __init__(self, path: str, capacity: int = 20000, persist_interval: float = 30.0) -> None:
+        """
+        Args:
+            path (str): 저장 디렉토리
+            capacity (int): 저장할 최대 벡터 수
+            persist_interval (float): 조회로 바뀐 사용 시각을 기록하는 최소 간격(초)
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._index_path = os.path.join(path, "index.json")
+        self._lock = threading.Lock()
+        self._lock_file = open(os.path.join(path, "lock"), "a+")
+        self._index_version: Optional[Tuple[int, int]] = None  # 마지막으로 읽거나 쓴 index.json 의 (inode, mtime)
+        self.persist_interval = persist_interval
+        self._written_at = time.time()
+        self._dirty = False
+
+        self.capacity = capacity
+        self.dim: Optional[int] = None
+        # hash -> [slot, last_used], 사용 시각 순서 (가장 오래된 것이 앞)
+        self._slots: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._vectors: Optional[np.memmap] = None
+
+        with self._lock, self._file_lock(exclusive=False):
+            self._reload()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        # 같은 프로세스의 스레드는 self._lock 으로 먼저 직렬화
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reload(self) -> None:
+        """
+        다른 프로세스가 index.json 을 바꿨으면 다시 읽습니다. (파일 잠금 안에서 호출)
+
+        디스크의 slot 배정을 따르고, 이 프로세스에서 조회해 아직 기록하지 않은 사용 시각은 유지합니다.
+        """
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) == self._index_version or not os.path.exists(self._vectors_path):
+            return
+        with open(self._index_path, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        slots = meta["slots"]
+        for key, entry in slots.items():
+            local = self._slots.get(key)
+            if local is not None and int(local[0]) == int(entry[0]):
+                entry[1] = max(entry[1], local[1])
+        self._slots = OrderedDict(sorted(slots.items(), key=lambda item: item[1][1]))
+        if self._vectors is None or (meta["capacity"], meta["dim"]) != (self.capacity, self.dim):
+            self.capacity = meta["capacity"]
+            self.dim = meta["dim"]
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+",
+                shape=(self.capacity, self.dim),
+            )
+        self._index_version = (stat.st_ino, stat.st_mtime_ns)
+
+    def get_many(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        저장된 벡터를 반환합니다. (없는 해시는 결과에서 제외)
+        """
+        now = time.time()
+        found = {}
+        with self._lock:
+            with self._file_lock(exclusive=False):
+                # 다른 프로세스가 slot 을 재사용했을 수 있으므로 최신 index 기준으로 읽음
+                self._reload()
+                for key in hashes:
+                    entry = self._slots.get(key)
+                    if entry is None:
+                        continue
+                    entry[1] = now
+                    self._slots.move_to_end(key)
+                    found[key] = self._vectors[int(entry[0])].tolist()
+            if found:
+                self._dirty = True
+                if now - self._written_at >= self.persist_interval:
+                    self._persist()
+        return found
+
+    def flush(self) -> None:
+        """
+        조회로 바뀐 사용 시각을 바로 기록합니다.
+        """
+        with self._lock:
+            if self._dirty:
+                self._persist()
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        """
+        벡터를 저장하고 메타데이터를 디스크에 기록합니다.
+        """
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock, self._file_lock(exclusive=True):
+            # 다른 프로세스가 배정한 slot 을 덮어쓰지 않도록 배정 전에 다시 읽음
+            self._reload()
+            dims = {len(vector) for vector in vectors.values()}
+            if len(dims) > 1 or (self.dim is not None and dims != {self.dim}):
+                raise ValueError(f"embedding dimension {sorted(dims)} does not match store dimension {self.dim}: {self.path}")
+            if self._vectors is None:
+                self.dim = len(next(iter(vectors.values())))
+                self._vectors = np.memmap(
+                    self._vectors_path, dtype=np.float32, mode="w+",
+                    shape=(self.capacity, self.dim),
+                )
+            for key, vector in vectors.items():
+                if key in self._slots:
+                    slot = int(self._slots[key][0])
+                else:
+                    slot = self._free_slot()
+                self._vectors[slot] = np.asarray(vector, dtype=np.float32)
+                self._slots[key] = [slot, now]
+                self._slots.move_to_end(key)
+            self._vectors.flush()
+            self._write_index()
+
+    def _free_slot(self) -> int:
+        # slot 은 제거 즉시 재사용하므로 항상 0..len-1 이 사용 중
+        if len(self._slots) < self.capacity:
+            return len(self._slots)
+        # LRU 제거 (_slots 는 사용 시각 순서)
+        _, (slot, _) = self._slots.popitem(last=False)
+        return int(slot)
+
+    def _persist(self) -> None:
+        with self._file_lock(exclusive=True):
+            self._reload()
+            self._write_index()
+
+    def _write_index(self) -> None:
+        # 파일 잠금(exclusive) 안에서 호출
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"capacity": self.capacity, "dim": self.dim, "slots": self._slots}, file
+            )
+        os.replace(tmp_path, self._index_path)
+        stat = os.stat(self._index_path)
+        self._index_version = (stat.st_ino, stat.st_mtime_ns)
+        self._written_at = time.time()
+        self._dirty = False
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    EmbeddingStore 를 앞단 캐시로 사용하는 Embeddings
+
+    embed_documents 는 저장소에 없는(변경된) 텍스트만 기반 모델로 임베딩합니다.
+    질문(embed_query)은 캐시하지 않습니다.
+    키는 (모델 namespace, 내용) 의 해시라서 같은 저장소를 공유해도 다른 모델의 벡터를 반환하지 않습니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore) -> None:
+        self.embeddings = embeddings
+        self.store = store
+        self.namespace = embedding_namespace(embeddings)
+        self.stats = {"hits": 0, "misses": 0, "api_calls": 0}
+
+    def _split(self, texts: List[str]):
+        hashes = [content_hash(f"{self.namespace}\n{text}") for text in texts]
+        found = self.store.get_many(hashes)
+        missing = {h: text for h, text in zip(hashes, texts) if h not in found}
+        self.stats["hits"] += len(texts) - len(missing)
+        self.stats["misses"] += len(missing)
+        return hashes, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, found, missing = self._split(texts)
+        if missing:
+            self.stats["api_calls"] += 1
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), vectors))
+            self.store.put_many(new)
+            found.update(new)
+        return [found[h] for h in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, found, missing = self._split(texts)
+        if missing:
+            self.stats["api_calls"] += 1
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), vectors))
+            self.store.put_many(new)
+            found.update(new)
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
@@ -0,0 +1,221 @@
+"""
+프로세스 전역 LLM 클라이언트 풀
+
+- 모든 CodeChatbot 이 하나의 httpx 커넥션 풀과 ChatOpenAI 인스턴스를 공유합니다.
+- async 경로는 백그라운드 스레드 하나에서 도는 공유 이벤트 루프에서 실행합니다.
+  (run / iterate 로 동기 코드에서 호출) 동시에 진행 중인 LLM 호출 수가 늘어도 스레드 수는 늘지 않습니다.
+- 동시 LLM 호출 수는 CHATBOT_MAX_CONCURRENCY(기본 32) 또는 configure() 로 제한합니다.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterator, Awaitable, Dict, Iterator, Optional, Tuple, TypeVar,
+)
+
+# httpx / langchain_openai / numpy 는 처음 클라이언트를 만들 때 import
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+    from openai import OpenAI
+
+    from chatbot.embedding_store import CachedEmbeddings
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_max_concurrency = int(os.environ.get("CHATBOT_MAX_CONCURRENCY", "32"))
+_http_client: Optional["httpx.Client"] = None
+_async_http_client: Optional["httpx.AsyncClient"] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_chat_models: Dict[Tuple[str, float], "ChatOpenAI"] = {}
+_openai_client: Optional["OpenAI"] = None
+_embeddings: Optional["OpenAIEmbeddings"] = None
+_code_embeddings: Optional["CachedEmbeddings"] = None
+
+
+def configure(max_concurrency: int) -> None:
+    """
+    동시 LLM 호출 수 제한을 설정합니다. (이미 대기 중인 호출에는 적용되지 않음)
+    """
+    global _max_concurrency, _semaphore
+    with _lock:
+        _max_concurrency = max_concurrency
+        _semaphore = None
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=_max_concurrency,
+        max_keepalive_connections=_max_concurrency,
+    )
+
+
+def get_http_client() -> "httpx.Client":
+    import httpx
+
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=_limits(), timeout=60.0)
+        return _http_client
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    import httpx
+
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(limits=_limits(), timeout=60.0)
+        return _async_http_client
+
+
+def get_chat_model(model: str = "gpt-4o-mini", temperature: float = 0) -> "ChatOpenAI":
+    """
+    공유 커넥션 풀을 사용하는 ChatOpenAI (model, temperature 별로 하나)
+    """
+    key = (model, temperature)
+    with _lock:
+        if key in _chat_models:
+            return _chat_models[key]
+    from langchain_openai import ChatOpenAI
+
+    chat_model = ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        max_retries=0,  # 429 / 5xx 재시도는 chatbot.scheduler 에서 처리
+        stream_usage=True,  # 스트리밍 응답에도 usage_metadata 포함 (노드별 토큰 사용량 기록)
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+    with _lock:
+        return _chat_models.setdefault(key, chat_model)
+
+
+def get_openai_client() -> "OpenAI":
+    """
+    공유 커넥션 풀을 사용하는 openai 클라이언트 (테스트 코드 생성 등 langchain 을 거치지 않는 호출)
+    """
+    global _openai_client
+    with _lock:
+        if _openai_client is not None:
+            return _openai_client
+    from openai import OpenAI
+
+    # 429 / 5xx 재시도는 chatbot.scheduler 에서 처리
+    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), http_client=get_http_client(), max_retries=0)
+    with _lock:
+        if _openai_client is None:
+            _openai_client = client
+        return _openai_client
+
+
+def get_embeddings() -> "OpenAIEmbeddings":
+    global _embeddings
+    if _embeddings is None:
+        from langchain_openai import OpenAIEmbeddings
+
+        embeddings = OpenAIEmbeddings(
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+        )
+        with _lock:
+            if _embeddings is None:
+                _embeddings = embeddings
+    return _embeddings
+
+
+def get_code_embeddings() -> "CachedEmbeddings":
+    """
+    코드 청크 임베딩용 모델
+
+    CHATBOT_EMBEDDING_STORE(기본: 임시 디렉토리) 아래 모델별 영속 저장소를 거치므로
+    이미 임베딩한 청크는 API 를 다시 호출하지 않습니다.
+    """
+    global _code_embeddings
+    with _lock:
+        if _code_embeddings is not None:
+            return _code_embeddings
+    from chatbot.embedding_store import CachedEmbeddings, EmbeddingStore, embedding_namespace
+
+    base = get_embeddings()
+    store = EmbeddingStore(
+        os.path.join(
+            os.environ.get(
+                "CHATBOT_EMBEDDING_STORE",
+                os.path.join(tempfile.gettempdir(), "chatbot_embeddings"),
+            ),
+            embedding_namespace(base),
+        )
+    )
+    embeddings = CachedEmbeddings(base, store)
+    with _lock:
+        if _code_embeddings is None:
+            _code_embeddings = embeddings
+        return _code_embeddings
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    공유 이벤트 루프 (처음 호출될 때 데몬 스레드에서 시작)
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="llm-pool-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def limit() -> asyncio.Semaphore:
+    """
+    동시 LLM 호출 수를 제한하는 세마포어 (공유 이벤트 루프에서 사용)
+
+        async with llm_pool.limit():
+            await chain.ainvoke(...)
+    """
+    global _semaphore
+    with _lock:
+        if _semaphore is None:
+            _semaphore = asyncio.Semaphore(_max_concurrency)
+        return _semaphore
+
+
+def run(coro: Awaitable[T]) -> T:
+    """
+    코루틴을 공유 이벤트 루프에서 실행하고 결과를 기다립니다.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def iterate(agen: AsyncIterator[T]) -> Iterator[T]:
+    """
+    async generator 를 공유 이벤트 루프에서 돌리면서 동기 iterator 로 반환합니다.
+    """
+    loop = get_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+def stats() -> Dict[str, Any]:
+    """
+    풀 설정과 현재 사용 가능한 동시 호출 슬롯 수
+    """
+    return {
+        "max_concurrency": _max_concurrency,
+        "available": _semaphore._value if _semaphore is not None else _max_concurrency,
+        "chat_models": len(_chat_models),
+    }
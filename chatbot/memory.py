@@ -0,0 +1,197 @@
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, List, Optional, Tuple
+
+from chatbot.tokens import count_tokens
+
+SUMMARY_PROMPT = """다음은 지금까지의 대화 요약과, 요약에 새로 합칠 대화입니다.
+이후 질문에 답할 때 필요한 내용(사용자의 요청, 언급된 클래스/메서드, 결정 사항) 위주로
+두 내용을 합쳐 {budget} 토큰 이내로 요약하세요. 요약문만 출력하세요.
+
+[기존 요약]
+{summary}
+
+[추가할 대화]
+{turns}
+"""
+
+
+# 이전 대화를 가리키는 표현 (이런 질문의 답은 대화 기록에 따라 달라짐)
+FOLLOW_UP = re.compile(
+    r"그거|그것|그걸|그게|그럼|그러면|위의?\s|위에서|앞에서|앞의|방금|아까|이전|다시|계속|더\s|또\s"
+    r"|\b(?:it|that|those|them|above|previous|again|more|continue|instead)\b",
+    re.IGNORECASE,
+)
+
+
+def is_follow_up(question: str) -> bool:
+    """
+    이전 대화를 가리키는 후속 질문인지 (아니면 대화 기록과 관계없이 같은 답을 재사용할 수 있음)
+    """
+    return bool(FOLLOW_UP.search(question or ""))
+
+
+def truncate_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """
+    text 를 max_tokens 이내로 자릅니다. keep="tail" 이면 뒤쪽을 남김
+    """
+    tokens = count_tokens(text)
+    while tokens > max_tokens and text:
+        length = max(0, int(len(text) * max_tokens / tokens) - 1)
+        text = text[:length] if keep == "head" else text[len(text) - length:]
+        tokens = count_tokens(text)
+    return text
+
+
+def _format_turns(turns) -> str:
+    return "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+
+
+def _brief_turns(turns) -> List[str]:
+    # 질문과 답변 첫 줄만 남긴 요약 줄
+    lines = []
+    for question, answer in turns:
+        first_line = next((line for line in answer.splitlines() if line.strip()), "")
+        lines.append(f"- {question[:200]} → {first_line[:200]}")
+    return lines
+
+
+class ConversationMemory:
+    """
+    세션 대화 기록
+
+    최근 max_turns 개의 대화는 그대로(질문과 답변은 각각 turn_tokens 이내로 잘라서) 보관하고, 그보다 오래된 대화는
+    summary_tokens 이내의 요약에 점진적으로 합칩니다. 요약에 아직 합치지 않은 대화는 한 줄씩만 넣고
+    context() 전체도 max_tokens 이내로 자르므로, 세션이 길어져도 프롬프트에 넣는 대화 기록의 크기는 일정합니다.
+
+    summarizer(ainvoke 를 가진 채팅 모델)를 주면 요약은 공유 이벤트 루프에서 백그라운드로 갱신하고,
+    없으면 오래된 대화의 질문과 답변 첫 줄을 이어 붙이는 방식으로 요약합니다.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 4,
+        turn_tokens: int = 300,
+        summary_tokens: int = 400,
+        summarizer: Any = None,
+    ) -> None:
+        """
+        Args:
+            max_turns (int): 그대로 보관할 최근 대화 수
+            turn_tokens (int): 보관할 질문/답변 하나의 최대 토큰 수
+            summary_tokens (int): 요약의 최대 토큰 수
+            summarizer (Any): 요약에 사용할 채팅 모델, None 이면 LLM 없이 요약
+        """
+        self.max_turns = max_turns
+        self.turn_tokens = turn_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.summary = ""
+        self.turns: Deque[Tuple[str, str]] = deque()
+        self.stats = {"folds": 0, "fold_seconds": 0.0}
+        self._pending: List[Tuple[str, str]] = []  # 요약에 아직 합치지 않은 오래된 대화
+        self._folding = None
+        self._lock = threading.Lock()
+
+    def add(self, question: str, answer: str) -> None:
+        with self._lock:
+            self.turns.append(
+                (truncate_tokens(question or "", self.turn_tokens), truncate_tokens(answer or "", self.turn_tokens))
+            )
+            while len(self.turns) > self.max_turns:
+                self._pending.append(self.turns.popleft())
+            if not self._pending:
+                return
+            if self.summarizer is None or len(self._pending) > self.max_turns:
+                # LLM 요약이 밀려 있으면 크기가 늘지 않도록 바로 합침
+                self._fold_locally()
+                return
+            if self._folding is not None and not self._folding.done():
+                return  # 진행 중인 요약이 끝나면 남은 대화까지 합침
+
+        from chatbot import llm_pool
+
+        self._folding = asyncio.run_coroutine_threadsafe(self._afold(), llm_pool.get_loop())
+
+    @property
+    def max_tokens(self) -> int:
+        """
+        context() 의 최대 토큰 수 (요약 + 요약 대기 대화 줄 + 최근 대화)
+        """
+        return 2 * self.summary_tokens + self.max_turns * 2 * self.turn_tokens
+
+    def _fold_locally(self) -> None:
+        lines = [self.summary] if self.summary else []
+        lines.extend(_brief_turns(self._pending))
+        self._pending = []
+        summary = "\n".join(lines)
+        folded = truncate_tokens(summary, self.summary_tokens, keep="tail")
+        if folded != summary and "\n" in folded:
+            folded = folded.split("\n", 1)[1]  # 잘린 첫 줄은 버림
+        self.summary = folded
+        self.stats["folds"] += 1
+
+    async def _afold(self) -> None:
+        from chatbot import llm_pool
+        from chatbot.scheduler import BACKGROUND, get_scheduler, model_name
+
+        while True:
+            with self._lock:
+                pending, summary = list(self._pending), self.summary
+            if not pending:
+                return
+            start = time.perf_counter()
+            prompt = SUMMARY_PROMPT.format(
+                budget=self.summary_tokens, summary=summary or "(없음)", turns=_format_turns(pending)
+            )
+            try:
+                async with llm_pool.limit():
+                    message = await get_scheduler().acall(
+                        model_name(self.summarizer), lambda: self.summarizer.ainvoke(prompt),
+                        payload=["summary", prompt], priority=BACKGROUND,
+                    )
+                folded = truncate_tokens(message.content, self.summary_tokens)
+            except Exception as e:
+                print(f"conversation summary failed: {type(e).__name__}: {e}")
+                with self._lock:
+                    self._fold_locally()
+                return
+            with self._lock:
+                # 요약하는 동안 다른 경로에서 합쳐졌으면(_fold_locally) 이번 결과는 버림
+                if self._pending[: len(pending)] == pending:
+                    self._pending = self._pending[len(pending):]
+                    self.summary = folded
+                    self.stats["folds"] += 1
+                    self.stats["fold_seconds"] += time.perf_counter() - start
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        진행 중인 요약이 끝날 때까지 기다립니다.
+        """
+        folding = self._folding
+        if folding is not None:
+            folding.result(timeout)
+
+    def context(self) -> str:
+        """
+        다음 요청의 프롬프트에 넣을 대화 기록 (대화가 없으면 빈 문자열)
+        """
+        with self._lock:
+            summary, pending, turns = self.summary, list(self._pending), list(self.turns)
+        # 요약 중인 대화는 요약이 끝나기 전까지 한 줄씩만 (요약과 같은 크기 이내)
+        summary = "\n".join(filter(None, [summary, truncate_tokens("\n".join(_brief_turns(pending)), self.summary_tokens)]))
+        parts = []
+        if summary:
+            parts.append(f"[이전 대화 요약]\n{summary}")
+        if turns:
+            parts.append(f"[최근 대화]\n{_format_turns(turns)}")
+        return truncate_tokens("\n\n".join(parts), self.max_tokens, keep="tail")
+
+    def clear(self) -> None:
+        with self._lock:
+            self.summary = ""
+            self.turns.clear()
+            self._pending = []
@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+
+@dataclass
+class NodeEvent:
+    node: str
+    seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    route: Optional[str] = None
+    cache_hit: Optional[bool] = None
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+# 지금 실행 중인 노드(또는 투기 실행)가 LLM 응답에서 받은 토큰 사용량
+_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("chatbot_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[Dict[str, int]]:
+    """
+    블록 안에서 add_usage 로 보고된 LLM 토큰 사용량을 모읍니다. (같은 context 에서 만든 task 에도 적용)
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def add_usage(prompt_tokens: int, completion_tokens: int) -> None:
+    """
+    LLM 호출 하나의 실제 토큰 사용량 (usage_metadata) 을 현재 track_usage 블록에 더함
+    """
+    usage = _usage.get()
+    if usage is not None:
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class JsonLinesExporter:
+    """
+    이벤트를 한 줄에 하나씩 JSON 으로 파일에 추가합니다.
+    """
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, event: NodeEvent) -> None:
+        line = json.dumps(asdict(event), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+class PrometheusExporter:
+    """
+    Prometheus text format 으로 누적 지표를 제공합니다.
+
+    render() 결과를 HTTP 로 노출하거나, path 를 주면 node_exporter textfile collector 용 파일로
+    최대 interval 초마다 다시 씁니다.
+    """
+
+    def __init__(self, path: Optional[str] = None, interval: float = 5.0, window: int = 500) -> None:
+        self.path = path
+        self.interval = interval
+        self._seconds: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._seconds_sum: Dict[str, float] = defaultdict(float)
+        self._count: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._tokens: Dict[tuple, int] = defaultdict(int)
+        self._routes: Dict[str, int] = defaultdict(int)
+        self._cache: Dict[str, int] = defaultdict(int)
+        self._written = 0.0
+        self._lock = threading.Lock()
+
+    def export(self, event: NodeEvent) -> None:
+        with self._lock:
+            self._seconds[event.node].append(event.seconds)
+            self._seconds_sum[event.node] += event.seconds
+            self._count[event.node] += 1
+            if event.error:
+                self._errors[event.node] += 1
+            self._tokens[(event.node, "prompt")] += event.prompt_tokens
+            self._tokens[(event.node, "completion")] += event.completion_tokens
+            if event.route:
+                self._routes[event.route] += 1
+            if event.cache_hit is not None:
+                self._cache["hit" if event.cache_hit else "miss"] += 1
+        if self.path and time.time() - self._written >= self.interval:
+            self.write()
+
+    def render(self) -> str:
+        lines = [
+            "# HELP chatbot_node_seconds Node wall time in seconds.",
+            "# TYPE chatbot_node_seconds summary",
+        ]
+        with self._lock:
+            for node, values in sorted(self._seconds.items()):
+                for q in (0.5, 0.95, 0.99):
+                    lines.append(f'chatbot_node_seconds{{node="{node}",quantile="{q}"}} {_percentile(list(values), q * 100):.6f}')
+                lines.append(f'chatbot_node_seconds_sum{{node="{node}"}} {self._seconds_sum[node]:.6f}')
+                lines.append(f'chatbot_node_seconds_count{{node="{node}"}} {self._count[node]}')
+            lines += ["# HELP chatbot_node_errors_total Node failures.", "# TYPE chatbot_node_errors_total counter"]
+            lines += [f'chatbot_node_errors_total{{node="{node}"}} {count}' for node, count in sorted(self._errors.items())]
+            lines += ["# HELP chatbot_node_tokens_total Prompt/completion tokens per node.", "# TYPE chatbot_node_tokens_total counter"]
+            lines += [
+                f'chatbot_node_tokens_total{{node="{node}",kind="{kind}"}} {count}'
+                for (node, kind), count in sorted(self._tokens.items())
+            ]
+            lines += ["# HELP chatbot_route_total Chosen routes.", "# TYPE chatbot_route_total counter"]
+            lines += [f'chatbot_route_total{{route="{route}"}} {count}' for route, count in sorted(self._routes.items())]
+            lines += ["# HELP chatbot_response_cache_total Response cache lookups.", "# TYPE chatbot_response_cache_total counter"]
+            lines += [f'chatbot_response_cache_total{{result="{result}"}} {count}' for result, count in sorted(self._cache.items())]
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        self._written = time.time()
+        # 부분적으로 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(tmp_path, self.path)
+
+
+class Metrics:
+    """
+    그래프 노드별 실행 기록
+
+    노드 함수를 instrument() 로 감싸면 실행마다 NodeEvent 를 만들어 최근 window 개를 보관하고
+    등록된 exporter(JsonLinesExporter, PrometheusExporter 등 export(event) 를 가진 객체)로 전달합니다.
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None, window: int = 500) -> None:
+        self.exporters = list(exporters or [])
+        self._events: Dict[str, Deque[NodeEvent]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        """
+        CHATBOT_METRICS_JSONL / CHATBOT_METRICS_PROM 경로가 있으면 해당 exporter 를 등록
+        """
+        exporters = []
+        if os.environ.get("CHATBOT_METRICS_JSONL"):
+            exporters.append(JsonLinesExporter(os.environ["CHATBOT_METRICS_JSONL"]))
+        if os.environ.get("CHATBOT_METRICS_PROM"):
+            exporters.append(PrometheusExporter(os.environ["CHATBOT_METRICS_PROM"]))
+        return cls(exporters)
+
+    def record(self, event: NodeEvent) -> None:
+        with self._lock:
+            self._events[event.node].append(event)
+        for exporter in self.exporters:
+            try:
+                exporter.export(event)
+            except Exception as e:  # 지표 수집 실패가 답변을 막지 않도록 함
+                print(f"metrics export failed: {type(e).__name__}: {e}")
+
+    def instrument(self, node: str, func: Callable, afunc: Callable, describe: Callable[..., Dict[str, Any]]):
+        """
+        (func, afunc) 를 실행 시간과 describe(state, output) 가 반환하는 필드를 기록하는 함수로 감쌉니다.
+        노드 안의 LLM 호출이 add_usage 로 실제 토큰 사용량을 보고했으면 describe 의 추정치 대신 사용합니다.
+        """
+
+        def event(state, output, seconds, usage):
+            fields = describe(state, output)
+            if usage["calls"]:
+                fields.update(prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
+            return NodeEvent(node, seconds, **fields)
+
+        def wrapper(state):
+            start = time.perf_counter()
+            with track_usage() as usage:
+                try:
+                    output = func(state)
+                except Exception as e:
+                    self.record(NodeEvent(node, time.perf_counter() - start, error=type(e).__name__))
+                    raise
+            self.record(event(state, output, time.perf_counter() - start, usage))
+            return output
+
+        async def awrapper(state):
+            start = time.perf_counter()
+            with track_usage() as usage:
+                try:
+                    output = await afunc(state)
+                except Exception as e:
+                    self.record(NodeEvent(node, time.perf_counter() - start, error=type(e).__name__))
+                    raise
+            self.record(event(state, output, time.perf_counter() - start, usage))
+            return output
+
+        return wrapper, awrapper
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+    def events(self, node: Optional[str] = None) -> List[NodeEvent]:
+        with self._lock:
+            if node is not None:
+                return list(self._events.get(node, ()))
+            return [event for events in self._events.values() for event in events]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        노드별 최근 window 개 실행의 p50/p95 지연시간(초)과 평균 토큰 수
+        """
+        with self._lock:
+            snapshot = {node: list(events) for node, events in self._events.items() if events}
+        summary = {}
+        for node, events in sorted(snapshot.items()):
+            seconds = [event.seconds for event in events]
+            summary[node] = {
+                "count": len(events),
+                "p50": _percentile(seconds, 50),
+                "p95": _percentile(seconds, 95),
+                "prompt_tokens": sum(event.prompt_tokens for event in events) / len(events),
+                "completion_tokens": sum(event.completion_tokens for event in events) / len(events),
+                "errors": sum(1 for event in events if event.error),
+            }
+        return summary
@@ -0,0 +1,343 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from chatbot.storage import SqliteLRUStore
+
+
+def hash_code(code: Optional[str]) -> str:
+    """
+    코드 내용의 sha256 해시
+    """
+    return hashlib.sha256((code or "").encode("utf-8")).hexdigest()
+
+
+def _normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().lower()
+
+
+_numpy = None
+
+
+def _load_numpy():
+    """
+    numpy 가 설치돼 있으면 numpy 모듈, 없으면 None (semantic tier 는 순수 Python 으로 계산)
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """
+    CodeChatbot 응답 캐시
+
+    - exact tier: (정규화된 질문, 코드 해시)가 완전히 일치하면 바로 반환
+    - semantic tier: 같은 코드에 대해 질문 임베딩의 코사인 유사도가 임계값 이상이면 반환
+      (같은 코드 scope 의 항목만 비교하고, 비교할 항목이 없으면 질문을 임베딩하지 않음.
+      numpy 가 있으면 scope 별 정규화 행렬 하나와 행렬곱으로 계산)
+    - 항목 수 / TTL 기준 LRU 제거, path 를 주면 sqlite 로 영속화
+    """
+
+    # 캐시 히트 한 번으로 절약되는 LLM 호출 수 (route_question + answer)
+    LLM_CALLS_PER_REQUEST = 2
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = 60 * 60 * 24,
+        path: Optional[str] = None,
+        embeddings: Any = None,
+        similarity_threshold: float = 0.95,
+    ) -> None:
+        """
+        Args:
+            max_entries (int): 최대 캐시 항목 수
+            ttl (Optional[float]): 항목 유효 시간(초), None 이면 만료 없음
+            path (Optional[str]): sqlite 캐시 파일 경로, None 이면 메모리에만 저장
+            embeddings (Any): embed_query 를 제공하는 임베딩 모델, None 이면 semantic tier 비활성화
+            similarity_threshold (float): semantic tier 히트 기준 코사인 유사도
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending_vectors: Dict[str, List[float]] = {}
+        # 코드 해시 -> 벡터가 있는 항목 키 (semantic tier 는 같은 scope 만 비교)
+        self._scopes: Dict[str, Dict[str, None]] = {}
+        self._matrices: Dict[str, Tuple[List[str], Any]] = {}  # 코드 해시 -> (키 목록, 정규화 행렬), numpy 사용 시
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "saved_seconds": 0.0,
+            "saved_llm_calls": 0,
+        }
+
+        self._disk = None
+        if path is not None:
+            self._disk = SqliteLRUStore(path, max_entries=max_entries, ttl=ttl)
+            # 최근 사용된 항목부터 메모리로 적재
+            for key, entry in reversed(list(self._disk.items(limit=max_entries))):
+                self._entries[key] = entry
+                self._index(key, entry)
+
+    @staticmethod
+    def make_key(question: str, code: Optional[str]) -> str:
+        return hash_code(code) + ":" + hashlib.sha256(
+            _normalize_question(question).encode("utf-8")
+        ).hexdigest()
+
+    def lookup(self, question: str, code: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        캐시된 응답을 찾습니다. 없으면 None
+        """
+        key = self.make_key(question, code)
+        response = self._lookup_exact(key)
+        if response is not None or self.embeddings is None or not self._has_candidates(code):
+            return response
+        vector = self.embeddings.embed_query(_normalize_question(question))
+        return self._lookup_semantic(key, question, code, vector)
+
+    async def alookup(
+        self, question: str, code: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        lookup 의 async 버전 (임베딩 호출이 이벤트 루프를 막지 않음)
+        """
+        key = self.make_key(question, code)
+        response = self._lookup_exact(key)
+        if response is not None or self.embeddings is None or not self._has_candidates(code):
+            return response
+        vector = await self.embeddings.aembed_query(_normalize_question(question))
+        return self._lookup_semantic(key, question, code, vector)
+
+    def store(
+        self,
+        question: str,
+        code: Optional[str],
+        response: Dict[str, Any],
+        latency: float = 0.0,
+    ) -> None:
+        """
+        응답을 캐시에 저장합니다.
+
+        Args:
+            latency (float): 원래 응답에 걸린 시간(초), 히트 시 절약 시간 집계에 사용
+        """
+        key = self.make_key(question, code)
+        with self._lock:
+            vector = self._pending_vectors.pop(key, None)
+        if vector is None and self.embeddings is not None:
+            vector = self.embeddings.embed_query(_normalize_question(question))
+        self._store(key, question, code, response, latency, vector)
+
+    async def astore(
+        self,
+        question: str,
+        code: Optional[str],
+        response: Dict[str, Any],
+        latency: float = 0.0,
+    ) -> None:
+        """
+        store 의 async 버전
+        """
+        key = self.make_key(question, code)
+        with self._lock:
+            vector = self._pending_vectors.pop(key, None)
+        if vector is None and self.embeddings is not None:
+            vector = await self.embeddings.aembed_query(_normalize_question(question))
+        self._store(key, question, code, response, latency, vector)
+
+    def _lookup_exact(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                if self.embeddings is None:
+                    self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hit("exact_hits", entry)
+            if self._disk is not None:
+                self._disk.get(key)  # 접근 시각 갱신
+            return dict(entry["response"])
+
+    def _has_candidates(self, code: Optional[str]) -> bool:
+        """
+        semantic tier 로 비교할 항목이 있는지. 없으면 miss 로 집계 (질문 임베딩 호출 생략)
+        """
+        with self._lock:
+            if self._scopes.get(hash_code(code)):
+                return True
+            self._stats["misses"] += 1
+            return False
+
+    def _lookup_semantic(
+        self, key: str, question: str, code: Optional[str], vector: List[float]
+    ) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        code_hash = hash_code(code)
+        with self._lock:
+            self._pending_vectors[key] = vector
+            while len(self._pending_vectors) > self.max_entries:
+                self._pending_vectors.pop(next(iter(self._pending_vectors)))
+            best_key = self._best_match(code_hash, vector, now)
+            if best_key is None:
+                self._stats["misses"] += 1
+                return None
+            entry = self._entries[best_key]
+            self._entries.move_to_end(best_key)
+            self._hit("semantic_hits", entry)
+            if self._disk is not None:
+                self._disk.get(best_key)  # 접근 시각 갱신
+        response = dict(entry["response"])
+        response["question"] = question
+        return response
+
+    def _best_match(self, code_hash: str, vector: List[float], now: float) -> Optional[str]:
+        """
+        같은 scope 에서 유사도가 임계값 이상인 가장 가까운 (만료되지 않은) 항목의 키 (self._lock 안에서 호출)
+        """
+        np = _load_numpy()
+        if np is None:
+            best_key, best_score = None, self.similarity_threshold
+            for other_key in self._scopes.get(code_hash, ()):
+                other = self._entries[other_key]
+                if self._expired(other, now):
+                    continue
+                score = _cosine(vector, other["vector"])
+                if score >= best_score:
+                    best_key, best_score = other_key, score
+            return best_key
+
+        keys, matrix = self._matrix(code_hash)
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not keys or not norm or query.shape[0] != matrix.shape[1]:
+            return None
+        scores = matrix @ (query / norm)
+        for index in np.argsort(-scores):
+            if scores[index] < self.similarity_threshold:
+                return None
+            if not self._expired(self._entries[keys[index]], now):
+                return keys[index]
+        return None
+
+    def _matrix(self, code_hash: str) -> Tuple[List[str], Any]:
+        # scope 의 항목이 바뀔 때만 다시 만드는 정규화된 벡터 행렬
+        cached = self._matrices.get(code_hash)
+        if cached is None:
+            np = _load_numpy()
+            keys = list(self._scopes.get(code_hash, ()))
+            matrix = np.asarray([self._entries[key]["vector"] for key in keys], dtype=np.float32)
+            if keys:
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms == 0, 1, norms)
+            cached = self._matrices[code_hash] = (keys, matrix)
+        return cached
+
+    def _index(self, key: str, entry: Dict[str, Any]) -> None:
+        if entry.get("vector"):
+            self._scopes.setdefault(entry["code_hash"], {})[key] = None
+            self._matrices.pop(entry["code_hash"], None)
+
+    def _unindex(self, key: str, entry: Optional[Dict[str, Any]]) -> None:
+        if entry is None:
+            return
+        scope = self._scopes.get(entry["code_hash"])
+        if scope is not None and key in scope:
+            del scope[key]
+            self._matrices.pop(entry["code_hash"], None)
+            if not scope:
+                del self._scopes[entry["code_hash"]]
+
+    def _store(
+        self,
+        key: str,
+        question: str,
+        code: Optional[str],
+        response: Dict[str, Any],
+        latency: float,
+        vector: Optional[List[float]],
+    ) -> None:
+        entry = {
+            "question": question,
+            "code_hash": hash_code(code),
+            "response": {
+                "question": response.get("question", question),
+                "generation": response.get("generation"),
+                "category": response.get("category"),
+            },
+            "vector": vector,
+            "latency": latency,
+            "created": time.time(),
+        }
+        with self._lock:
+            self._unindex(key, self._entries.get(key))
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._index(key, entry)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            if self._disk is not None:
+                self._disk.set(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending_vectors.clear()
+            self._scopes.clear()
+            self._matrices.clear()
+            if self._disk is not None:
+                self._disk.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        hit/miss 카운터와 절약된 LLM 호출 수, 시간(초)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        )
+        return stats
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl is not None and now - entry["created"] > self.ttl
+
+    def _hit(self, tier: str, entry: Dict[str, Any]) -> None:
+        self._stats[tier] += 1
+        self._stats["saved_seconds"] += entry.get("latency", 0.0)
+        self._stats["saved_llm_calls"] += self.LLM_CALLS_PER_REQUEST
+
+    def _remove(self, key: str) -> None:
+        self._unindex(key, self._entries.pop(key, None))
+        self._pending_vectors.pop(key, None)
+        if self._disk is not None:
+            self._disk.delete(key)
@@ -0,0 +1,257 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ROUTES = [
+    "code_review",
+    "code_refactor",
+    "check_convention",
+    "generate_test_code",
+    "plain_answer",
+]
+
+# 여러 요청을 잇는 접속 표현 ("리뷰하고 컨벤션도 확인해줘", "review this code and also check ...")
+INTENT_SEPARATOR = re.compile(r"\s*(?:,?\s*\b(?:and also|and then|and|also)\b|그리고|하고|및)\s+", re.IGNORECASE)
+
+# 라우트별 대표 질문 (로컬 분류기의 학습 데이터)
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "code_review": [
+        "이 코드 리뷰해줘",
+        "코드 리뷰 부탁해",
+        "이 클래스에 버그가 있는지 검토해줘",
+        "코드에 문제점이 있는지 확인해줘",
+        "이 코드의 개선점을 알려줘",
+        "잠재적인 오류나 취약점을 찾아줘",
+        "review this code",
+        "can you review this class",
+        "find bugs in this code",
+        "what is wrong with this code",
+    ],
+    "code_refactor": [
+        "이 코드 리팩토링 해줘",
+        "리팩터링 해줘",
+        "코드를 더 깔끔하게 바꿔줘",
+        "중복 코드를 제거해줘",
+        "메서드를 분리해서 다시 작성해줘",
+        "가독성 좋게 코드를 재구성해줘",
+        "refactor this code",
+        "clean up this class",
+        "rewrite this method to be simpler",
+        "remove duplication in this code",
+    ],
+    "check_convention": [
+        "코드 컨벤션 확인해줘",
+        "코딩 컨벤션에 맞는지 검사해줘",
+        "네이밍 규칙을 지켰는지 봐줘",
+        "변수 이름과 메서드 이름 규칙 확인해줘",
+        "자바 코딩 스타일 가이드에 맞는지 알려줘",
+        "들여쓰기와 포맷팅 규칙을 확인해줘",
+        "check the code convention",
+        "does this follow java naming conventions",
+        "check coding style",
+        "is the naming convention correct",
+    ],
+    "generate_test_code": [
+        "테스트 코드 만들어줘",
+        "테스트 코드 생성해줘",
+        "junit 테스트 작성해줘",
+        "단위 테스트를 만들어줘",
+        "유닛 테스트 코드 짜줘",
+        "테스트 커버리지 100% 테스트 작성해줘",
+        "generate test code",
+        "write unit tests for this class",
+        "create junit5 tests",
+        "generate test cases",
+    ],
+    "plain_answer": [
+        "안녕",
+        "너는 누구야",
+        "자바에서 인터페이스란 무엇인가요",
+        "스트림 API 설명해줘",
+        "hashmap과 treemap의 차이가 뭐야",
+        "가비지 컬렉션이 뭐야",
+        "hello",
+        "what is polymorphism",
+        "explain dependency injection",
+        "what is the difference between list and set",
+    ],
+}
+
+
+# 어느 route 에도 속하지 않는 요청 (로컬 라우터가 답하지 않고 LLM 라우팅으로 넘김)
+# "generate", "write", "코드" 처럼 route 예시에 함께 나오는 단어만으로 confident 하게 분류되는 것을 막음
+OUT_OF_SCOPE_EXAMPLES: List[str] = [
+    "readme 문서 작성해줘",
+    "write documentation for this project",
+    "이 코드 설명해줘",
+    "이 코드가 무슨 일을 하는지 알려줘",
+    "주석 달아줘",
+    "add comments to this code",
+    "write a poem",
+    "시 한 편 써줘",
+    "번역해줘",
+    "translate this sentence",
+    "write an email",
+    "이메일 작성해줘",
+    "create a dockerfile",
+    "write a sql query",
+    "make a web server in python",
+    "새 프로젝트 만들어줘",
+    "generate a changelog",
+    "how do i write a while loop",
+    "오늘 날씨 알려줘",
+    "tell me a joke",
+]
+
+# 잘못 분류되면 비용이 큰 route (LLM 테스트 생성, javac, gradle 실행)는 이 단어가 질문에 있을 때만 로컬로 분류
+ROUTE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "generate_test_code": ("test", "junit", "테스트", "단위"),
+}
+
+OUT_OF_SCOPE = "out_of_scope"
+
+
+def _tokenize(text: str) -> List[str]:
+    """
+    단어 unigram + 단어 내부 문자 3-gram
+
+    한국어 조사/어미 변화("리뷰해줘", "리뷰를")에 덜 민감하도록 문자 n-gram을 함께 사용합니다.
+    """
+    words = re.findall(r"[0-9a-zA-Z_]+|[가-힣]+", text.lower())
+    tokens = list(words)
+    for word in words:
+        padded = f"<{word}>"
+        tokens.extend(padded[i : i + 3] for i in range(len(padded) - 2))
+    return tokens
+
+
+class LocalRouter:
+    """
+    TF-IDF centroid 기반 로컬 라우터
+
+    네트워크 호출 없이 질문을 라우트로 분류하고, (route, confidence)를 반환합니다.
+    confidence는 1위와 2위 라우트 유사도의 상대적 차이(0~1)이며, 다음 경우에는 0 (LLM 라우팅으로 넘김)
+    - 1위 유사도(코사인)가 min_score 보다 작음
+    - 어느 route 에도 속하지 않는 예시(out of scope)가 1위
+    - ROUTE_KEYWORDS 의 route 인데 질문에 해당 단어가 없음
+    """
+
+    def __init__(
+        self,
+        examples: Optional[Dict[str, Iterable[str]]] = None,
+        min_score: float = 0.2,
+        out_of_scope: Optional[Iterable[str]] = None,
+        keywords: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ) -> None:
+        """
+        Args:
+            examples (Optional[Dict[str, Iterable[str]]]): 라우트별 예시 질문, None 이면 SEED_EXAMPLES
+            min_score (float): 1위 라우트 유사도가 이 값보다 작으면 confidence 0
+            out_of_scope (Optional[Iterable[str]]): 어느 route 에도 속하지 않는 예시, None 이면 OUT_OF_SCOPE_EXAMPLES
+            keywords (Optional[Dict[str, Tuple[str, ...]]]): 로컬 분류에 단어가 필요한 route, None 이면 ROUTE_KEYWORDS
+        """
+        examples = examples or SEED_EXAMPLES
+        self.min_score = min_score
+        self.keywords = ROUTE_KEYWORDS if keywords is None else keywords
+
+        examples = {
+            **examples,
+            OUT_OF_SCOPE: list(OUT_OF_SCOPE_EXAMPLES if out_of_scope is None else out_of_scope),
+        }
+        documents = [
+            (route, Counter(_tokenize(text)))
+            for route, texts in examples.items()
+            for text in texts
+        ]
+        doc_freq = Counter()
+        for _, tf in documents:
+            doc_freq.update(tf.keys())
+        n_docs = len(documents)
+        self._idf = {
+            token: math.log((1 + n_docs) / (1 + df)) + 1.0
+            for token, df in doc_freq.items()
+        }
+
+        # 라우트별 centroid 벡터 (정규화된 문서 벡터의 합)
+        centroids: Dict[str, Dict[str, float]] = {}
+        for route, tf in documents:
+            centroid = centroids.setdefault(route, {})
+            for token, weight in self._vectorize(tf).items():
+                centroid[token] = centroid.get(token, 0.0) + weight
+        self._centroids = {
+            route: self._normalize(vector) for route, vector in centroids.items()
+        }
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else vector
+
+    def _vectorize(self, tf: Counter) -> Dict[str, float]:
+        vector = {
+            token: (1 + math.log(count)) * self._idf[token]
+            for token, count in tf.items()
+            if token in self._idf
+        }
+        return self._normalize(vector)
+
+    def scores(self, question: str) -> Dict[str, float]:
+        """
+        라우트별 코사인 유사도 (OUT_OF_SCOPE 포함)
+        """
+        vector = self._vectorize(Counter(_tokenize(question)))
+        return {
+            route: sum(w * centroid.get(t, 0.0) for t, w in vector.items())
+            for route, centroid in self._centroids.items()
+        }
+
+    def route(self, question: str) -> Tuple[str, float]:
+        """
+        질문을 라우트로 분류합니다.
+
+        Returns:
+            Tuple[str, float]: (route, confidence)
+        """
+        ranked = sorted(self.scores(question).items(), key=lambda x: x[1], reverse=True)
+        (best, top), second = ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+        route = best if best != OUT_OF_SCOPE else next(
+            (name for name, _ in ranked if name != OUT_OF_SCOPE), "plain_answer"
+        )
+        if best == OUT_OF_SCOPE or top < self.min_score or not self._has_keyword(route, question):
+            return route, 0.0
+        return route, (top - second) / top
+
+    def _has_keyword(self, route: str, question: str) -> bool:
+        keywords = self.keywords.get(route)
+        return not keywords or any(keyword in question.lower() for keyword in keywords)
+
+    def route_intents(self, question: str) -> List[Tuple[str, float]]:
+        """
+        접속 표현으로 나눈 요청마다 분류합니다. (여러 요청을 한 번에 묻는 질문)
+
+        Returns:
+            List[Tuple[str, float]]: 질문 순서대로 요청별 (route, confidence), 같은 route 는 하나로 합침.
+                일반 답변(plain_answer)이나 분류되지 않는 부분을 빼고 요청이 둘 이상이 아니면 질문 전체의 [route()].
+                이때 확신하지 못한 다른 요청이 있을 수 있으면 confidence 0 (LLM 라우팅으로 넘김)
+        """
+        intents: Dict[str, float] = {}
+        uncertain = False
+        for part in INTENT_SEPARATOR.split(question):
+            route, confidence = self.route(part) if part.strip() else ("plain_answer", 0.0)
+            if route != "plain_answer" and confidence > 0:
+                intents[route] = max(confidence, intents.get(route, 0.0))
+            elif part.strip() and self._maybe_request(part):
+                uncertain = True
+        if len(intents) < 2:
+            route, confidence = self.route(question)
+            return [(route, 0.0 if uncertain and intents else confidence)]
+        return list(intents.items())
+
+    def _maybe_request(self, part: str) -> bool:
+        # 일반 답변이 아닌 route 와 조금이라도 비슷한 부분 (min_score 의 절반 이상)
+        return any(
+            score >= self.min_score / 2
+            for route, score in self.scores(part).items()
+            if route not in ("plain_answer", OUT_OF_SCOPE)
+        )
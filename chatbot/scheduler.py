@@ -0,0 +1,501 @@
+"""
+LLM 요청 스케줄러
+
+모든 LLM 호출(채팅, 라우팅, 요약, 테스트 생성)을 모델별 lane 으로 모아서
+
+- token bucket 으로 모델별 분당 요청 수(rpm) / 토큰 수(tpm)를 제한하고
+- 429 / 5xx 는 jitter 를 준 지수 backoff 로 재시도하며 (Retry-After 가 있으면 그 동안 lane 전체를 멈춤)
+- 동시 실행 슬롯과 rate limit 토큰을 우선순위 순서로 배정하고 (INTERACTIVE > BACKGROUND > BATCH)
+- 같은 요청(payload)이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받습니다. (single-flight)
+
+동기 코드는 call(), 공유 이벤트 루프(llm_pool)의 코루틴은 acall() 을 사용합니다.
+
+    get_scheduler().call("gpt-4o-mini", lambda: chain.invoke(inputs), payload=inputs)
+    await get_scheduler().acall("gpt-4o-mini", lambda: chain.ainvoke(inputs), payload=inputs)
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 우선순위 lane (작을수록 먼저)
+INTERACTIVE = 0  # 사용자가 기다리는 채팅 응답
+BACKGROUND = 1  # 대화 요약 등
+BATCH = 2  # 일괄 테스트 생성
+
+
+class _Abandoned(Exception):
+    """
+    single-flight 의 첫 요청이 취소됨 (기다리던 요청이 대신 보냄)
+    """
+
+
+class TokenBucket:
+    """
+    rate(초당) 로 채워지고 capacity 까지 쌓이는 토큰 버킷
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        amount 만큼 가져갈 수 있을 때까지 남은 시간(초). capacity 보다 큰 요청은 가득 찼을 때 허용
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    wake: Callable[[], None] = field(compare=False)
+    group: Optional[str] = field(default=None, compare=False)
+    granted: bool = field(default=False, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class _Lane:
+    def __init__(self, max_concurrency: int, rpm: Optional[float], tpm: Optional[float]) -> None:
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(rpm / 60, rpm / 60 * 10) if rpm else None  # 최대 10초 분량 burst
+        self.tokens = TokenBucket(tpm / 60, tpm / 60 * 10) if tpm else None
+        self.active = 0
+        self.waiters: List[_Waiter] = []
+        # lane 안의 그룹별 동시 요청 수 상한 (예: 채팅과 lane 을 공유하는 테스트 생성)
+        self.group_limits: Dict[str, int] = {}
+        self.group_active: Dict[str, int] = {}
+        self.paused_until = 0.0  # 429 의 Retry-After
+        self.timer: Optional[threading.Timer] = None
+        self.timer_at = 0.0
+        self.stats = {
+            "calls": 0, "retries": 0, "rate_limited": 0, "errors": 0, "coalesced": 0, "queued_seconds": 0.0,
+        }
+
+
+def request_key(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def model_name(llm: Any) -> str:
+    """
+    채팅 모델 객체의 lane 이름 (ChatOpenAI.model_name, ChatOllama.model, 그 외 클래스 이름)
+    """
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    # openai.APIStatusError / ollama.ResponseError: status_code, httpx.HTTPStatusError: response.status_code
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers and headers.get("retry-after") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limits(text: str) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """
+    "gpt-4o-mini=500/200000,codellama:7b=60" -> {model: (rpm, tpm)}
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        model, _, value = item.rpartition("=")
+        rpm, _, tpm = value.partition("/")
+        limits[model] = (float(rpm) if rpm else None, float(tpm) if tpm else None)
+    return limits
+
+
+class Scheduler:
+    """
+    모델별 rate limit / 우선순위 / 재시도 / single-flight 를 처리하는 LLM 요청 스케줄러
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        rate_limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            max_concurrency (int): 모델별 기본 동시 요청 수
+            rate_limits (Optional[Dict]): 모델별 (분당 요청 수, 분당 토큰 수), None 은 제한 없음
+            max_retries (int): 429 / 5xx 재시도 횟수
+            base_delay (float): 첫 재시도의 최대 대기(초), 재시도마다 두 배
+            max_delay (float): 재시도 대기 상한(초)
+        """
+        self.max_concurrency = max_concurrency
+        self.rate_limits = dict(rate_limits or {})
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lanes: Dict[str, _Lane] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Scheduler":
+        """
+        CHATBOT_RATE_LIMITS ("모델=rpm/tpm,..."), CHATBOT_SCHEDULER_CONCURRENCY, CHATBOT_SCHEDULER_RETRIES
+        """
+        return cls(
+            max_concurrency=int(os.environ.get("CHATBOT_SCHEDULER_CONCURRENCY", "32")),
+            rate_limits=parse_rate_limits(os.environ.get("CHATBOT_RATE_LIMITS", "gpt-4o-mini=500/200000")),
+            max_retries=int(os.environ.get("CHATBOT_SCHEDULER_RETRIES", "4")),
+        )
+
+    def configure(self, model: str, max_concurrency: Optional[int] = None, rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+        """
+        모델 lane 설정 변경 (지정한 값만, 진행 중인 요청에는 영향 없음)
+        """
+        with self._lock:
+            lane = self._lane(model)
+            if max_concurrency is not None:
+                lane.max_concurrency = max_concurrency
+            if rpm is not None or tpm is not None:
+                old_rpm, old_tpm = self.rate_limits.get(model, (None, None))
+                self.rate_limits[model] = (rpm or old_rpm, tpm or old_tpm)
+                fresh = _Lane(lane.max_concurrency, *self.rate_limits[model])
+                lane.requests, lane.tokens = fresh.requests, fresh.tokens
+            self._dispatch(lane)
+
+    def configure_group(self, model: str, group: str, max_concurrency: int) -> None:
+        """
+        model lane 안에서 group 으로 보낸 요청의 동시 실행 수 제한 (대기 순서는 lane 의 우선순위를 따름)
+        """
+        with self._lock:
+            lane = self._lane(model)
+            lane.group_limits[group] = max_concurrency
+            self._dispatch(lane)
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _Lane(self.max_concurrency, *self.rate_limits.get(model, (None, None)))
+        return lane
+
+    # --- 슬롯 배정 (self._lock 안에서 호출) ---
+
+    def _dispatch(self, lane: _Lane) -> None:
+        """
+        빈 슬롯과 rate limit 토큰이 있는 동안 우선순위가 가장 높은 대기 요청부터 깨웁니다.
+        """
+        while lane.waiters and lane.active < lane.max_concurrency:
+            if lane.waiters[0].cancelled:
+                heapq.heappop(lane.waiters)
+                continue
+            waiter = self._next_waiter(lane)
+            if waiter is None:
+                return
+            now = time.monotonic()
+            wait = lane.paused_until - now
+            if lane.requests is not None:
+                wait = max(wait, lane.requests.wait_time(1, now))
+            if lane.tokens is not None and waiter.tokens:
+                wait = max(wait, lane.tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                self._wake_later(lane, wait)
+                return
+            if waiter is lane.waiters[0]:
+                heapq.heappop(lane.waiters)
+            else:
+                lane.waiters.remove(waiter)
+                heapq.heapify(lane.waiters)
+            if lane.requests is not None:
+                lane.requests.take(1)
+            if lane.tokens is not None and waiter.tokens:
+                lane.tokens.take(waiter.tokens)
+            lane.active += 1
+            if waiter.group is not None:
+                lane.group_active[waiter.group] = lane.group_active.get(waiter.group, 0) + 1
+            waiter.granted = True
+            waiter.wake()
+
+    @staticmethod
+    def _next_waiter(lane: _Lane) -> Optional[_Waiter]:
+        """
+        그룹 상한에 걸리지 않은 대기 요청 중 우선순위가 가장 높은 요청
+        """
+        if not lane.group_limits:
+            return lane.waiters[0]
+        for waiter in sorted(lane.waiters):
+            limit = lane.group_limits.get(waiter.group) if waiter.group is not None else None
+            if not waiter.cancelled and (limit is None or lane.group_active.get(waiter.group, 0) < limit):
+                return waiter
+        return None
+
+    def _wake_later(self, lane: _Lane, wait: float) -> None:
+        at = time.monotonic() + wait
+        if lane.timer is not None and lane.timer_at <= at:
+            return
+        if lane.timer is not None:
+            lane.timer.cancel()
+
+        def fire():
+            with self._lock:
+                lane.timer = None
+                self._dispatch(lane)
+
+        lane.timer, lane.timer_at = threading.Timer(wait, fire), at
+        lane.timer.daemon = True
+        lane.timer.start()
+
+    def _enqueue(self, lane: _Lane, priority: int, tokens: int, wake: Callable[[], None], group: Optional[str] = None) -> _Waiter:
+        waiter = _Waiter(priority, next(self._seq), tokens, wake, group)
+        heapq.heappush(lane.waiters, waiter)
+        self._dispatch(lane)
+        return waiter
+
+    @staticmethod
+    def _free(lane: _Lane, group: Optional[str]) -> None:
+        lane.active -= 1
+        if group is not None:
+            lane.group_active[group] -= 1
+
+    def _release(self, lane: _Lane, group: Optional[str] = None) -> None:
+        with self._lock:
+            self._free(lane, group)
+            self._dispatch(lane)
+
+    def _acquire(self, lane: _Lane, priority: int, tokens: int, group: Optional[str] = None) -> None:
+        event = threading.Event()
+        start = time.perf_counter()
+        with self._lock:
+            self._enqueue(lane, priority, tokens, event.set, group)
+        event.wait()
+        self._count(lane, "queued_seconds", time.perf_counter() - start)
+
+    async def _aacquire(self, lane: _Lane, priority: int, tokens: int, group: Optional[str] = None) -> None:
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue(lane, priority, tokens, wake, group)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                if waiter.granted:  # 배정된 직후 취소됐으면 슬롯 반납
+                    self._free(lane, group)
+                    self._dispatch(lane)
+            raise
+        self._count(lane, "queued_seconds", time.perf_counter() - start)
+
+    def _count(self, lane: _Lane, name: str, value: float = 1) -> None:
+        with self._lock:
+            lane.stats[name] += value
+
+    # --- 재시도 ---
+
+    def _retry_delay(self, lane: _Lane, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        재시도할 오류면 대기 시간(초), 아니면 None
+        """
+        status = _status_code(error)
+        if status is None or not (status == 429 or status >= 500) or attempt >= self.max_retries:
+            self._count(lane, "errors")
+            return None
+        self._count(lane, "retries")
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))  # full jitter
+        if status == 429:
+            self._count(lane, "rate_limited")
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+                with self._lock:
+                    # 같은 모델의 다른 요청도 Retry-After 동안 보내지 않음
+                    lane.paused_until = max(lane.paused_until, time.monotonic() + retry_after)
+        return delay
+
+    def _call(self, lane: _Lane, fn: Callable[[], T], priority: int, tokens: int, group: Optional[str] = None) -> T:
+        attempt = 0
+        while True:
+            self._acquire(lane, priority, tokens, group)
+            self._count(lane, "calls")
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._retry_delay(lane, e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release(lane, group)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _acall(self, lane: _Lane, fn: Callable[[], Awaitable[T]], priority: int, tokens: int,
+                     group: Optional[str] = None) -> T:
+        attempt = 0
+        while True:
+            await self._aacquire(lane, priority, tokens, group)
+            self._count(lane, "calls")
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._retry_delay(lane, e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release(lane, group)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    # --- single-flight ---
+
+    def _join(self, model: str, key: str) -> Tuple[bool, Future]:
+        with self._lock:
+            future = self._inflight.get((model, key))
+            if future is not None:
+                self._lane(model).stats["coalesced"] += 1
+                return False, future
+            future = self._inflight[(model, key)] = Future()
+            return True, future
+
+    def _finish(self, model: str, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._inflight.pop((model, key), None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def _estimate_tokens(payload: Any) -> int:
+        return len(json.dumps(payload, ensure_ascii=False, default=str)) // 4 if payload is not None else 0
+
+    def call(
+        self, model: str, fn: Callable[[], T], payload: Any = None, priority: int = INTERACTIVE, coalesce: bool = True,
+        group: Optional[str] = None,
+    ) -> T:
+        """
+        fn() 을 model lane 에서 실행합니다. payload 가 같은 요청이 진행 중이면 그 결과를 기다려 반환
+
+        Args:
+            model (str): rate limit / 동시 실행 수를 적용할 모델 이름
+            fn (Callable[[], T]): 실제 LLM 호출
+            payload (Any): 요청 내용 (single-flight 키와 tpm 추정에 사용), None 이면 합치지 않음
+            priority (int): INTERACTIVE | BACKGROUND | BATCH
+            coalesce (bool): 같은 payload 요청 합치기 여부
+            group (Optional[str]): configure_group 으로 동시 실행 수를 따로 제한할 요청 그룹
+        """
+        with self._lock:
+            lane = self._lane(model)
+        tokens = self._estimate_tokens(payload)
+        if payload is None or not coalesce:
+            return self._call(lane, fn, priority, tokens, group)
+
+        key = request_key(payload)
+        while True:
+            leader, future = self._join(model, key)
+            if not leader:
+                try:
+                    return future.result()
+                except _Abandoned:
+                    continue
+            try:
+                result = self._call(lane, fn, priority, tokens, group)
+            except BaseException as e:
+                self._finish(model, key, future, error=e)
+                raise
+            self._finish(model, key, future, result=result)
+            return result
+
+    async def acall(
+        self, model: str, fn: Callable[[], Awaitable[T]], payload: Any = None, priority: int = INTERACTIVE,
+        coalesce: bool = True, group: Optional[str] = None,
+    ) -> T:
+        """
+        call 의 async 버전 (fn 은 코루틴을 반환하는 함수)
+        """
+        with self._lock:
+            lane = self._lane(model)
+        tokens = self._estimate_tokens(payload)
+        if payload is None or not coalesce:
+            return await self._acall(lane, fn, priority, tokens, group)
+
+        key = request_key(payload)
+        while True:
+            leader, future = self._join(model, key)
+            if not leader:
+                try:
+                    # 기다리던 쪽이 취소돼도 진행 중인 요청은 취소하지 않음
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _Abandoned:
+                    continue
+            try:
+                result = await self._acall(lane, fn, priority, tokens, group)
+            except asyncio.CancelledError:
+                self._finish(model, key, future, error=_Abandoned())
+                raise
+            except BaseException as e:
+                self._finish(model, key, future, error=e)
+                raise
+            self._finish(model, key, future, result=result)
+            return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        모델 lane 별 호출/재시도/429/합쳐진 요청 수와 현재 대기/실행 중인 요청 수
+        """
+        with self._lock:
+            return {
+                model: {
+                    **lane.stats,
+                    "active": lane.active,
+                    "waiting": sum(1 for waiter in lane.waiters if not waiter.cancelled),
+                }
+                for model, lane in self._lanes.items()
+            }
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """
+    프로세스 전역 Scheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler.from_env()
+        return _scheduler
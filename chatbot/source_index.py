@@ -0,0 +1,323 @@
+"""
+업로드된 프로젝트의 class / method 위치 인덱스
+
+파일마다 최상위 타입 선언과 멤버(필드, 메서드, 생성자)의 byte offset 만 기록해 두고,
+질문이 가리키는 클래스/메서드의 소스만 파일에서 읽어 context 로 사용합니다.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+SOURCE_EXTENSIONS = ('.java',)
+
+# ASCII 식별자만 사용 (\w 는 한글도 포함해서 "Calculator를" 이 한 단어가 됨)
+DECLARATION = re.compile(r'\b(?:class|interface|enum|record)\s+([A-Za-z_$][A-Za-z0-9_$]*)')
+IDENTIFIER = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*')
+# 주석/리터럴 시작이거나 구조에 영향을 주는 문자
+_TOKENS = re.compile(r'//|/\*|["\'{};]')
+
+
+# --- Java 소스 조작 (문자열/주석 안의 중괄호는 무시) ---
+
+def _skip_literal(code, i):
+    """
+    code[i] 에서 시작하는 문자열/문자 리터럴이나 주석을 건너뛴 다음 인덱스. 해당 없으면 None
+    """
+    if code.startswith('//', i):
+        end = code.find('\n', i)
+        return len(code) if end < 0 else end + 1
+    if code.startswith('/*', i):
+        end = code.find('*/', i + 2)
+        return len(code) if end < 0 else end + 2
+    if code[i] in '"\'':
+        quote, i = code[i], i + 1
+        while i < len(code) and code[i] != quote:
+            i += 2 if code[i] == '\\' else 1
+        return i + 1
+    return None
+
+
+def _scan(code, start=0, end=None) -> Iterator[Tuple[int, str]]:
+    """
+    code[start:end] 에서 주석/리터럴 밖의 '{', '}', ';' 위치와 문자
+    """
+    end = len(code) if end is None else end
+    i = start
+    while i < end:
+        match = _TOKENS.search(code, i, end)
+        if match is None:
+            return
+        i = match.start()
+        skipped = _skip_literal(code, i)
+        if skipped is not None:
+            i = skipped
+            continue
+        yield i, code[i]
+        i += 1
+
+
+def _class_body(code) -> Optional[Tuple[int, int]]:
+    """
+    첫 번째 class 선언의 본문 범위 (여는 중괄호 다음, 닫는 중괄호) 인덱스
+    """
+    match = re.search(r'\bclass\s+[a-zA-Z_]\w*[^{]*\{', code)
+    if not match:
+        return None
+    depth = 1
+    for i, char in _scan(code, match.end()):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return match.end(), i
+    return None
+
+
+def _member_spans(code, start=0, end=None) -> List[Tuple[int, int]]:
+    """
+    클래스 본문 code[start:end] 의 최상위 멤버 (시작, 끝) 인덱스. (앞의 주석/어노테이션 포함, 공백 제외)
+    """
+    spans, depth, member_start = [], 0, start
+    for i, char in _scan(code, start, end):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                spans.append((member_start, i + 1))
+                member_start = i + 1
+        elif char == ';' and depth == 0:
+            spans.append((member_start, i + 1))
+            member_start = i + 1
+    stripped = []
+    for span_start, span_end in spans:
+        text = code[span_start:span_end]
+        if text.strip():
+            span_start += len(text) - len(text.lstrip())
+            stripped.append((span_start, span_end))
+    return stripped
+
+
+def _members(body) -> List[str]:
+    """
+    클래스 본문을 최상위 멤버(필드, 메서드, 생성자 등) 단위로 나눕니다. (앞의 주석/어노테이션 포함)
+    """
+    return [body[start:end] for start, end in _member_spans(body)]
+
+
+def _signature(member) -> str:
+    """
+    멤버의 본문 '{' 앞부분 (주석/리터럴 안의 '{' 는 무시)
+    """
+    for i, char in _scan(member):
+        if char == '{':
+            return member[:i]
+    return member
+
+
+def _method_name(member) -> Optional[str]:
+    signature = _signature(member)
+    match = re.search(r'([A-Za-z_$][A-Za-z0-9_$]*)\s*\([^)]*\)\s*(?:throws\s+[A-Za-z0-9_$.,\s]+)?$', signature.strip())
+    return match.group(1) if match and len(signature) < len(member) else None
+
+
+def _type_spans(code) -> List[Tuple[str, int, int, int]]:
+    """
+    최상위 타입 선언의 (이름, 선언 시작, 본문 시작, 끝) 목록. 선언 시작은 앞의 주석/어노테이션 포함
+    """
+    spans, depth, boundary, current = [], 0, 0, None
+    for i, char in _scan(code):
+        if char == '{':
+            if depth == 0:
+                # 선언 앞의 javadoc 에 있는 "class ..." 와 구분하기 위해 '{' 에 가장 가까운 선언을 사용
+                matches = list(DECLARATION.finditer(code, boundary, i))
+                current = (matches[-1].group(1), boundary, i + 1) if matches else None
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                if current is not None:
+                    spans.append((*current, i + 1))
+                current, boundary = None, i + 1
+        elif char == ';' and depth == 0:
+            boundary = i + 1
+    return [(name, start + len(code[start:body]) - len(code[start:body].lstrip()), body, end)
+            for name, start, body, end in spans]
+
+
+def class_name(code) -> str:
+    """
+    코드의 첫 번째 최상위 타입 이름 (주석/문자열 안의 class 는 무시)
+    """
+    spans = _type_spans(code)
+    if spans:
+        return spans[0][0]
+    # 중괄호가 닫히지 않은 코드(잘린 LLM 응답 등)는 첫 선언을 사용
+    match = DECLARATION.search(code)
+    if match is None:
+        raise ValueError('class declaration not found')
+    return match.group(1)
+
+
+# --- 프로젝트 인덱스 ---
+
+@dataclass
+class MemberEntry:
+    name: Optional[str]  # 메서드/생성자 이름, 필드 등은 None
+    start: int
+    end: int
+
+
+@dataclass
+class ClassEntry:
+    name: str
+    path: str
+    header_end: int  # package / import 끝
+    start: int
+    body_start: int
+    end: int
+    members: List[MemberEntry] = field(default_factory=list)
+
+    @property
+    def methods(self) -> Set[str]:
+        return {member.name for member in self.members if member.name and member.name != self.name}
+
+
+class SourceIndex:
+    """
+    프로젝트의 클래스/메서드 → (파일, byte offset) 인덱스
+
+    파일 내용은 보관하지 않고, context() 에서 질문에 언급된 클래스(또는 메서드)의 범위만 읽습니다.
+    스캔은 latin-1 로 디코딩해서 문자 인덱스와 byte offset 을 같게 유지합니다.
+    (UTF-8 의 멀티바이트 문자에는 ASCII 바이트가 없으므로 중괄호/따옴표 위치는 그대로)
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root
+        self.classes: Dict[str, List[ClassEntry]] = {}
+        self.methods: Dict[str, List[ClassEntry]] = {}
+        self.files: List[str] = []
+        self.names: Dict[str, str] = {}  # 파일 경로 -> 프로젝트 안의 경로 (업로드 저장소의 파일 등)
+        self.bytes = 0
+
+    @classmethod
+    def build(cls, root: str, extensions=SOURCE_EXTENSIONS) -> "SourceIndex":
+        index = cls(root)
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in ('build', '.gradle', '.git'))
+            for filename in sorted(filenames):
+                if filename.endswith(extensions):
+                    index.add_file(os.path.join(directory, filename))
+        return index
+
+    def add_file(self, path: str, name: Optional[str] = None) -> List[ClassEntry]:
+        with open(path, 'rb') as file:
+            code = file.read().decode('latin-1')
+        self.files.append(path)
+        if name is not None:
+            self.names[path] = name
+        self.bytes += len(code)
+
+        spans = _type_spans(code)
+        header_end = spans[0][1] if spans else 0
+        entries = []
+        for type_name, start, body_start, end in spans:
+            members = [
+                MemberEntry(_method_name(code[member_start:member_end]), member_start, member_end)
+                for member_start, member_end in _member_spans(code, body_start, end - 1)
+            ]
+            entry = ClassEntry(type_name, path, header_end, start, body_start, end, members)
+            self.classes.setdefault(type_name, []).append(entry)
+            for method in entry.methods:
+                self.methods.setdefault(method, []).append(entry)
+            entries.append(entry)
+        return entries
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.classes.values())
+
+    @staticmethod
+    def _read(path: str, ranges: List[Tuple[int, int]]) -> List[str]:
+        parts = []
+        with open(path, 'rb') as file:
+            for start, end in ranges:
+                file.seek(start)
+                parts.append(file.read(end - start).decode('utf-8', errors='replace'))
+        return parts
+
+    def source(self, entry: ClassEntry) -> str:
+        """
+        클래스 전체 소스 (package / import 포함)
+        """
+        header, body = self._read(entry.path, [(0, entry.header_end), (entry.start, entry.end)])
+        return f"{header.strip()}\n\n{body}\n" if header.strip() else f"{body}\n"
+
+    def excerpt(self, entry: ClassEntry, method_names) -> str:
+        """
+        클래스 선언, 필드, 생성자와 method_names 메서드만 포함한 소스
+        """
+        selected = [
+            member for member in entry.members
+            if member.name is None or member.name == entry.name or member.name in method_names
+        ]
+        ranges = [(0, entry.header_end), (entry.start, entry.body_start)]
+        ranges += [(member.start, member.end) for member in selected]
+        header, declaration, *members = self._read(entry.path, ranges)
+        code = declaration + '\n' + '\n\n'.join('    ' + member for member in members) + '\n}\n'
+        return f"{header.strip()}\n\n{code}" if header.strip() else code
+
+    def find(self, question: str) -> List[Tuple[ClassEntry, Set[str]]]:
+        """
+        질문에 언급된 (클래스, 언급된 메서드) 목록. 클래스 이름은 대소문자를 무시하고 비교
+        """
+        words = set(IDENTIFIER.findall(question))
+        lowered = {word.lower() for word in words}
+        found: Dict[int, Tuple[ClassEntry, Set[str]]] = {}
+        for name, entries in self.classes.items():
+            if name in words or name.lower() in lowered:
+                for entry in entries:
+                    found[id(entry)] = (entry, entry.methods & words)
+        if not found:
+            # 클래스 이름 없이 메서드만 언급한 경우
+            for method in words:
+                for entry in self.methods.get(method, ()):
+                    found.setdefault(id(entry), (entry, set()))[1].add(method)
+        return list(found.values())
+
+    def context(self, question: str, max_classes: int = 3) -> Optional[str]:
+        """
+        질문이 가리키는 클래스 소스. 메서드까지 언급했으면 해당 메서드만 남긴 excerpt, 해당 없으면 None
+        """
+        return self.render(self.find(question)[:max_classes])
+
+    def render(self, found: List[Tuple[ClassEntry, Set[str]]]) -> Optional[str]:
+        """
+        find() 결과의 소스. 메서드까지 언급된 클래스는 excerpt, 비어 있으면 None
+        """
+        if not found:
+            return None
+        return "\n".join(
+            self.excerpt(entry, methods) if methods else self.source(entry) for entry, methods in found
+        )
+
+    def text(self) -> str:
+        """
+        프로젝트 전체 소스 (질문이 특정 클래스를 가리키지 않을 때 사용)
+        """
+        parts = []
+        for path in self.files:
+            with open(path, 'rb') as file:
+                parts.append(file.read().decode('utf-8', errors='replace'))
+        return "\n".join(parts)
+
+    def outline(self) -> str:
+        """
+        클래스와 메서드 이름 목록
+        """
+        return "\n".join(
+            f"{entry.name} ({self.names.get(entry.path) or os.path.relpath(entry.path, self.root or '.')}): "
+            f"{', '.join(sorted(entry.methods))}"
+            for entries in self.classes.values() for entry in entries
+        )
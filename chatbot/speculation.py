@@ -0,0 +1,190 @@
+import asyncio
+import os
+import threading
+from collections import Counter, deque
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+# 결과를 버려도 부작용이 없는 route 만 미리 실행 (generate_test_code 는 파일 저장/빌드를 하므로 제외)
+SPECULATIVE_ROUTES = ("plain_answer", "code_review", "code_refactor", "check_convention")
+
+
+class SpeculationAborted(Exception):
+    """
+    토큰을 이미 보낸 뒤 투기 실행의 생성이 재시도되거나 실패한 경우 (보낸 토큰과 이후 답변을 이어 붙일 수 없음)
+    """
+
+
+class TokenBuffer:
+    """
+    투기 실행이 생성하는 토큰 버퍼 (공유 이벤트 루프에서 사용)
+
+    라우팅이 확인되기 전까지는 모아 두기만 하고, 확인되면 tokens() 로 지금까지 모인 토큰과 이후 토큰을 이어서 반환합니다.
+    토큰을 하나라도 보낸 뒤 재시도(reset)나 실패(fail)가 생기면 이후 토큰을 버리고 tokens() 는 SpeculationAborted 를 냅니다.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.sent = 0  # tokens() 로 보낸 토큰 수
+        self.done = False
+        self.failed = False
+        self._changed = asyncio.Event()
+
+    def append(self, token: str) -> None:
+        if not self.failed:
+            self.chunks.append(token)
+            self._changed.set()
+
+    def reset(self) -> None:
+        """
+        재시도하면 처음부터 다시 생성. 이미 보낸 토큰이 있으면 앞 시도와 섞이지 않도록 실패로 처리
+        """
+        if self.sent:
+            self.fail()
+            return
+        self.chunks.clear()
+        self._changed.set()
+
+    def fail(self) -> None:
+        self.failed = True
+        self._changed.set()
+
+    def close(self) -> None:
+        self.done = True
+        self._changed.set()
+
+    async def tokens(self) -> AsyncIterator[str]:
+        while True:
+            self._changed.clear()
+            while not self.failed and self.sent < len(self.chunks):
+                self.sent += 1
+                yield self.chunks[self.sent - 1]
+            if self.failed:
+                if self.sent:
+                    raise SpeculationAborted()
+                return
+            if self.done:
+                return
+            await self._changed.wait()
+
+
+class Speculation:
+    """
+    LLM 라우팅과 예상 route 의 답변 생성을 동시에 실행하는 투기 실행(speculative execution) 정책과 통계
+
+    - 예상 route 는 로컬 라우터의 1순위(confidence 가 낮아도) 또는 최근 route 중 가장 많은 것
+    - 비용 상한: 동시에 진행 중인 투기 실행 수(max_inflight), 남은 LLM 동시 호출 슬롯(min_free_slots),
+      최근 적중률(min_hit_rate)이 기준에 못 미치면 투기 실행을 생략
+      (적중률이 낮아 꺼진 경우에도 explore_every 번에 한 번은 실행해서 적중률을 다시 측정)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_inflight: int = 4,
+        min_free_slots: int = 4,
+        min_hit_rate: float = 0.3,
+        warmup: int = 20,
+        window: int = 100,
+        explore_every: int = 10,
+    ) -> None:
+        """
+        Args:
+            enabled (bool): 투기 실행 사용 여부
+            max_inflight (int): 동시에 진행할 수 있는 투기 실행 수
+            min_free_slots (int): llm_pool 에 남아 있어야 하는 동시 호출 슬롯 수 (부하가 높으면 생략)
+            min_hit_rate (float): 최근 window 개의 적중률이 이보다 낮으면 생략
+            warmup (int): 적중률 기준을 적용하기 전 최소 시도 수
+            window (int): 적중률/route 예측에 사용할 최근 기록 수
+            explore_every (int): 적중률 때문에 생략하는 동안에도 이 횟수마다 한 번은 실행
+        """
+        self.enabled = enabled
+        self.max_inflight = max_inflight
+        self.min_free_slots = min_free_slots
+        self.min_hit_rate = min_hit_rate
+        self.warmup = warmup
+        self.explore_every = explore_every
+        self.stats = {
+            "attempts": 0,
+            "hits": 0,
+            "misses": 0,
+            "skipped": 0,
+            "saved_seconds": 0.0,
+            "wasted_seconds": 0.0,
+        }
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._routes: Deque[str] = deque(maxlen=window)
+        self._inflight = 0
+        self._skipped_for_hit_rate = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Speculation":
+        """
+        CHATBOT_SPECULATION=0 이면 비활성화, CHATBOT_SPECULATION_MAX_INFLIGHT 로 동시 실행 수 제한
+        """
+        return cls(
+            enabled=os.environ.get("CHATBOT_SPECULATION", "1") != "0",
+            max_inflight=int(os.environ.get("CHATBOT_SPECULATION_MAX_INFLIGHT", "4")),
+        )
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        with self._lock:
+            return sum(self._outcomes) / len(self._outcomes) if self._outcomes else None
+
+    def observe(self, route: str) -> None:
+        """
+        실제로 선택된 route 기록 (예측에 사용)
+        """
+        with self._lock:
+            self._routes.append(route)
+
+    def predict(self, local_guess: Optional[str] = None) -> Optional[str]:
+        """
+        미리 실행할 route, 투기 실행 대상이 아니면 None
+        """
+        route = local_guess
+        if route is None:
+            with self._lock:
+                route = Counter(self._routes).most_common(1)[0][0] if self._routes else None
+        return route if route in SPECULATIVE_ROUTES else None
+
+    def acquire(self, free_slots: int) -> bool:
+        """
+        지금 투기 실행을 해도 되는지 확인하고, 된다면 실행 슬롯을 잡습니다. (끝나면 finish 호출)
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self._inflight >= self.max_inflight or free_slots < self.min_free_slots:
+                self.stats["skipped"] += 1
+                return False
+            if len(self._outcomes) >= self.warmup:
+                hit_rate = sum(self._outcomes) / len(self._outcomes)
+                if hit_rate < self.min_hit_rate:
+                    self._skipped_for_hit_rate += 1
+                    if self._skipped_for_hit_rate % self.explore_every:
+                        self.stats["skipped"] += 1
+                        return False
+            self._inflight += 1
+            self.stats["attempts"] += 1
+            return True
+
+    def finish(self, hit: Optional[bool], saved_seconds: float = 0.0, wasted_seconds: float = 0.0) -> None:
+        """
+        투기 실행 결과 기록. hit=None 이면(오류 등) 적중률에 반영하지 않음
+        """
+        with self._lock:
+            self._inflight -= 1
+            if hit is None:
+                return
+            self._outcomes.append(hit)
+            if hit:
+                self.stats["hits"] += 1
+                self.stats["saved_seconds"] += max(0.0, saved_seconds)
+            else:
+                self.stats["misses"] += 1
+                self.stats["wasted_seconds"] += wasted_seconds
+
+    def summary(self) -> Dict[str, float]:
+        return {**self.stats, "hit_rate": self.hit_rate, "inflight": self._inflight}
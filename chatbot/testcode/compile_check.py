@@ -0,0 +1,237 @@
+"""
+생성된 테스트의 빠른 컴파일 검사
+
+gradle 빌드/테스트(수십 초) 전에 javac 로 생성된 테스트(와 대상 소스)만 이미 빌드된 main 클래스에 대해 컴파일해서,
+컴파일되지 않는 테스트는 몇 초 안에 거르거나 오류를 붙여 다시 생성하도록 합니다.
+
+classpath 는 TESTGEN_CLASSPATH, 없으면 coverity_test 의 printTestClasspath 태스크로 한 번 조회해
+build/test-classpath.txt 에 저장해 둔 값을 사용합니다. 대상 클래스가 참조하는 프로젝트의 다른 클래스는
+-sourcepath (coverity_test/src/main/java 와 일괄 생성 시 프로젝트의 소스 루트)에서 찾습니다.
+javac 나 classpath 를 구할 수 없거나, 오류가 테스트가 아닌 프로젝트 쪽(찾을 수 없는 프로젝트 클래스 등)이면
+검사를 건너뛰고(skipped) 기존처럼 gradle 빌드에서 확인합니다.
+"""
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from ..source_index import class_name
+
+JAVAC = os.environ.get('JAVAC_CMD', 'javac')
+# JIT 최적화를 줄여 javac 시작 시간을 단축
+JAVAC_OPTIONS = ['-J-XX:TieredStopAtLevel=1', '-J-Xshare:auto', '-proc:none', '-implicit:none', '-nowarn',
+                 '-encoding', 'UTF-8', '-Xmaxerrs', '20']
+CLASSPATH_FILE = os.path.join('build', 'test-classpath.txt')
+MAIN_SOURCES = os.path.join('src', 'main', 'java')
+# sourcepath 의 파일은 절대 경로로 표시됨
+ERROR_LINE = re.compile(r'^(?:.*[\\/])?([\w$]+\.java):\d+: error: (.*)$')
+PACKAGE = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+MISSING_PACKAGE = re.compile(r'package ([\w.]+) does not exist')
+
+
+@dataclass
+class CompileResult:
+    ok: bool
+    errors: List[str] = field(default_factory=list)  # 오류 메시지 (소스 줄, 위치 표시 포함)
+    output: str = ''
+    seconds: float = 0.0
+    skipped: bool = False  # javac / classpath 가 없어 검사하지 않음
+
+    def summary(self, max_errors: int = 10) -> str:
+        return '\n'.join(self.errors[:max_errors]) or self.output[-2000:]
+
+
+def source_roots(root) -> List[str]:
+    """
+    root 아래 Java 파일의 package 선언으로 구한 소스 루트 목록 (-sourcepath 용)
+    """
+    roots = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in ('build', '.gradle', '.git'))
+        sources = sorted(filename for filename in filenames if filename.endswith('.java'))
+        if not sources:
+            continue
+        with open(os.path.join(directory, sources[0]), 'r', encoding='utf-8', errors='replace') as file:
+            match = PACKAGE.search(file.read(8192))
+        source_root = directory
+        for _ in range(match.group(1).count('.') + 1 if match else 0):
+            source_root = os.path.dirname(source_root)
+        if source_root not in roots:
+            roots.append(source_root)
+    return roots
+
+
+def _package(code) -> str:
+    match = PACKAGE.search(code or '')
+    return match.group(1) if match else ''
+
+
+def _is_project_error(error, test_file, project_packages) -> bool:
+    """
+    테스트 자체가 아니라 프로젝트 쪽 문제로 생긴 오류인지
+    (테스트가 아닌 파일의 오류, 또는 테스트에서 찾지 못한 패키지가 프로젝트 패키지인 경우)
+    """
+    match = ERROR_LINE.match(error.splitlines()[0])
+    if match.group(1) != test_file:
+        return True
+    missing = MISSING_PACKAGE.search(match.group(2))
+    return bool(missing) and any(
+        missing.group(1) == package or missing.group(1).startswith(package + '.') for package in project_packages
+    )
+
+
+def parse_errors(output) -> List[str]:
+    """
+    javac 출력을 오류 단위로 나눕니다. ("X.java:12: error: ..." 부터 다음 오류 전까지)
+    """
+    errors = []
+    for line in output.splitlines():
+        if ERROR_LINE.match(line):
+            errors.append(line)
+        elif errors and line.strip() and not re.match(r'^\d+ errors?$', line.strip()):
+            errors[-1] += '\n' + line
+    return errors
+
+
+class CompileChecker():
+    """
+    생성된 테스트를 javac 로 컴파일만 해 보는 검사기
+
+        result = get_compiler().check(test_code, src_code)
+        if not result.ok:
+            result.summary()  # 다시 생성할 때 프롬프트에 붙일 오류
+    """
+
+    def __init__(self, project: Optional[str] = None, classpath: Optional[str] = None,
+                 javac: str = JAVAC, timeout: float = 60, sourcepath: Optional[List[str]] = None):
+        """
+        Args:
+            project (Optional[str]): main 클래스와 테스트 의존성을 가진 gradle 프로젝트 (기본: coverity_test)
+            classpath (Optional[str]): 테스트 컴파일 classpath, None 이면 TESTGEN_CLASSPATH 또는 gradle 로 조회
+            javac (str): javac 명령
+            timeout (float): 컴파일 하나의 제한 시간(초)
+            sourcepath (Optional[List[str]]): 프로젝트 소스 루트 (기본: project 의 src/main/java)
+        """
+        from .coverity_chekcr import project_path
+
+        self.project = project or project_path
+        self.sourcepath = sourcepath if sourcepath is not None else [os.path.join(self.project, MAIN_SOURCES)]
+        self.javac = javac
+        self.timeout = timeout
+        self.stats = {'checks': 0, 'rejected': 0, 'skipped': 0, 'seconds': 0.0}
+        self._classpath = classpath or os.environ.get('TESTGEN_CLASSPATH')
+        self._available = True
+        self._lock = threading.Lock()
+
+    def classpath(self) -> Optional[str]:
+        """
+        테스트 컴파일 classpath (main 클래스 디렉토리 + JUnit 등). 구할 수 없으면 None
+        """
+        with self._lock:
+            if self._classpath is None:
+                self._classpath = self._load_classpath() or ''
+            return self._classpath or None
+
+    def _load_classpath(self) -> Optional[str]:
+        path = os.path.join(self.project, CLASSPATH_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                return file.read().strip()
+        from .coverity_chekcr import CMD
+
+        try:
+            result = subprocess.run(
+                [CMD.GRADLE, *CMD.OPTIONS, '-q', 'printTestClasspath'],
+                cwd=self.project, capture_output=True, text=True, timeout=300,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f'test classpath lookup failed: {type(e).__name__}: {e}')
+            return None
+        lines = [line for line in result.stdout.splitlines() if line.strip()]
+        if result.returncode != 0 or not lines:
+            print(f'test classpath lookup failed: {result.stderr[-500:]}')
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(lines[-1])
+        return lines[-1]
+
+    def _skip(self, output) -> CompileResult:
+        with self._lock:
+            self.stats['skipped'] += 1
+        return CompileResult(ok=True, output=output, skipped=True)
+
+    def check(self, test_code, src_code=None, sourcepath: Optional[List[str]] = None) -> CompileResult:
+        """
+        test_code 를 (src_code 가 있으면 함께) 컴파일합니다. main 클래스의 같은 이름 클래스보다 src_code 가 우선
+
+        Args:
+            sourcepath (Optional[List[str]]): self.sourcepath 에 더할 소스 루트 (일괄 생성 중인 프로젝트 등)
+        """
+        try:
+            names = [class_name(test_code)]
+            if src_code:
+                names.append(class_name(src_code))
+        except ValueError:
+            return CompileResult(ok=False, errors=['no test class in model response'])
+        if not self._available:
+            return self._skip('javac not found')
+        classpath = self.classpath()
+        if classpath is None:
+            return self._skip('test classpath not available')
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix='testgen_compile_') as directory:
+            os.makedirs(os.path.join(directory, 'classes'))
+            files = []
+            for name, code in zip(names, (test_code, src_code)):
+                files.append(f'{name}.java')
+                with open(os.path.join(directory, files[-1]), 'w', encoding='utf-8') as file:
+                    file.write(code)
+            roots = [root for root in dict.fromkeys([*(sourcepath or []), *self.sourcepath]) if os.path.isdir(root)]
+            options = ['-sourcepath', os.pathsep.join(roots)] if roots else []
+            try:
+                process = subprocess.run(
+                    [self.javac, *JAVAC_OPTIONS, *options, '-d', 'classes', '-cp', classpath, *files],
+                    cwd=directory, capture_output=True, text=True, timeout=self.timeout,
+                )
+            except FileNotFoundError:
+                self._available = False
+                return self._skip('javac not found')
+            except subprocess.TimeoutExpired:
+                return self._skip(f'javac timed out after {self.timeout}s')
+        output = process.stdout + process.stderr
+        errors = parse_errors(output)
+        project_packages = {package for package in (_package(test_code), _package(src_code)) if package}
+        test_errors = [error for error in errors if not _is_project_error(error, files[0], project_packages)]
+        if process.returncode != 0 and errors and not test_errors:
+            # 테스트가 아니라 프로젝트 클래스를 찾지 못한 경우: 테스트를 버리지 않고 gradle 빌드에 맡김
+            return self._skip(output)
+        result = CompileResult(
+            ok=process.returncode == 0, errors=test_errors or errors, output=output,
+            seconds=time.perf_counter() - start,
+        )
+        with self._lock:
+            self.stats['checks'] += 1
+            self.stats['rejected'] += not result.ok
+            self.stats['seconds'] += result.seconds
+        return result
+
+
+_compiler: Optional[CompileChecker] = None
+_compiler_lock = threading.Lock()
+
+
+def get_compiler() -> CompileChecker:
+    """
+    프로세스 전역 CompileChecker
+    """
+    global _compiler
+    with _compiler_lock:
+        if _compiler is None:
+            _compiler = CompileChecker()
+        return _compiler
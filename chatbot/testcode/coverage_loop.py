@@ -0,0 +1,390 @@
+"""
+커버리지 기반 반복 테스트 생성
+
+테스트 생성 → 빌드/테스트 → JaCoCo 커버리지 확인 후, 덜 커버된 메서드만 다시 프롬프트해서
+새 테스트 메서드를 기존 테스트 클래스에 합칩니다. 목표 커버리지 또는 토큰/시간 예산에 도달하면 멈춥니다.
+
+    python -m chatbot.testcode.coverage_loop ./data/Calculator.java --model gpt --target 0.9
+"""
+import argparse
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+from ..source_index import DECLARATION, _class_body, _members, _method_name, _signature, class_name
+from ..tokens import count_tokens
+from .coverity_chekcr import TestResult, get_checker
+from .model.model_response import build_messages
+from .testcode_generator import generate_unit_test, read_code
+from .xml2markdown import ClassCoverage, CoverageReport
+
+TEST_ANNOTATIONS = ('@Test', '@ParameterizedTest', '@RepeatedTest', '@TestFactory')
+FIELD_MODIFIERS = ('public', 'protected', 'private', 'static', 'final', 'transient', 'volatile')
+
+UNCOVERED_INSTRUCTIONS = """
+        4. The test class below already exists and covers the other methods.
+           Write ONLY new test methods for the listed uncovered methods, inside a class with the same name.
+           Reuse the existing fields and setup, and do not repeat existing test methods.
+        """
+
+
+# --- 테스트 코드 조작 ---
+
+def _is_test(member) -> bool:
+    return any(annotation in _signature(member) for annotation in TEST_ANNOTATIONS)
+
+
+def _imports(code) -> List[str]:
+    return re.findall(r'^\s*(import\s+[\w.*\s]+;)', code, re.MULTILINE)
+
+
+def method_context(src_code, method_names) -> str:
+    """
+    덜 커버된 메서드의 소스와, 그 메서드를 이해하는 데 필요한 클래스 선언/필드/생성자만 추린 코드
+    """
+    span = _class_body(src_code)
+    if span is None:
+        return src_code
+    start, end = span
+    name = class_name(src_code)
+    selected = [
+        member for member in _members(src_code[start:end])
+        if _method_name(member) is None
+        or _method_name(member) == name
+        or _method_name(member) in method_names
+    ]
+    return src_code[:start] + '\n' + '\n\n'.join(selected) + '\n}\n'
+
+
+def test_fixture(test_code) -> str:
+    """
+    기존 테스트 클래스에서 테스트 메서드를 뺀 골격(import, 필드, setup)
+    """
+    span = _class_body(test_code)
+    if span is None:
+        return test_code
+    start, end = span
+    fixture = [member for member in _members(test_code[start:end]) if not _is_test(member)]
+    return test_code[:start] + '\n' + '\n\n'.join(fixture) + '\n}\n'
+
+
+def _member_key(member) -> Optional[str]:
+    """
+    멤버 이름: 메서드/생성자 이름, 중첩 타입 이름 또는 필드 이름
+    """
+    name = _method_name(member)
+    if name is not None:
+        return name
+    declaration = DECLARATION.search(_signature(member))
+    if declaration is not None:
+        return declaration.group(1)
+    names = re.findall(r'[A-Za-z_$][A-Za-z0-9_$]*', re.split(r'[=;]', member, 1)[0])
+    return names[-1] if names else None
+
+
+def _field_type(member) -> str:
+    """
+    필드 선언에서 이름 앞의 타입 (수식어/어노테이션 제외)
+    """
+    words = re.split(r'[=;]', member, 1)[0].split()
+    return ' '.join(word for word in words[:-1] if word not in FIELD_MODIFIERS and not word.startswith('@'))
+
+
+def _same_member(existing, new) -> bool:
+    if _method_name(new) is None and DECLARATION.search(_signature(new)) is None:
+        # 같은 이름/타입의 필드는 기존 필드를 그대로 사용
+        return _field_type(existing) == _field_type(new)
+    return ' '.join(existing.split()) == ' '.join(new.split())
+
+
+def merge_tests(existing, new) -> Tuple[str, int]:
+    """
+    new 테스트 클래스의 테스트 메서드와 import 를 existing 테스트 클래스에 합칩니다.
+    테스트가 쓰는 필드, setup, helper 메서드 중 existing 에 없는 것도 함께 추가하고,
+    이름이 같은데 내용이 다르면 이름을 바꾸고 new 멤버 안의 참조도 같이 바꿉니다.
+
+    Returns:
+        (합친 테스트 코드, 추가된 테스트 메서드 수)
+    """
+    existing_span, new_span = _class_body(existing), _class_body(new)
+    if existing_span is None:
+        return new, 0
+    if new_span is None:
+        return existing, 0
+
+    start, end = existing_span
+    declared = {}
+    for member in _members(existing[start:end]):
+        declared.setdefault(_member_key(member), member)
+    names = set(declared)
+
+    selected, renames = [], {}
+    for member in _members(new[new_span[0]:new_span[1]]):
+        name = _member_key(member)
+        if name is None:
+            continue
+        if not _is_test(member) and name in declared and _same_member(declared[name], member):
+            continue
+        unique, suffix = name, 2
+        while unique in names:
+            unique, suffix = f'{name}_{suffix}', suffix + 1
+        if unique != name:
+            renames[name] = (unique, _method_name(member) is not None)
+        names.add(unique)
+        selected.append(member)
+
+    if not any(_is_test(member) for member in selected):
+        return existing, 0
+    added = []
+    for member in selected:
+        for name, (unique, is_method) in renames.items():
+            if is_method:
+                member = re.sub(rf'(?<![\w$]){re.escape(name)}(\s*\()', rf'{unique}\1', member)
+            else:
+                # 다른 객체의 같은 이름 멤버(other.calc)는 그대로 두고 this.calc 는 바꿈
+                member = re.sub(rf'(?:(?<=this\.)|(?<![\w$.])){re.escape(name)}(?![\w$])', unique, member)
+        added.append(member)
+    # 필드, setup, helper 를 테스트 메서드보다 앞에 둠
+    added.sort(key=_is_test)
+    tests = sum(1 for member in added if _is_test(member))
+
+    merged = existing[:end].rstrip() + '\n\n' + '\n\n'.join(f'    {member}' for member in added) + '\n' + existing[end:]
+
+    missing = [line for line in _imports(new) if line not in _imports(existing)]
+    if missing:
+        anchor = re.search(r'^\s*import\s', merged, re.MULTILINE) or re.search(r'^\s*(public\s+)?class\s', merged, re.MULTILINE)
+        position = anchor.start() if anchor else 0
+        merged = merged[:position] + '\n'.join(missing) + '\n' + merged[position:]
+    return merged, tests
+
+
+# --- 커버리지 ---
+
+def find_class(report: CoverageReport, class_name) -> Optional[ClassCoverage]:
+    for cls in report.classes:
+        if cls.name.rsplit('/', 1)[-1] == class_name:
+            return cls
+    return None
+
+
+def uncovered_methods(cls: ClassCoverage) -> List[str]:
+    """
+    커버되지 않은 라인이 남은 메서드 이름 (생성자/static 초기화 블록 제외)
+    """
+    names = []
+    for method in cls.methods:
+        counter = method.counter('LINE') if 'LINE' in method.counters else method.counter('INSTRUCTION')
+        if counter.missed and not method.name.startswith('<') and method.name not in names:
+            names.append(method.name)
+    return names
+
+
+def line_coverage(cls: Optional[ClassCoverage]) -> float:
+    if cls is None:
+        return 0.0
+    return cls.counter('LINE').ratio if 'LINE' in cls.counters else cls.counter('INSTRUCTION').ratio
+
+
+@dataclass
+class RoundStats:
+    round: int
+    prompt_tokens: int
+    completion_tokens: int
+    generation_seconds: float
+    test_seconds: float
+    coverage: float
+    targeted_methods: List[str] = field(default_factory=list)
+    added_tests: int = 0
+    success: bool = False
+    cached: bool = True  # 같은 프롬프트를 다시 보내는 라운드는 캐시를 건너뜀
+
+
+@dataclass
+class LoopResult:
+    test_code: str
+    coverage: float
+    stop_reason: str
+    rounds: List[RoundStats] = field(default_factory=list)
+    tokens: int = 0
+    seconds: float = 0.0
+    # 매 라운드 테스트 클래스 전체를 다시 생성했다고 가정한 추정치 (측정값이 아님)
+    # 토큰은 원본 전체 프롬프트 + 합친 테스트 클래스, 시간은 첫 라운드 생성 시간 + 테스트 시간으로 계산
+    estimated_full_regeneration_tokens: int = 0
+    estimated_full_regeneration_seconds: float = 0.0
+
+    @property
+    def estimated_saved_tokens(self) -> int:
+        return self.estimated_full_regeneration_tokens - self.tokens
+
+    @property
+    def estimated_saved_seconds(self) -> float:
+        return self.estimated_full_regeneration_seconds - self.seconds
+
+    def to_dict(self):
+        return {
+            **asdict(self),
+            'estimated_saved_tokens': self.estimated_saved_tokens,
+            'estimated_saved_seconds': self.estimated_saved_seconds,
+        }
+
+
+class CoverageGuidedGenerator():
+    """
+    커버리지가 목표에 도달할 때까지 덜 커버된 메서드에 대해서만 테스트를 추가 생성
+
+        generator = CoverageGuidedGenerator(model='gpt', target=0.9, token_budget=20000)
+        result = generator.run(src_code)
+        result.test_code, result.coverage, result.estimated_saved_tokens
+    """
+
+    def __init__(self, model='codellama', test_type='junit5 test', target: float = 0.9,
+                 max_rounds: int = 4, token_budget: Optional[int] = None,
+                 time_budget: Optional[float] = None, checker=None, test_timeout: float = 900):
+        """
+        Args:
+            model (str): get_model_response 의 모델 ('gpt' | 'llama' | 'codellama')
+            test_type (str): 생성할 테스트 종류
+            target (float): 목표 라인 커버리지 (0~1)
+            max_rounds (int): 최대 생성 횟수 (첫 생성 포함)
+            token_budget (Optional[int]): 프롬프트 + 응답 토큰 합계 상한
+            time_budget (Optional[float]): 전체 소요 시간 상한(초)
+            checker (Optional[CoverityChecker]): 빌드/테스트를 실행할 체커 (기본: get_checker())
+            test_timeout (float): 테스트 잡 하나를 기다릴 최대 시간(초)
+        """
+        self.model = model
+        self.test_type = test_type
+        self.target = target
+        self.max_rounds = max_rounds
+        self.token_budget = token_budget
+        self.time_budget = time_budget
+        self.checker = checker or get_checker()
+        self.test_timeout = test_timeout
+
+    def _prompt_tokens(self, code, instructions=None):
+        return sum(count_tokens(message['content']) for message in build_messages(code, self.test_type, instructions))
+
+    def _generate(self, code, instructions=None, use_cache=True):
+        start = time.perf_counter()
+        test_code = generate_unit_test(code, self.test_type, self.model, instructions, use_cache) or ''
+        return test_code, self._prompt_tokens(code, instructions), count_tokens(test_code), time.perf_counter() - start
+
+    def _run_tests(self, src_code, test_code) -> Tuple[TestResult, float]:
+        start = time.perf_counter()
+        result = self.checker.submit(src_code, test_code).future.result(timeout=self.test_timeout)
+        return result, time.perf_counter() - start
+
+    def _over_budget(self, tokens, started, next_tokens=0):
+        if self.token_budget is not None and tokens + next_tokens > self.token_budget:
+            return 'token_budget'
+        if self.time_budget is not None and time.perf_counter() - started > self.time_budget:
+            return 'time_budget'
+        return None
+
+    def run(self, src_code) -> LoopResult:
+        started = time.perf_counter()
+        target_class = class_name(src_code)
+        full_prompt_tokens = self._prompt_tokens(src_code)
+        result = LoopResult(test_code='', coverage=0.0, stop_reason='max_rounds')
+        uncovered: List[str] = []
+        last_error = ''
+        first_generation_seconds = 0.0
+        sent = set()
+        stalled = False
+
+        for round_number in range(1, self.max_rounds + 1):
+            if uncovered and result.test_code:
+                # 덜 커버된 메서드 + 기존 테스트 골격만 보냄
+                code = method_context(src_code, uncovered)
+                instructions = UNCOVERED_INSTRUCTIONS + '\n' + test_fixture(result.test_code)
+                instructions += '\n        Uncovered methods: ' + ', '.join(uncovered) + '\n'
+            else:
+                code, instructions = src_code, None
+            if last_error:
+                instructions = (instructions or '') + '\n        The previous attempt failed:\n' + last_error[-1500:] + '\n'
+
+            reason = self._over_budget(result.tokens, started, self._prompt_tokens(code, instructions))
+            if reason:
+                result.stop_reason = reason
+                break
+
+            # 이전 라운드와 같은 프롬프트면 캐시된 같은 응답이 돌아오므로 캐시를 건너뜀
+            use_cache = (code, instructions) not in sent
+            sent.add((code, instructions))
+            generated, prompt_tokens, completion_tokens, generation_seconds = self._generate(code, instructions, use_cache)
+            first_generation_seconds = first_generation_seconds or generation_seconds
+            result.tokens += prompt_tokens + completion_tokens
+
+            stats = RoundStats(
+                round=round_number, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                generation_seconds=generation_seconds, test_seconds=0.0, coverage=result.coverage,
+                targeted_methods=list(uncovered), cached=use_cache,
+            )
+            candidate, stats.added_tests = merge_tests(result.test_code, generated) if result.test_code else (generated, 0)
+            result.rounds.append(stats)
+            if result.test_code and not stats.added_tests:
+                # 추가된 테스트가 없으면 빌드/테스트할 필요 없이 진전 없음
+                test_result = None
+            else:
+                test_result, stats.test_seconds = self._run_tests(src_code, candidate)
+                stats.success = test_result.success
+
+            # 진전 없는 라운드: 새 테스트가 없거나 이전과 같은 오류로 실패
+            progress = test_result is not None and (test_result.success or test_result.output != last_error)
+
+            if stats.success:
+                # 성공한 경우에만 합친 코드를 채택 (실패하면 이전 테스트 코드 유지)
+                last_error = ''
+                result.test_code = candidate
+                cls = find_class(test_result.report, target_class) if test_result.report else None
+                result.coverage = stats.coverage = line_coverage(cls)
+                uncovered = uncovered_methods(cls) if cls else []
+            elif test_result is not None:
+                last_error = test_result.output
+
+            # 전체 재생성 추정: 매 라운드 원본 전체 프롬프트 + 지금까지의 테스트 클래스 전체를 생성
+            result.estimated_full_regeneration_tokens += full_prompt_tokens + count_tokens(candidate)
+            result.estimated_full_regeneration_seconds += first_generation_seconds + stats.test_seconds
+
+            if stats.success and (result.coverage >= self.target or not uncovered):
+                result.stop_reason = 'target'
+                break
+            if not progress and stalled:
+                # 캐시를 건너뛰고 다시 보내도 진전이 없으면 멈춤
+                result.stop_reason = 'no_progress'
+                break
+            stalled = not progress
+            reason = self._over_budget(result.tokens, started)
+            if reason:
+                result.stop_reason = reason
+                break
+
+        result.seconds = time.perf_counter() - started
+        return result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('code_path')
+    arg_parser.add_argument('--model', default='codellama')
+    arg_parser.add_argument('--test-type', default='junit5 test')
+    arg_parser.add_argument('--target', type=float, default=0.9)
+    arg_parser.add_argument('--max-rounds', type=int, default=4)
+    arg_parser.add_argument('--token-budget', type=int, default=None)
+    arg_parser.add_argument('--time-budget', type=float, default=None)
+    args = arg_parser.parse_args()
+
+    generator = CoverageGuidedGenerator(
+        model=args.model, test_type=args.test_type, target=args.target, max_rounds=args.max_rounds,
+        token_budget=args.token_budget, time_budget=args.time_budget,
+    )
+    result = generator.run(read_code(args.code_path))
+    summary = result.to_dict()
+    summary.pop('test_code')
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    print(result.test_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,257 @@
-import threading
+import itertools
+import os
+import queue
+import shutil
 import subprocess
-from xml2markdown import parser
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..source_index import class_name
+from .xml2markdown import CoverageReport, parse_report, to_markdown
 
-project_path = '/home/nahyeon/prototype/project/coverity_test'
-coverity_path = '/home/nahyeon/prototype/project/coverity_test/build/reports/jacoco/test/jacocoTestReport.xml'
+project_path = os.environ.get(
+    'COVERITY_PROJECT_PATH',
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'coverity_test')),
+)
+coverity_path = os.path.join('build', 'reports', 'jacoco', 'test', 'jacocoTestReport.xml')
+
+SRC_DIR = os.path.join('src', 'main', 'java', 'com', 'example')
+TEST_DIR = os.path.join('src', 'test', 'java', 'com', 'example')
 
 class CMD():
-    CD_PROJECT = f'cd {project_path}'
-    BUILD = 'gradle clean build'
-    TEST = 'gradle test'
-
-class CoverityChecker(threading.Thread):
-    def __init__(self):
-        pass
-    
+    # clean 없이 증분 빌드 + 데몬/빌드 캐시 재사용 (잡마다 JVM 을 새로 띄우지 않음)
+    GRADLE = os.environ.get('GRADLE_CMD', 'gradle')
+    OPTIONS = ['--daemon', '--build-cache', '--console=plain']
+    BUILD = [GRADLE, *OPTIONS, 'classes', 'testClasses']
+    TEST = [GRADLE, *OPTIONS, 'test', 'jacocoTestReport']
+
+
+@dataclass
+class TestJob:
+    src_code: str
+    test_code: str
+    job_id: int = 0
+    compiled: bool = False  # 이미 compile_check 를 통과함 (워커에서 다시 검사하지 않음)
+    submitted_at: float = field(default_factory=time.time)
+    future: Future = field(default_factory=Future, repr=False)
+
+
+@dataclass
+class TestResult:
+    job_id: int
+    success: bool
+    stage: str  # 'compile' | 'build' | 'test' | 'done'
+    output: str = ''
+    coverage: Optional[str] = None  # JaCoCo 리포트의 Markdown
+    report: Optional[CoverageReport] = None
+    report_path: Optional[str] = None
+    duration: float = 0.0
+    worker: Optional[str] = None
+
+
+class CoverityWorker(threading.Thread):
+    """
+    작업 큐에서 테스트 잡을 꺼내 자신의 작업 디렉토리에서 빌드/테스트를 실행하는 워커
+
+    워커마다 coverity_test 를 복사한 작업 디렉토리를 하나씩 가지며 잡 사이에 재사용합니다.
+    (build 디렉토리가 남아 있으므로 Gradle 이 바뀐 파일만 다시 컴파일)
+    작업 디렉토리는 프로세스마다 새로 만들므로 다른 프로세스의 워커와 겹치거나 이전 실행의 복사본이 남지 않습니다.
+    """
+
+    def __init__(self, jobs: "queue.Queue", on_result: Callable[[TestResult], None], name: str, timeout: float):
+        super().__init__(name=name, daemon=True)
+        self.jobs = jobs
+        self.on_result = on_result
+        self.timeout = timeout
+        self.workspace = os.path.join(tempfile.mkdtemp(prefix=f'{name}-'), 'project')
+        self._prepare_workspace()
+
+    def _prepare_workspace(self):
+        shutil.copytree(
+            project_path, self.workspace,
+            ignore=shutil.ignore_patterns('build', '.gradle'),
+        )
+
+    def cleanup(self):
+        shutil.rmtree(os.path.dirname(self.workspace), ignore_errors=True)
+
+    def _write_sources(self, job: TestJob):
+        # 이전 잡의 소스가 섞이지 않도록 src 만 비우고 build 결과는 유지
+        for directory, code in ((SRC_DIR, job.src_code), (TEST_DIR, job.test_code)):
+            path = os.path.join(self.workspace, directory)
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, f'{class_name(code)}.java'), 'w') as file:
+                file.write(code)
+
+    def _run(self, command):
+        result = subprocess.run(
+            command, cwd=self.workspace, capture_output=True, text=True, timeout=self.timeout,
+        )
+        return result.returncode == 0, result.stdout + result.stderr
+
     def build(self):
-        pass
+        return self._run(CMD.BUILD)
+
     def test(self):
-        pass
-    def parse_build_result(self):
-        pass
+        return self._run(CMD.TEST)
+
+    def parse_build_result(self, output):
+        """
+        빌드/테스트 출력에서 컴파일 오류와 실패한 테스트만 추려냅니다.
+        """
+        lines = [
+            line for line in output.splitlines()
+            if 'error:' in line or 'FAILED' in line or line.startswith('* What went wrong')
+        ]
+        return '\n'.join(lines) or output[-2000:]
+
     def parse_coverity_result(self):
-        return parse()
+        report_path = os.path.join(self.workspace, coverity_path)
+        if not os.path.exists(report_path):
+            return None, None
+        return parse_report(report_path), report_path
+
+    def process(self, job: TestJob) -> TestResult:
+        start = time.perf_counter()
+        result = TestResult(job_id=job.job_id, success=False, stage='compile', worker=self.name)
+        try:
+            if not job.compiled:
+                # 컴파일되지 않는 테스트는 gradle 빌드 전에 javac 로 빠르게 거름
+                from .compile_check import get_compiler
+
+                compiled = get_compiler().check(job.test_code, job.src_code)
+                if not compiled.ok:
+                    result.output = compiled.summary()
+                    return result
+            result.stage = 'build'
+            self._write_sources(job)
+            # 테스트가 실패하면 리포트가 다시 생성되지 않으므로 이전 잡의 리포트를 지움
+            report_path = os.path.join(self.workspace, coverity_path)
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            ok, output = self.build()
+            if not ok:
+                result.output = self.parse_build_result(output)
+                return result
+            result.stage = 'test'
+            ok, output = self.test()
+            result.output = self.parse_build_result(output) if not ok else ''
+            result.report, result.report_path = self.parse_coverity_result()
+            if result.report is not None:
+                result.coverage = to_markdown(result.report)
+            result.success = ok
+            if ok:
+                result.stage = 'done'
+        except Exception as e:  # 타임아웃 / gradle 미설치 등
+            result.output = f'{type(e).__name__}: {e}'
+        finally:
+            result.duration = time.perf_counter() - start
+        return result
+
     def run(self):
-        pass
-    
\ No newline at end of file
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.cleanup()
+                self.jobs.task_done()
+                return
+            result = self.process(job)
+            job.future.set_result(result)
+            self.on_result(result)
+            self.jobs.task_done()
+
+
+class CoverityChecker():
+    """
+    생성된 테스트 코드를 백그라운드에서 빌드/테스트하고 커버리지를 수집하는 잡 러너
+
+        checker = get_checker()
+        job = checker.submit(src_code, test_code)
+        ...
+        checker.get_result(job.job_id)  # 완료 전이면 None
+
+    max_workers 개의 워커가 각자 격리된 작업 디렉토리에서 병렬로 실행합니다.
+    """
+
+    def __init__(self, max_workers: int = 2, on_result: Optional[Callable[[TestResult], None]] = None,
+                 timeout: float = 600, max_results: int = 256):
+        """
+        Args:
+            max_workers (int): 동시에 실행할 워커 수
+            on_result (Optional[Callable[[TestResult], None]]): 잡이 끝날 때마다 호출할 콜백
+            timeout (float): gradle 명령 하나의 제한 시간(초)
+            max_results (int): 보관할 완료 결과 수
+        """
+        self.max_workers = max_workers
+        self.on_result = on_result
+        self.timeout = timeout
+        self.max_results = max_results
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._workers: List[CoverityWorker] = []
+        self._results: Dict[int, TestResult] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = CoverityWorker(
+                    self._jobs, self._handle_result,
+                    name=f'coverity-worker-{len(self._workers)}', timeout=self.timeout,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _handle_result(self, result: TestResult):
+        with self._lock:
+            self._results[result.job_id] = result
+            while len(self._results) > self.max_results:
+                self._results.pop(next(iter(self._results)))
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def submit(self, src_code: str, test_code: str, compiled: bool = False) -> TestJob:
+        """
+        테스트 잡을 큐에 넣고 바로 반환합니다. (결과는 job.future / get_result / on_result 로 전달)
+        compiled=True 면 워커의 컴파일 검사를 생략 (generate_compiled_test 에서 이미 검사한 경우)
+        """
+        self._start_workers()
+        job = TestJob(src_code=src_code, test_code=test_code, job_id=next(self._ids), compiled=compiled)
+        self._jobs.put(job)
+        return job
+
+    def get_result(self, job_id: int) -> Optional[TestResult]:
+        with self._lock:
+            return self._results.get(job_id)
+
+    def pending(self) -> int:
+        return self._jobs.qsize()
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._jobs.put(None)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+
+_checker: Optional[CoverityChecker] = None
+_checker_lock = threading.Lock()
+
+
+def get_checker() -> CoverityChecker:
+    """
+    프로세스 전역 CoverityChecker (워커 수: COVERITY_WORKERS, 기본 2)
+    """
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = CoverityChecker(max_workers=int(os.environ.get('COVERITY_WORKERS', '2')))
+        return _checker
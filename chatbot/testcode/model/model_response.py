@@ -1,8 +1,83 @@
+import hashlib
+import json
 import os
-from openai import OpenAI
-import ollama
+import tempfile
+import threading
+import time
 
-def get_model_response(model, code, test_type):
+from ... import llm_pool
+from ...response_cache import hash_code
+from ...scheduler import BATCH, get_scheduler
+from ...storage import SqliteLRUStore
+from .ollama_client import get_manager
+
+# build_messages 의 프롬프트를 바꾸면 올려서 이전 캐시 항목을 무효화
+PROMPT_VERSION = 1
+
+# 백엔드별 동시 요청 수 (로컬 ollama 는 동시에 여러 요청을 받아도 빨라지지 않음)
+CONCURRENCY = {
+    'gpt': int(os.environ.get('TESTGEN_CONCURRENCY_GPT', '8')),
+    'llama': int(os.environ.get('TESTGEN_CONCURRENCY_LLAMA', '1')),
+    'codellama': int(os.environ.get('TESTGEN_CONCURRENCY_CODELLAMA', '1')),
+}
+# 스케줄러 lane 이름 (채팅과 같은 모델을 쓰면 rate limit 과 우선순위를 함께 적용)
+MODEL_NAMES = {
+    'gpt': 'gpt-4o-mini',
+    'llama': 'llama3:8b',
+    'codellama': 'codellama:7b',
+}
+# 동시 요청 수를 스케줄러 lane 에서 제한하는 백엔드 (다른 경로와 공유하지 않는 로컬 모델)
+LOCAL_BACKENDS = ('llama', 'codellama')
+# 채팅과 lane 을 공유하는 백엔드는 lane 안의 이 그룹으로 테스트 생성 동시 요청 수만 제한
+TESTGEN_GROUP = 'testgen'
+_configured = set()  # 스케줄러에 동시 요청 수를 설정한 백엔드
+_limits_lock = threading.Lock()
+
+def configure_concurrency(**limits):
+    """
+    백엔드별 동시 요청 수 변경 (예: configure_concurrency(gpt=16, codellama=2))
+    """
+    with _limits_lock:
+        CONCURRENCY.update(limits)
+    for model in limits:
+        _configure(model)
+
+def _configure(model):
+    """
+    로컬 모델은 lane 전체, 채팅과 공유하는 lane 은 TESTGEN_GROUP 의 동시 요청 수를 설정
+    (어느 쪽이든 대기 순서는 스케줄러 우선순위를 따르므로 INTERACTIVE 생성이 BATCH 잡 뒤에 밀리지 않음)
+    """
+    lane = MODEL_NAMES.get(model, model)
+    if model in LOCAL_BACKENDS:
+        get_scheduler().configure(lane, max_concurrency=CONCURRENCY[model])
+    else:
+        get_scheduler().configure_group(lane, TESTGEN_GROUP, CONCURRENCY.get(model, 1))
+    with _limits_lock:
+        _configured.add(model)
+
+# 응답 캐시 (TESTGEN_CACHE=0 이면 사용 안 함)
+CACHE_PATH = os.environ.get('TESTGEN_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'testgen_cache.sqlite'))
+CACHE_MAX_ENTRIES = int(os.environ.get('TESTGEN_CACHE_MAX_ENTRIES', '2000'))
+CACHE_TTL = float(os.environ.get('TESTGEN_CACHE_TTL', str(60 * 60 * 24 * 7)))
+_cache = None
+_cache_lock = threading.Lock()
+cache_stats = {'hits': 0, 'misses': 0, 'saved_seconds': 0.0}
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SqliteLRUStore(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+        return _cache
+
+def cache_key(model, code, test_type, instructions=None):
+    """
+    (모델, 프롬프트 버전, test_type, 추가 지시, 코드 해시) 의 해시
+    """
+    key = json.dumps([model, PROMPT_VERSION, test_type, instructions or '', hash_code(code)])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def build_messages(code, test_type, instructions=None):
     prompt = f"""
         generate a {test_type} case for the following Java code. 
         Include all necessary imports and test multiple scenarios
@@ -12,38 +87,78 @@ def get_model_response(model, code, test_type):
         2. Test code should pass the {test_type}
         3. Test code should include the edge cases
         """
-    messages = [{ 'role' : 'system', 'content' : prompt},
+    if instructions:
+        prompt += instructions
+    return [{ 'role' : 'system', 'content' : prompt},
                   {'role':'user', 'content': code}]
-    if model == 'gpt':
-        return gpt_response(messages)
-    elif model == 'llama':
-        return llama_response(messages)
-    elif model == 'codellama':
-        return codellama_response(messages)
-    else:
+
+def get_model_response(model, code, test_type, instructions=None, use_cache=True, priority=BATCH):
+    """
+    모델 응답. 같은 (모델, 프롬프트 버전, test_type, 코드) 는 sqlite 캐시에서 반환 (use_cache=False 로 우회)
+    priority 는 스케줄러 우선순위 (채팅에서 요청한 생성은 INTERACTIVE)
+    """
+    if model not in BACKENDS:
         print('not supported model')
+        return None
+    use_cache = use_cache and os.environ.get('TESTGEN_CACHE', '1') != '0'
+    if not use_cache:
+        return _call_model(model, build_messages(code, test_type, instructions), priority)
+
+    key = cache_key(model, code, test_type, instructions)
+    entry = get_cache().get(key)
+    with _cache_lock:
+        if entry is not None:
+            cache_stats['hits'] += 1
+            cache_stats['saved_seconds'] += entry['latency']
+            return entry['response']
+        cache_stats['misses'] += 1
+
+    start = time.perf_counter()
+    response = _call_model(model, build_messages(code, test_type, instructions), priority)
+    if response:
+        get_cache().set(key, {'response': response, 'latency': time.perf_counter() - start})
+    return response
+
+def evict_model_response(model, code, test_type, instructions=None):
+    """
+    캐시된 응답 삭제 (컴파일되지 않는 테스트처럼 다시 반환하면 안 되는 응답)
+    """
+    if os.environ.get('TESTGEN_CACHE', '1') != '0':
+        get_cache().delete(cache_key(model, code, test_type, instructions))
+
+def _call_model(model, messages, priority=BATCH):
+    """
+    스케줄러를 거쳐 백엔드 호출 (rate limit, 429 / 5xx 재시도, 같은 요청 합치기, 우선순위)
+    """
+    lane = MODEL_NAMES.get(model, model)
+    scheduler = get_scheduler()
+
+    def call():
+        return BACKENDS[model](messages)
+
+    if model not in _configured:
+        _configure(model)
+    group = None if model in LOCAL_BACKENDS else TESTGEN_GROUP
+    return scheduler.call(lane, call, payload=[model, messages], priority=priority, group=group)
 
 def gpt_response(messages):
-    api_key =os.environ.get('OPENAI_API_KEY')
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
+    response = llm_pool.get_openai_client().chat.completions.create(
         messages=messages,
-        model='gpt-4o-mini',
+        model=MODEL_NAMES['gpt'],
         stream=False
     )
     response = response.choices[0].message.content.strip()
     return response
 
 def llama_response(messages):
-    response = ollama.chat(
-        model='llama3:8b', 
-        messages=messages)
-    response  = response['message']['content']
-    return response
+    return get_manager().chat('llama3:8b', messages)
 
 def codellama_response(messages):
-    response = ollama.chat(
-        model='codellama:7b', 
-        messages=messages)
-    response  = response['message']['content']
-    return response
+    return get_manager().chat('codellama:7b', messages)
+
+# 모델 이름 -> messages 를 받아 응답 문자열을 반환하는 함수 (벤치마크용 가짜 백엔드 등을 등록할 수 있음)
+BACKENDS = {
+    'gpt': gpt_response,
+    'llama': llama_response,
+    'codellama': codellama_response,
+}
@@ -0,0 +1,142 @@
+"""
+재사용 가능한 Ollama 클라이언트
+
+모듈 함수 ollama.chat 대신 프로세스 전역 ollama.Client 하나를 재사용하고, 요청마다 keep_alive 를 넘겨
+요청 사이에 모델이 내려가지 않도록 합니다. 응답의 duration 값으로 모델 로드 시간과 생성 시간을 따로 기록합니다.
+
+    manager = get_manager()
+    manager.prewarm(background=True)          # 시작 시 모델을 미리 메모리에 올림
+    manager.chat('codellama:7b', messages)
+    manager.stats()
+"""
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
+# 마지막 요청 이후 모델을 메모리에 유지할 시간 (ollama 형식: '30m', '1h', 초 단위 숫자, -1 이면 계속 유지)
+KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+PREWARM_MODELS = [
+    model for model in os.environ.get('OLLAMA_PREWARM_MODELS', 'codellama:7b,llama3:8b').split(',') if model
+]
+
+
+@dataclass
+class CallTiming:
+    model: str
+    load_seconds: float  # 모델 로드 (이미 올라와 있으면 거의 0)
+    prompt_seconds: float  # 프롬프트 처리
+    generation_seconds: float  # 토큰 생성
+    total_seconds: float  # 서버 측 전체 시간
+    wall_seconds: float  # 클라이언트에서 잰 전체 시간
+    prewarm: bool = False
+
+
+def _seconds(response, key) -> float:
+    # ollama 응답의 duration 은 나노초 단위
+    return (response.get(key) or 0) / 1e9
+
+
+class OllamaManager():
+    def __init__(self, host: Optional[str] = None, keep_alive=None, timeout: Optional[float] = None,
+                 max_timings: int = 256):
+        """
+        Args:
+            host (Optional[str]): ollama 서버 주소 (기본: OLLAMA_HOST)
+            keep_alive: 요청 후 모델 유지 시간 (기본: OLLAMA_KEEP_ALIVE)
+            timeout (Optional[float]): 요청 제한 시간(초)
+            max_timings (int): 보관할 최근 요청 기록 수
+        """
+        self.host = host or OLLAMA_HOST
+        self.keep_alive = KEEP_ALIVE if keep_alive is None else keep_alive
+        self.timeout = timeout
+        self.timings: "deque[CallTiming]" = deque(maxlen=max_timings)
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import ollama
+
+                self._client = ollama.Client(host=self.host, timeout=self.timeout)
+            return self._client
+
+    def _record(self, model, response, start, prewarm=False) -> CallTiming:
+        timing = CallTiming(
+            model=model,
+            load_seconds=_seconds(response, 'load_duration'),
+            prompt_seconds=_seconds(response, 'prompt_eval_duration'),
+            generation_seconds=_seconds(response, 'eval_duration'),
+            total_seconds=_seconds(response, 'total_duration'),
+            wall_seconds=time.perf_counter() - start,
+            prewarm=prewarm,
+        )
+        self.timings.append(timing)
+        return timing
+
+    def chat(self, model: str, messages: List[Dict[str, str]]) -> str:
+        start = time.perf_counter()
+        response = self.client.chat(model=model, messages=messages, keep_alive=self.keep_alive)
+        self._record(model, response, start)
+        return response['message']['content']
+
+    def _prewarm(self, models: Sequence[str]) -> List[CallTiming]:
+        timings = []
+        for model in models:
+            start = time.perf_counter()
+            try:
+                # 빈 프롬프트 요청은 모델만 메모리에 올림
+                response = self.client.generate(model=model, prompt='', keep_alive=self.keep_alive)
+            except Exception as e:  # 서버가 없거나 모델이 없으면 첫 요청에서 로드
+                print(f'ollama prewarm failed ({model}): {type(e).__name__}: {e}')
+                continue
+            timings.append(self._record(model, response, start, prewarm=True))
+        return timings
+
+    def prewarm(self, models: Optional[Sequence[str]] = None, background: bool = False):
+        """
+        models 를 미리 로드합니다. background=True 면 데몬 스레드에서 실행하고 스레드를 반환
+        """
+        models = list(PREWARM_MODELS if models is None else models)
+        if not background:
+            return self._prewarm(models)
+        thread = threading.Thread(target=self._prewarm, args=(models,), name='ollama-prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        모델별 요청 수, 평균 로드/생성 시간 (prewarm 요청 제외)
+        """
+        stats: Dict[str, Dict[str, float]] = {}
+        for timing in list(self.timings):
+            if timing.prewarm:
+                continue
+            model = stats.setdefault(timing.model, {'requests': 0, 'load_seconds': 0.0, 'generation_seconds': 0.0})
+            model['requests'] += 1
+            model['load_seconds'] += timing.load_seconds
+            model['generation_seconds'] += timing.prompt_seconds + timing.generation_seconds
+        for model in stats.values():
+            model['mean_load_seconds'] = model['load_seconds'] / model['requests']
+            model['mean_generation_seconds'] = model['generation_seconds'] / model['requests']
+        return stats
+
+    def last_timing(self) -> Optional[dict]:
+        return asdict(self.timings[-1]) if self.timings else None
+
+
+_manager: Optional[OllamaManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> OllamaManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = OllamaManager()
+        return _manager
@@ -1,16 +1,58 @@
-from urllib import response
-import os, re
-import openai 
-from .model.model_response import get_model_response
+import argparse, os, re, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+from ..source_index import class_name
+from ..scheduler import BATCH
+from .compile_check import PACKAGE, CompileResult, get_compiler, source_roots
+from .model.model_response import CONCURRENCY, evict_model_response, get_model_response
 
 DEFAULT_TEST_PATH ='./coverity_test/src/test/java/com/example/'
+# 테스트 소스 루트 (일괄 생성한 테스트는 이 아래 package 선언의 디렉토리에 저장)
+DEFAULT_TEST_ROOT ='./coverity_test/src/test/java/'
 DEFAULT_SRC_PATH ='./coverity_test/src/main/java/com/example/'
+# ```java ... ``` (언어 표시는 대소문자/종류 무관)
+FENCE = re.compile(r'```[\w+-]*[ \t]*\n?(.*?)```', re.DOTALL)
+# 컴파일 오류가 있을 때 다시 생성하는 횟수 (첫 생성 제외)
+COMPILE_RETRIES = int(os.environ.get('TESTGEN_COMPILE_RETRIES', '2'))
 
-def generate_unit_test(code, test_type='junit5 test', model='codellama'):
-    response = get_model_response(model, code, test_type)
+COMPILE_ERROR_INSTRUCTIONS = """
+        The previous test code below did not compile. Return the whole test class again with these compiler errors fixed.
+        """
+
+def generate_unit_test(code, test_type='junit5 test', model='codellama', instructions=None, use_cache=True, priority=BATCH):
+    response = get_model_response(model, code, test_type, instructions, use_cache, priority)
     # print(response)
     return paring_code(response)
 
+def generate_compiled_test(code, test_type='junit5 test', model='codellama', instructions=None, use_cache=True,
+                           priority=BATCH, retries=COMPILE_RETRIES, compiler=None,
+                           sourcepath: Optional[List[str]] = None, src_code: Optional[str] = None) -> Tuple[str, CompileResult]:
+    """
+    generate_unit_test 후 javac 로 컴파일 검사. 컴파일 오류가 있으면 오류와 이전 코드를 붙여 retries 번까지 다시 생성
+    컴파일되지 않은 응답은 캐시에서 지우므로 다시 요청하면 같은 테스트 대신 새로 생성
+    sourcepath 는 대상 클래스가 참조하는 프로젝트 클래스를 찾을 소스 루트 (compile_check.source_roots)
+    src_code 는 함께 컴파일할 대상 클래스 전체 소스 (code 가 일부 메서드만 남긴 excerpt 인 경우, 기본: code)
+
+    Returns:
+        (마지막으로 생성한 테스트 코드, 그 컴파일 결과)
+    """
+    compiler = compiler or get_compiler()
+    prompt_instructions = instructions
+    for attempt in range(retries + 1):
+        test_code = generate_unit_test(code, test_type, model, prompt_instructions, use_cache, priority) or ''
+        result = compiler.check(test_code, src_code or code, sourcepath)
+        if result.ok:
+            break
+        if use_cache:
+            evict_model_response(model, code, test_type, prompt_instructions)
+        prompt_instructions = (
+            (instructions or '') + COMPILE_ERROR_INSTRUCTIONS
+            + '\n        Compiler errors:\n' + result.summary()[-1500:]
+            + '\n        Previous test code:\n' + test_code + '\n'
+        )
+    return test_code, result
+
 def read_code(file_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f'file not found:{file_path}')
@@ -18,43 +60,167 @@ def read_code(file_path):
     with open(file_path, 'r') as file:
         return file.read()
 
-def _get_class_name(code):
-    class_pattern = r'\bclass\s+([a-zA-Z_]\w*)'
-    class_name = re.findall(class_pattern, code)[0]
-    return class_name
-
 def _save_code(file_path, code):
     with open(file_path, 'w') as file:
         file.write(code)
     
 def save_src(code):
-    file_path = DEFAULT_SRC_PATH+_get_class_name(code)+'.java'
+    file_path = DEFAULT_SRC_PATH+class_name(code)+'.java'
     _save_code(file_path, code)
     print(f'Code saved to : {file_path}')
     
     
-def save_test(test_code):
-    file_path = DEFAULT_TEST_PATH+_get_class_name(test_code)+'.java'
+def save_test(test_code, test_dir=None):
+    test_dir = test_dir or DEFAULT_TEST_PATH
+    os.makedirs(test_dir, exist_ok=True)
+    file_path = os.path.join(test_dir, class_name(test_code)+'.java')
     _save_code(file_path, test_code)
     print(f'Test Code saved to : {file_path}')
+    return file_path
+
+def with_package(test_code, src_code):
+    """
+    package 선언이 없는 테스트에 대상 클래스의 package 선언을 붙임 (같은 package 에 있어야 package-private 멤버 접근 가능)
+    """
+    source_package = PACKAGE.search(src_code or '')
+    if not test_code or PACKAGE.search(test_code) or source_package is None:
+        return test_code
+    return f'package {source_package.group(1)};\n\n{test_code}'
+
+def package_test_dir(test_code, test_root=None):
+    """
+    test_root 아래 테스트 코드의 package 선언에 해당하는 디렉토리 (package 가 없으면 test_root)
+    """
+    match = PACKAGE.search(test_code or '')
+    return os.path.join(test_root or DEFAULT_TEST_ROOT, *(match.group(1).split('.') if match else ()))
 
 def paring_code(text):
-    patterns =[r'```JAVA(.*?)```', r'```java(.*?)```', r'```(.*?)```']
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            text = match.group(1).strip()
-    else : return text
-
-def main(model, test_type='Junit test'):
-    print('start generating coding...')
-    code_path = './data/Calculator.java'
-    output_path = f'./output/generated_code_of_{model}.java'
-    
-    code = read_cpp_code(code_path)
-    test_code = generate_unit_test(model, code, test_type)
-    # print(test_code)
-    save_test(output_path, test_code)
+    """
+    모델 응답에서 테스트 코드 추출
+
+    코드 블록이 여러 개면 테스트 블록(@Test 가 있거나 *Test 클래스를 선언한 블록),
+    없으면 class 선언이 있는 블록, 그것도 없으면 가장 긴 블록. 닫히지 않은(잘린) 블록도 허용.
+    코드 블록이 없으면 응답 전체
+    """
+    if not text:
+        return text
+    blocks = [match.group(1) for match in FENCE.finditer(text)]
+    if not blocks:
+        match = re.search(r'```[\w+-]*[ \t]*\n(.*)', text, re.DOTALL)
+        blocks = [match.group(1)] if match else []
+    # 대상 클래스 소스를 다시 보여주는 응답이 많으므로 테스트 블록을 우선
+    tests = [block for block in blocks if '@Test' in block or re.search(r'\bclass\s+\w*Test\b', block)]
+    classes = [block for block in blocks if re.search(r'\bclass\s+[a-zA-Z_]\w*', block)]
+    candidates = tests or classes or blocks
+    if candidates:
+        return max(candidates, key=len).strip()
+    return text.strip()
+
+def find_java_sources(root) -> List[str]:
+    """
+    root 아래의 테스트 대상 Java 파일 (test 디렉토리, *Test.java, class 가 없는 파일 제외)
+    """
+    sources = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in ('test', 'build', '.gradle', '.git'))
+        for filename in sorted(filenames):
+            if not filename.endswith('.java') or filename.endswith('Test.java'):
+                continue
+            path = os.path.join(directory, filename)
+            if re.search(r'\bclass\s+[a-zA-Z_]\w*', read_code(path)):
+                sources.append(path)
+    return sources
+
+
+@dataclass
+class BatchResult:
+    total: int = 0
+    saved: List[Tuple[str, str]] = field(default_factory=list)  # (소스 경로, 저장된 테스트 경로)
+    failed: List[Tuple[str, str]] = field(default_factory=list)  # (소스 경로, 오류)
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        분당 처리한 클래스 수
+        """
+        return (len(self.saved) + len(self.failed)) / self.seconds * 60 if self.seconds else 0.0
+
+
+def _generate_file(path, test_type, model, use_cache=True, sourcepath=None):
+    code = read_code(path)
+    test_code, compiled = generate_compiled_test(code, test_type, model, use_cache=use_cache, sourcepath=sourcepath)
+    if not test_code or not re.search(r'\bclass\s+[a-zA-Z_]\w*', test_code):
+        raise ValueError('no test class in model response')
+    if not compiled.ok:
+        # 컴파일되지 않는 테스트는 저장하지 않음 (test 디렉토리 전체의 gradle 빌드가 깨짐)
+        raise ValueError('test does not compile: ' + (compiled.errors[0].splitlines()[0] if compiled.errors else compiled.output[-200:]))
+    return with_package(test_code, code)
+
+
+def generate_batch(root, model='codellama', test_type='junit5 test', test_root=None,
+                   max_workers: Optional[int] = None, use_cache: bool = True,
+                   on_progress: Optional[Callable[[int, int, str, Optional[str]], None]] = None) -> BatchResult:
+    """
+    root 아래의 모든 클래스에 대해 테스트를 동시에 생성하고, 끝나는 대로 save_test 로 저장합니다.
+
+    동시 요청 수는 model_response 의 백엔드별 제한(CONCURRENCY)을 따르며,
+    테스트 파일은 테스트 소스 루트 test_root (기본: DEFAULT_TEST_ROOT) 아래 테스트의 package 디렉토리에 저장합니다.
+
+    Args:
+        on_progress: (완료 수, 전체 수, 소스 경로, 오류) 를 받는 콜백
+    """
+    test_root = test_root or DEFAULT_TEST_ROOT
+    sources = find_java_sources(root)
+    sourcepath = source_roots(root)  # 클래스 사이의 참조는 프로젝트 소스에서 찾아 컴파일 검사
+    result = BatchResult(total=len(sources))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or CONCURRENCY.get(model, 1)) as executor:
+        futures = {executor.submit(_generate_file, path, test_type, model, use_cache, sourcepath): path for path in sources}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            error = None
+            try:
+                test_code = future.result()
+                result.saved.append((path, save_test(test_code, package_test_dir(test_code, test_root))))
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+                result.failed.append((path, error))
+            result.seconds = time.perf_counter() - start
+            if on_progress is not None:
+                on_progress(done, result.total, path, error)
+    return result
+
+
+def _print_progress(done, total, path, error):
+    status = f'FAILED ({error})' if error else 'ok'
+    print(f'[{done}/{total}] {path}: {status}')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Java 코드의 단위 테스트 생성 (파일 또는 소스 디렉토리)')
+    arg_parser.add_argument('path', nargs='?', default='./data/Calculator.java')
+    arg_parser.add_argument('--model', default='codellama', choices=list(CONCURRENCY))
+    arg_parser.add_argument('--test-type', default='junit5 test')
+    arg_parser.add_argument('--test-root', default=DEFAULT_TEST_ROOT, help='테스트 소스 루트 (package 디렉토리는 자동)')
+    arg_parser.add_argument('--workers', type=int, default=None, help='기본: 모델별 동시 요청 제한')
+    arg_parser.add_argument('--no-cache', action='store_true', help='응답 캐시를 사용하지 않음')
+    args = arg_parser.parse_args()
+
+    if not os.path.isdir(args.path):
+        print('start generating coding...')
+        test_code = _generate_file(args.path, args.test_type, args.model, not args.no_cache)
+        save_test(test_code, package_test_dir(test_code, args.test_root))
+        return
+
+    result = generate_batch(
+        args.path, args.model, args.test_type, args.test_root, args.workers, not args.no_cache,
+        on_progress=_print_progress,
+    )
+    print(
+        f'{len(result.saved)}/{result.total} classes in {result.seconds:.1f}s '
+        f'({result.throughput:.1f} classes/min, {len(result.failed)} failed)'
+    )
 
 if __name__=='__main__':
-    main('codellama')
+    main()
@@ -1,50 +1,177 @@
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, TextIO
 
-def parser(xml_path):
-    # XML 파싱
-    root = ET.parse(xml_path)
-    root = ET.tostring(root)
+COUNTER_TYPES = ('INSTRUCTION', 'BRANCH', 'LINE', 'COMPLEXITY', 'METHOD', 'CLASS')
 
-    # Markdown 변환
+
+@dataclass
+class Counter:
+    missed: int = 0
+    covered: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.missed + self.covered
+
+    @property
+    def ratio(self) -> float:
+        return self.covered / self.total if self.total else 1.0
+
+
+@dataclass
+class MethodCoverage:
+    name: str
+    desc: str = ''
+    line: Optional[int] = None
+    counters: Dict[str, Counter] = field(default_factory=dict)
+
+    def counter(self, counter_type: str) -> Counter:
+        return self.counters.get(counter_type, Counter())
+
+
+@dataclass
+class ClassCoverage:
+    name: str
+    source_file: str = ''
+    methods: List[MethodCoverage] = field(default_factory=list)
+    counters: Dict[str, Counter] = field(default_factory=dict)
+
+    def counter(self, counter_type: str) -> Counter:
+        return self.counters.get(counter_type, Counter())
+
+
+@dataclass
+class CoverageReport:
+    name: str = ''
+    classes: List[ClassCoverage] = field(default_factory=list)
+    counters: Dict[str, Counter] = field(default_factory=dict)
+
+    def counter(self, counter_type: str) -> Counter:
+        return self.counters.get(counter_type, Counter())
+
+
+def parse_report(xml_path) -> CoverageReport:
+    """
+    JaCoCo XML 리포트 전체를 CoverageReport 로 파싱합니다.
+
+    결과 객체가 모든 class / method 를 담으므로 메모리는 클래스 수에 비례합니다.
+    리포트 전체가 필요 없으면 iter_classes / iter_markdown 으로 클래스 단위로 처리하세요.
+    """
+    report = CoverageReport()
+    report.classes.extend(iter_classes(xml_path, report))
+    return report
+
+
+def iter_classes(xml_path, report: Optional[CoverageReport] = None) -> Iterator[ClassCoverage]:
+    """
+    JaCoCo XML 리포트를 한 번의 스트리밍 패스로 읽으면서 class 가 끝날 때마다 반환합니다.
+
+    iterparse 로 읽으면서 counter 를 바로 소속 method / class 에 기록하고, 처리가 끝난 요소는
+    트리에서 떼어내므로 (반환된 class 를 보관하지 않으면) 리포트 크기와 관계없이 메모리 사용량이 일정합니다.
+    report 를 주면 리포트 이름과 전체 counter 를 기록합니다. (class 목록에는 추가하지 않음)
+    """
+    report = report if report is not None else CoverageReport()
+    elements = []  # 현재 열려 있는 요소 스택
+    current_class = None
+    current_method = None
+
+    for event, elem in ET.iterparse(xml_path, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            elements.append(elem)
+            if tag == 'report':
+                report.name = elem.get('name', '')
+            elif tag == 'class':
+                current_class = ClassCoverage(
+                    name=elem.get('name', ''), source_file=elem.get('sourcefilename', ''),
+                )
+            elif tag == 'method' and current_class is not None:
+                line = elem.get('line')
+                current_method = MethodCoverage(
+                    name=elem.get('name', ''), desc=elem.get('desc', ''),
+                    line=int(line) if line else None,
+                )
+            continue
+
+        elements.pop()
+        parent_tag = elements[-1].tag if elements else None
+        finished = None
+        if tag == 'counter':
+            counter = Counter(int(elem.get('missed', 0)), int(elem.get('covered', 0)))
+            counter_type = elem.get('type')
+            if parent_tag == 'method' and current_method is not None:
+                current_method.counters[counter_type] = counter
+            elif parent_tag == 'class' and current_class is not None:
+                current_class.counters[counter_type] = counter
+            elif parent_tag == 'report':
+                report.counters[counter_type] = counter
+            # package / sourcefile counter 는 class 합계와 중복이므로 사용하지 않음
+        elif tag == 'method' and current_class is not None:
+            current_class.methods.append(current_method)
+            current_method = None
+        elif tag == 'class':
+            finished, current_class = current_class, None
+
+        if elements:
+            # 처리한 요소는 부모에서 떼어내 메모리 해제 (트리를 유지하지 않음)
+            elem.clear()
+            elements[-1].remove(elem)
+        if finished is not None:
+            yield finished
+
+
+def _class_markdown(cls: ClassCoverage) -> str:
     markdown_output = []
+    markdown_output.append(f"## Class: {cls.name} (Source: {cls.source_file})\n")
+
+    # Method Information
+    markdown_output.append("| Method Name | Instructions Covered | Lines Covered | Complexity Covered | Branches Covered | Methods Covered |\n")
+    markdown_output.append("|-------------|----------------------|---------------|--------------------|------------------|-----------------|\n")
+
+    for method in cls.methods:
+        markdown_output.append(
+            f"| {method.name} | {method.counter('INSTRUCTION').covered} | {method.counter('LINE').covered} "
+            f"| {method.counter('COMPLEXITY').covered} | {method.counter('BRANCH').covered} "
+            f"| {method.counter('METHOD').covered} |\n"
+        )
+
+    # Class Summary
+    markdown_output.append(f"### Summary\n")
+    markdown_output.append(f"- Total Instructions Covered: {cls.counter('INSTRUCTION').covered}\n")
+    markdown_output.append(f"- Total Branches Covered: {cls.counter('BRANCH').covered}\n")
+    markdown_output.append(f"- Total Lines Covered: {cls.counter('LINE').covered}\n")
+    markdown_output.append(f"- Total Complexity Covered: {cls.counter('COMPLEXITY').covered}\n")
+    markdown_output.append(f"- Total Methods Covered: {cls.counter('METHOD').covered}\n")
+    return ''.join(markdown_output)
 
-    # Report Title
-    markdown_output.append(f"# {root.attrib['name']} Report\n")
-
-    # Class Information
-    for cls in root.findall('.//class'):
-        class_name = cls.attrib['name']
-        source_file = cls.attrib['sourcefilename']
-        markdown_output.append(f"## Class: {class_name} (Source: {source_file})\n")
-        
-        # Method Information
-        markdown_output.append("| Method Name | Instructions Covered | Lines Covered | Complexity Covered | Branches Covered | Methods Covered |\n")
-        markdown_output.append("|-------------|----------------------|---------------|--------------------|------------------|-----------------|\n")
-        
-        for method in cls.findall('method'):
-            method_name = method.attrib['name']
-            instruction_covered = method.find("counter[@type='INSTRUCTION']").attrib['covered']
-            line_covered = method.find("counter[@type='LINE']").attrib['covered']
-            complexity_covered = method.find("counter[@type='COMPLEXITY']").attrib['covered']
-            branch_covered = method.find("counter[@type='BRANCH']").attrib['covered'] if method.find("counter[@type='BRANCH']") is not None else '0'
-            method_covered = method.find("counter[@type='METHOD']").attrib['covered']
-            
-            markdown_output.append(f"| {method_name} | {instruction_covered} | {line_covered} | {complexity_covered} | {branch_covered} | {method_covered} |\n")
-        
-        # Class Summary
-        total_instruction_covered = cls.find("counter[@type='INSTRUCTION']").attrib['covered']
-        total_branch_covered = cls.find("counter[@type='BRANCH']").attrib['covered']
-        total_line_covered = cls.find("counter[@type='LINE']").attrib['covered']
-        total_complexity_covered = cls.find("counter[@type='COMPLEXITY']").attrib['covered']
-        total_method_covered = cls.find("counter[@type='METHOD']").attrib['covered']
-        
-        markdown_output.append(f"### Summary\n")
-        markdown_output.append(f"- Total Instructions Covered: {total_instruction_covered}\n")
-        markdown_output.append(f"- Total Branches Covered: {total_branch_covered}\n")
-        markdown_output.append(f"- Total Lines Covered: {total_line_covered}\n")
-        markdown_output.append(f"- Total Complexity Covered: {total_complexity_covered}\n")
-        markdown_output.append(f"- Total Methods Covered: {total_method_covered}\n")
-
-    # Markdown 출력
-    markdown_result = ''.join(markdown_output)
-    return markdown_result
\ No newline at end of file
+
+def to_markdown(report: CoverageReport) -> str:
+    # Markdown 변환
+    return f"# {report.name} Report\n" + ''.join(_class_markdown(cls) for cls in report.classes)
+
+
+def iter_markdown(xml_path) -> Iterator[str]:
+    """
+    to_markdown(parse_report(xml_path)) 를 class 단위 조각으로 반환 (전체 결과를 만들지 않음)
+    """
+    report = CoverageReport()
+    classes = iter_classes(xml_path, report)
+    first = next(classes, None)  # report 이름은 첫 요소에서 기록됨
+    yield f"# {report.name} Report\n"
+    if first is not None:
+        yield _class_markdown(first)
+    for cls in classes:
+        yield _class_markdown(cls)
+
+
+def write_markdown(xml_path, file: TextIO) -> None:
+    """
+    Markdown 리포트를 file 에 class 단위로 바로 씁니다.
+    """
+    for chunk in iter_markdown(xml_path):
+        file.write(chunk)
+
+
+def parser(xml_path):
+    return to_markdown(parse_report(xml_path))
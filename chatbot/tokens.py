@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    # tiktoken 은 처음 토큰을 셀 때 import (없으면 None)
+    # BPE 파일을 내려받지 못하는 경우(오프라인 등)도 None 으로 캐시해서 매번 다시 시도하지 않음
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"tiktoken encoding unavailable, estimating tokens: {type(e).__name__}: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    text 의 토큰 수 (tiktoken 이나 인코딩 파일이 없으면 4문자당 1토큰으로 근사)
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
@@ -0,0 +1,328 @@
+"""
+프로젝트 업로드 (zip 또는 여러 소스 파일)
+
+파일 전체를 한 번에 읽지 않고 CHUNK_SIZE 단위로 해시를 계산하며 저장하고, 실제로 쓴 바이트 수로 크기 제한을 확인합니다.
+(zip 헤더의 크기는 조작될 수 있으므로 참고만 함)
+
+파일은 내용 해시(sha256)로 UploadStore 에 한 번만 저장하고, 세션은 (세션, 경로) → 해시 참조만 가집니다.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from chatbot.source_index import SOURCE_EXTENSIONS, SourceIndex
+
+CHUNK_SIZE = 64 * 1024
+MAX_FILE_BYTES = int(os.environ.get("CHATBOT_UPLOAD_MAX_FILE_BYTES", 1024 * 1024))
+MAX_TOTAL_BYTES = int(os.environ.get("CHATBOT_UPLOAD_MAX_TOTAL_BYTES", 50 * 1024 * 1024))
+MAX_FILES = int(os.environ.get("CHATBOT_UPLOAD_MAX_FILES", 5000))
+STORE_DIR = os.environ.get("CHATBOT_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "streamlit_cache"))
+STORE_MAX_BYTES = int(os.environ.get("CHATBOT_UPLOAD_STORE_MAX_BYTES", 1024 * 1024 * 1024))
+SESSION_TTL = float(os.environ.get("CHATBOT_UPLOAD_SESSION_TTL", 24 * 60 * 60))
+
+
+class UploadError(ValueError):
+    pass
+
+
+class _TooLarge(Exception):
+    pass
+
+
+@dataclass
+class UploadStats:
+    files: int = 0
+    bytes: int = 0
+    deduplicated: int = 0  # 이미 저장되어 있던 파일 수
+    skipped: List[str] = field(default_factory=list)  # 소스가 아니거나 파일 크기 제한을 넘은 항목
+
+
+class UploadStore:
+    """
+    내용 해시 기반 업로드 저장소
+
+    - 파일: {root}/blobs/{해시 앞 2자리}/{해시}, 같은 내용은 사용자가 달라도 한 번만 저장
+    - 메타데이터: {root}/uploads.sqlite3 (blobs: 해시/크기/마지막 사용 시각, refs: 세션/경로 → 해시)
+    전체 크기가 max_bytes 를 넘으면 참조하는 세션이 없는 파일부터 LRU 순서로 지우고,
+    그래도 넘으면 session_ttl 동안 사용되지 않은 세션의 참조를 정리한 뒤 다시 지웁니다.
+    """
+
+    def __init__(self, root: str = STORE_DIR, max_bytes: int = STORE_MAX_BYTES, session_ttl: float = SESSION_TTL) -> None:
+        """
+        Args:
+            root (str): 저장 디렉토리
+            max_bytes (int): 저장할 파일의 최대 총 크기(byte)
+            session_ttl (float): 이 시간(초) 동안 사용되지 않은 세션의 참조는 용량이 부족할 때 정리
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self.stats = {"stored": 0, "deduplicated": 0, "saved_bytes": 0, "evicted": 0, "evicted_bytes": 0}
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "uploads.sqlite3"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS refs (
+                session TEXT NOT NULL,
+                name TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (session, name)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs (accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest)")
+        self._conn.commit()
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _write(self, source: BinaryIO, max_bytes: Optional[int]) -> Tuple[str, int, str]:
+        """
+        source 를 임시 파일로 청크 단위 복사하면서 해시 계산. max_bytes 를 넘으면 _TooLarge
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as file:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise _TooLarge()
+                    digest.update(chunk)
+                    file.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return digest.hexdigest(), size, tmp_path
+
+    def add(self, session: str, name: str, source: BinaryIO, max_bytes: Optional[int] = None) -> Tuple[str, int, bool]:
+        """
+        source 를 저장하고 session 의 name 경로로 참조합니다. (해시, 크기, 기존 파일 재사용 여부) 반환
+
+        참조 중인 파일만으로 max_bytes 를 넘으면 UploadError
+        """
+        digest, size, tmp_path = self._write(source, max_bytes)
+        path = self.blob_path(digest)
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if exists and os.path.exists(path):
+                os.remove(tmp_path)
+                self.stats["deduplicated"] += 1
+                self.stats["saved_bytes"] += size
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                self.stats["stored"] += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, accessed) VALUES (?, ?, ?)", (digest, size, now)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refs (session, name, digest, accessed) VALUES (?, ?, ?, ?)",
+                (session, name, digest, now),
+            )
+            total = self._evict(now)
+            self._conn.commit()
+        if total > self.max_bytes:
+            raise UploadError(f"upload store is full ({total} / {self.max_bytes} bytes)")
+        return digest, size, bool(exists)
+
+    def files(self, session: str) -> Dict[str, str]:
+        """
+        session 이 참조하는 {경로: 저장된 파일 경로}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, digest FROM refs WHERE session = ? ORDER BY name", (session,)
+            ).fetchall()
+        return {name: self.blob_path(digest) for name, digest in rows}
+
+    def index(self, session: str) -> SourceIndex:
+        """
+        session 이 업로드한 파일의 클래스/메서드 인덱스
+        """
+        self.touch(session)
+        index = SourceIndex()
+        for name, path in self.files(session).items():
+            if name.endswith(SOURCE_EXTENSIONS):
+                index.add_file(path, name=name)
+        return index
+
+    def touch(self, session: str) -> None:
+        """
+        session 과 그 파일의 마지막 사용 시각 갱신 (사용 중인 세션의 파일이 정리되지 않도록)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE refs SET accessed = ? WHERE session = ?", (now, session))
+            self._conn.execute(
+                "UPDATE blobs SET accessed = ? WHERE digest IN (SELECT digest FROM refs WHERE session = ?)",
+                (now, session),
+            )
+            self._conn.commit()
+
+    def release(self, session: str) -> None:
+        """
+        session 의 참조를 지웁니다. 파일은 다른 세션이 다시 올릴 때를 위해 남겨 두고 용량이 부족할 때 정리
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM refs WHERE session = ?", (session,))
+            self._evict(time.time())
+            self._conn.commit()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _evict_unreferenced(self, total: int) -> int:
+        rows = self._conn.execute(
+            "SELECT digest, size FROM blobs WHERE digest NOT IN (SELECT digest FROM refs) ORDER BY accessed ASC"
+        ).fetchall()
+        for digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            try:
+                os.remove(self.blob_path(digest))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats["evicted"] += 1
+            self.stats["evicted_bytes"] += size
+        return total
+
+    def _evict(self, now: float) -> int:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return total
+        total = self._evict_unreferenced(total)
+        if total > self.max_bytes:
+            # 오래 사용되지 않은 세션(브라우저를 닫는 등 Reset 없이 끝난 세션)의 참조 정리
+            self._conn.execute(
+                "DELETE FROM refs WHERE session IN (SELECT session FROM refs GROUP BY session HAVING MAX(accessed) < ?)",
+                (now - self.session_ttl,),
+            )
+            total = self._evict_unreferenced(total)
+        return total
+
+
+_store: Optional[UploadStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> UploadStore:
+    """
+    프로세스 전역 UploadStore (CHATBOT_UPLOAD_DIR, CHATBOT_UPLOAD_STORE_MAX_BYTES)
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UploadStore()
+        return _store
+
+
+def _safe_name(name: str) -> Optional[str]:
+    """
+    프로젝트 안의 상대 경로로 정규화. 밖을 가리키는 경로(절대 경로, ..)면 None
+    """
+    name = name.replace("\\", "/")
+    if name.startswith("/") or os.path.isabs(name):
+        return None
+    name = os.path.normpath(name).replace("\\", "/")
+    if name == "." or name.startswith("../") or name == "..":
+        return None
+    return name
+
+
+def _store_file(
+    store: UploadStore, session: str, name: str, source: BinaryIO, stats: UploadStats,
+    max_file_bytes: int, max_total_bytes: int,
+) -> None:
+    """
+    파일 크기 제한을 넘으면 건너뛰고, 전체 크기 제한을 넘으면 UploadError
+    """
+    remaining = max_total_bytes - stats.bytes
+    try:
+        _, size, reused = store.add(session, name, source, max_bytes=min(max_file_bytes, remaining))
+    except _TooLarge:
+        if remaining < max_file_bytes:
+            raise UploadError(f"upload exceeds {max_total_bytes} bytes")
+        stats.skipped.append(name)
+        return
+    stats.files += 1
+    stats.bytes += size
+    stats.deduplicated += reused
+
+
+def extract_upload(
+    uploaded: BinaryIO,
+    session: str,
+    store: Optional[UploadStore] = None,
+    name: Optional[str] = None,
+    stats: Optional[UploadStats] = None,
+    extensions=SOURCE_EXTENSIONS,
+    max_file_bytes: int = MAX_FILE_BYTES,
+    max_total_bytes: int = MAX_TOTAL_BYTES,
+    max_files: int = MAX_FILES,
+) -> UploadStats:
+    """
+    업로드된 파일(zip 이면 안의 소스 파일들)을 store 에 저장하고 session 에서 참조합니다.
+
+    Args:
+        uploaded (BinaryIO): read() 를 가진 파일 객체 (streamlit UploadedFile 등)
+        session (str): 업로드한 세션 id
+        store (Optional[UploadStore]): 저장소, None 이면 get_store()
+        name (Optional[str]): 파일 이름, None 이면 uploaded.name
+        stats (Optional[UploadStats]): 여러 파일을 올릴 때 누적할 통계 (전체 크기/파일 수 제한에 사용)
+        extensions: 저장할 소스 확장자
+        max_file_bytes (int): 파일 하나의 최대 크기, 넘으면 건너뜀
+        max_total_bytes (int): 전체 최대 크기, 넘으면 UploadError
+        max_files (int): 최대 파일 수, 넘으면 UploadError
+    """
+    store = store or get_store()
+    stats = stats or UploadStats()
+    name = name or getattr(uploaded, "name", "upload")
+
+    if name.lower().endswith(".zip"):
+        try:
+            archive = zipfile.ZipFile(uploaded)
+        except zipfile.BadZipFile as e:
+            raise UploadError(f"{name}: {e}") from e
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                member = _safe_name(info.filename)
+                if member is None or not member.endswith(extensions) or info.file_size > max_file_bytes:
+                    stats.skipped.append(info.filename)
+                    continue
+                if stats.files >= max_files:
+                    raise UploadError(f"upload exceeds {max_files} files")
+                with archive.open(info) as source:
+                    _store_file(store, session, member, source, stats, max_file_bytes, max_total_bytes)
+        return stats
+
+    member = _safe_name(os.path.basename(name))
+    if member is None or not member.endswith(extensions):
+        stats.skipped.append(name)
+        return stats
+    if stats.files >= max_files:
+        raise UploadError(f"upload exceeds {max_files} files")
+    _store_file(store, session, member, uploaded, stats, max_file_bytes, max_total_bytes)
+    return stats
@@ -1,31 +1,40 @@
-import os
-import shutil
-import tempfile
+import uuid
 
 import pandas as pd
 import streamlit as st
+from chatbot import llm_pool
 from chatbot.custom_chatbot import CodeChatbot
+from chatbot.scheduler import get_scheduler
+from chatbot.upload import UploadError, UploadStats, extract_upload, get_store
 
 # 페이지 설정
 st.set_page_config(page_icon="🤖", page_title="공시데이터 분석 챗봇")
 
+# 화면에 보관할 최대 메시지 수 (챗봇의 대화 기억은 CodeChatbot.memory 가 별도로 요약 관리)
+MAX_MESSAGES = 100
 
-# 캐시 디렉토리 생성 함수
-def ensure_cache_dir():
-    cache_dir = os.path.join(tempfile.gettempdir(), "streamlit_cache")
-    os.makedirs(cache_dir, exist_ok=True)
-    return cache_dir
 
+# 세션의 업로드 id (업로드 저장소에서 이 세션이 참조하는 파일을 구분)
+def upload_session():
+    if "upload_id" not in st.session_state:
+        st.session_state.upload_id = uuid.uuid4().hex
+    return st.session_state.upload_id
 
-# 파일 캐시 저장 함수
-def save_uploaded_file(uploaded_file, file_type):
-    cache_dir = ensure_cache_dir()
-    file_extension = os.path.splitext(uploaded_file.name)[1]
-    cached_path = os.path.join(cache_dir, f"{file_type}_{uploaded_file.name}")
 
-    with open(cached_path, "wb") as f:
-        f.write(uploaded_file.read())
-    return cached_path
+# 업로드 파일 저장 함수 (zip 은 소스 파일만 청크 단위로 풀어 내용 해시로 저장하고, 클래스/메서드 인덱스 생성)
+def save_uploaded_files(uploaded_files):
+    store = get_store()
+    session = upload_session()
+    store.release(session)  # 다시 업로드하면 이전 업로드 참조는 해제
+
+    stats = UploadStats()
+    try:
+        for uploaded_file in uploaded_files:
+            extract_upload(uploaded_file, session, store=store, stats=stats)
+    except UploadError:
+        store.release(session)
+        raise
+    return store.index(session), stats
 
 
 # 사이드바 설정
@@ -34,20 +43,94 @@ with st.sidebar:
 
     # 초기화 버튼
     if st.button("🔄 Reset"):
-        # 캐시 파일 삭제
-        cache_dir = ensure_cache_dir()
-        shutil.rmtree(cache_dir, ignore_errors=True)
+        # 이 세션의 업로드 참조만 해제 (다른 세션의 파일은 유지, 공유 파일은 저장소가 용량에 따라 정리)
+        if "upload_id" in st.session_state:
+            get_store().release(st.session_state.upload_id)
         # 모든 세션 상태 초기화
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
 
     st.markdown("### 💻 코드 입력")
-    if "code" in st.session_state:
+    if st.session_state.get("project") is not None:
+        project = st.session_state.project
+        st.success(f"✅ 프로젝트 업로드 완료 (파일 {len(project.files)}개, 클래스 {len(project)}개)")
+        get_store().touch(upload_session())
+    elif "code" in st.session_state:
         st.success(f"✅ 코드 입력 완료")
+        # 코드를 수정해 다시 제출 (검색 인덱스는 바뀐 청크만 다시 임베딩)
+        with st.expander("✏️ 코드 수정"):
+            edited_code = st.text_area("수정한 코드", value=st.session_state.code, height=300, key="edited_code")
+            if st.button("수정한 코드 제출") and edited_code.strip() and edited_code != st.session_state.code:
+                chatbot = st.session_state.get("chatbot")
+                if chatbot is not None:
+                    chatbot.update_code(edited_code)
+                    reindex = chatbot.last_reindex_stats
+                    if reindex:
+                        st.caption(
+                            f"다시 임베딩한 청크 {reindex['added']}개 · 삭제 {reindex['removed']}개 · 유지 {reindex['kept']}개"
+                        )
+                st.session_state.code = edited_code
+                st.success("✅ 수정한 코드를 반영했습니다")
     else:
         st.info("질문을 입력해주세요")
 
+    # 백그라운드 빌드/테스트 결과
+    chatbot = st.session_state.get("chatbot")
+    if chatbot is not None:
+        st.session_state.setdefault("test_results", [])
+        st.session_state.test_results.extend(chatbot.poll_test_results())
+        if chatbot.test_jobs or st.session_state.test_results:
+            st.markdown("### 🧪 테스트 실행 결과")
+        if chatbot.test_jobs:
+            st.caption(f"실행 중인 테스트 {len(chatbot.test_jobs)}건")
+        for result in st.session_state.test_results[-5:]:
+            label = "✅ 통과" if result.success else f"❌ 실패 ({result.stage})"
+            with st.expander(f"#{result.job_id} {label} · {result.duration:.1f}s"):
+                if result.output:
+                    st.code(result.output)
+                if result.coverage:
+                    st.markdown(result.coverage)
+
+    # 응답 캐시 통계
+    chatbot = st.session_state.get("chatbot")
+    if chatbot is not None and chatbot.cache is not None:
+        stats = chatbot.cache.stats
+        st.markdown("### ⚡ 응답 캐시")
+        st.caption(
+            f"hit {stats['exact_hits']} (semantic {stats['semantic_hits']}) / "
+            f"miss {stats['misses']} · 절약된 LLM 호출 {stats['saved_llm_calls']}회 "
+            f"({stats['saved_seconds']:.1f}s)"
+        )
+
+    # 라우팅 투기 실행 통계
+    if chatbot is not None and chatbot.engine.speculation.stats["attempts"]:
+        speculation = chatbot.engine.speculation.summary()
+        st.caption(
+            f"투기 실행 적중 {speculation['hits']}/{speculation['attempts']} "
+            f"(생략 {speculation['skipped']}) · 절약 {speculation['saved_seconds']:.1f}s"
+        )
+
+    # LLM 스케줄러 (모델별 재시도 / 429 / 합쳐진 요청)
+    scheduler_stats = get_scheduler().stats()
+    if any(lane["calls"] for lane in scheduler_stats.values()):
+        st.caption(" · ".join(
+            f"{model}: 호출 {lane['calls']} (재시도 {lane['retries']}, 429 {lane['rate_limited']}, "
+            f"합침 {lane['coalesced']}, 대기 {lane['waiting']})"
+            for model, lane in scheduler_stats.items()
+        ))
+
+    # 노드별 지연시간 (최근 실행 기준 rolling p50/p95)
+    if chatbot is not None and st.toggle("📊 노드별 지연시간", value=False):
+        summary = chatbot.engine.metrics.summary()
+        if summary:
+            st.dataframe(
+                pd.DataFrame.from_dict(summary, orient="index")[["count", "p50", "p95", "prompt_tokens", "completion_tokens"]],
+                use_container_width=True,
+            )
+        else:
+            st.caption("아직 기록된 실행이 없습니다.")
+
 # 메인 콘텐츠
 st.title("코드 분석 도우미 챗봇")
 
@@ -62,29 +145,53 @@ if "code_upload" not in st.session_state:
     st.session_state.code_upload = False
 
 if not st.session_state.code_entered:
-    st.markdown("### 코드를 입력해주세요")
-    code = st.text_input(
+    st.markdown("### 코드를 입력하거나 프로젝트를 업로드해주세요")
+    code = st.text_area(
         "프로젝트 코드", key="code_input", placeholder=""
     )
+    uploaded_files = st.file_uploader(
+        "프로젝트 파일 (.java 여러 개 또는 .zip)", type=["java", "zip"], accept_multiple_files=True
+    )
     col1, col2 = st.columns([4, 1])  # 비율을 4:1로 설정하여 버튼의 크기 조절
     with col2:
-        if st.button("확인", use_container_width=True):
-            if code.strip():  # 공백만 입력된 경우 제외
-                st.session_state.code = code
-                st.session_state.code_entered = True
-                st.rerun()
+        confirmed = st.button("확인", use_container_width=True)
+    if confirmed:
+        if uploaded_files:
+            try:
+                with st.spinner("프로젝트를 저장하고 클래스 인덱스를 만드는 중입니다."):
+                    project, upload_stats = save_uploaded_files(uploaded_files)
+            except UploadError as e:
+                st.error(f"업로드 실패: {e}")
             else:
-                st.error("코드를 입력해주세요")
+                if len(project) == 0:
+                    st.error("업로드한 파일에서 클래스를 찾지 못했습니다.")
+                else:
+                    st.session_state.project = project
+                    st.session_state.code = code if code.strip() else None
+                    st.session_state.code_upload = True
+                    st.session_state.code_entered = True
+                    if upload_stats.skipped:
+                        st.session_state.upload_skipped = upload_stats.skipped
+                    st.session_state.upload_deduplicated = upload_stats.deduplicated
+                    st.rerun()
+        elif code.strip():  # 공백만 입력된 경우 제외
+            st.session_state.code = code
+            st.session_state.code_entered = True
+            st.rerun()
+        else:
+            st.error("코드를 입력해주세요")
 
 # 챗봇 초기화 및 시작
 else:
 
-    @st.cache_resource
+    # 그래프와 LLM 클라이언트는 프로세스 전역 ChatbotEngine 을 공유하므로
+    # 세션마다 만드는 CodeChatbot 은 코드 문자열만 가지는 가벼운 객체
     def init_chatbot(code, code_path=None):
         chatbot = CodeChatbot(
             # code_path=code_path,
             code = code,
             code_uploaded=st.session_state.code_upload,
+            project=st.session_state.get("project"),
         )
         return chatbot
 
@@ -97,6 +204,11 @@ else:
                 st.session_state.code,
             )
         st.success("챗봇 초기화가 완료되었습니다.")
+        if st.session_state.get("upload_skipped"):
+            skipped = st.session_state.upload_skipped
+            st.caption(f"소스가 아니거나 크기 제한을 넘어 제외된 파일 {len(skipped)}개: {', '.join(skipped[:10])}")
+        if st.session_state.get("upload_deduplicated"):
+            st.caption(f"이미 저장되어 있던 파일 {st.session_state.upload_deduplicated}개는 다시 저장하지 않았습니다.")
 
     # 대화 기록 표시
     for conversation in st.session_state.messages:
@@ -109,10 +221,25 @@ else:
             st.markdown(prompt)
         st.session_state.messages.append({"role": "user", "content": prompt})
         if prompt is not None:
-            response = st.session_state.chatbot.invoke(prompt)
-            generation = response["generation"]
             with st.chat_message("assistant"):
-                st.markdown(generation)
+                # LLM 호출은 공유 이벤트 루프에서 처리 (세션 수만큼 HTTP 대기 스레드를 늘리지 않음)
+                generation = st.write_stream(
+                    llm_pool.iterate(st.session_state.chatbot.astream(prompt))
+                )
+                stream_stats = st.session_state.chatbot.last_stream_stats
+                if stream_stats["ttft"] is not None:
+                    st.caption(
+                        f"첫 토큰 {stream_stats['ttft']:.2f}s · 전체 {stream_stats['total']:.2f}s"
+                    )
+                retrieval_stats = st.session_state.chatbot.last_retrieval_stats
+                if retrieval_stats and not stream_stats["cached"]:
+                    st.caption(
+                        f"context {retrieval_stats['context_tokens']} / "
+                        f"전체 코드 {retrieval_stats['full_tokens']} 토큰 "
+                        f"({retrieval_stats['chunks']}/{retrieval_stats['total_chunks']} 청크)"
+                    )
+                    st.session_state.chatbot.last_retrieval_stats = {}
             st.session_state.messages.append(
                 {"role": "assistant", "content": generation}
             )
+            del st.session_state.messages[:-MAX_MESSAGES]
@@ -0,0 +1,64 @@
+from chatbot.testcode.coverage_loop import merge_tests
+
+EXISTING = """import org.junit.jupiter.api.Test;
+
+class CalculatorTest {
+    @Test
+    void add() {
+        assertEquals(3, new Calculator().add(1, 2));
+    }
+}"""
+
+NEW = """import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.Test;
+
+class CalculatorTest {
+    private Calc calc;
+
+    @BeforeEach
+    void setUp() {
+        calc = new Calc();
+    }
+
+    @Test
+    void add() {
+        assertEquals(5, calc.add(2, 3));
+    }
+
+    @Test
+    void subtract() {
+        assertEquals(1, check(calc.subtract(3, 2)));
+    }
+
+    private int check(int value) {
+        return value;
+    }
+}"""
+
+
+def test_merges_fields_setup_and_helpers_used_by_new_tests():
+    merged, added = merge_tests(EXISTING, NEW)
+    assert added == 2
+    assert 'private Calc calc;' in merged
+    assert 'void setUp()' in merged
+    assert 'private int check(int value)' in merged
+    assert 'void add_2()' in merged
+    assert 'import org.junit.jupiter.api.BeforeEach;' in merged
+    assert merged.index('private Calc calc;') < merged.index('void subtract()')
+
+
+def test_conflicting_members_are_renamed_with_their_references():
+    existing = EXISTING.replace("class CalculatorTest {", "class CalculatorTest {\n    private String calc;\n\n    private int check(int value) {\n        return -value;\n    }\n")
+    merged, added = merge_tests(existing, NEW)
+    assert added == 2
+    assert 'private Calc calc_2;' in merged
+    assert 'calc_2 = new Calc();' in merged
+    assert 'check_2(calc_2.subtract(3, 2))' in merged
+    assert 'private String calc;' in merged
+
+
+def test_same_fields_and_setup_are_not_duplicated():
+    merged, _ = merge_tests(NEW, NEW.replace('assertEquals(5', 'assertEquals(7'))
+    assert merged.count('private Calc calc;') == 1
+    assert merged.count('void setUp()') == 1
+    assert merged.count('private int check(') == 1
@@ -0,0 +1,15 @@
+from chatbot.memory import ConversationMemory, is_follow_up
+from chatbot.tokens import count_tokens
+
+
+def test_context_is_bounded_with_long_turns():
+    memory = ConversationMemory(max_turns=2, turn_tokens=50, summary_tokens=60)
+    for i in range(20):
+        memory.add("질문 " * 300 + str(i), "답변\n" + "내용 " * 500)
+    assert count_tokens(memory.context()) <= memory.max_tokens
+
+
+def test_follow_up_questions():
+    assert is_follow_up("그거 다시 설명해줘")
+    assert is_follow_up("explain that again")
+    assert not is_follow_up("Calculator 코드 리뷰해줘")
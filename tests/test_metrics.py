@@ -0,0 +1,39 @@
+import asyncio
+
+from chatbot.metrics import Metrics, add_usage
+
+
+def _estimate(state, output):
+    return {"prompt_tokens": 1, "completion_tokens": 1}
+
+
+def test_reported_usage_replaces_the_estimate():
+    metrics = Metrics()
+
+    def node(state):
+        add_usage(120, 30)  # 라우터 시스템 프롬프트처럼 State 에 없는 토큰까지 포함한 실제 사용량
+        add_usage(80, 10)
+        return {}
+
+    async def anode(state):
+        add_usage(50, 5)
+        return {}
+
+    func, afunc = metrics.instrument("plain_answer", node, anode, _estimate)
+    func({})
+    asyncio.run(afunc({}))
+    first, second = metrics.events("plain_answer")
+    assert (first.prompt_tokens, first.completion_tokens) == (200, 40)
+    assert (second.prompt_tokens, second.completion_tokens) == (50, 5)
+
+
+def test_estimate_is_used_without_reported_usage():
+    metrics = Metrics()
+    func, _ = metrics.instrument("plain_answer", lambda state: {}, None, _estimate)
+    func({})
+    [event] = metrics.events("plain_answer")
+    assert (event.prompt_tokens, event.completion_tokens) == (1, 1)
+
+
+def test_usage_outside_a_node_is_ignored():
+    add_usage(10, 10)
@@ -0,0 +1,47 @@
+from chatbot.response_cache import ResponseCache
+
+
+class Embeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        # 같은 단어 구성이면 같은 벡터
+        return [float(text.count(word)) for word in ("review", "test", "refactor", "please")]
+
+
+def test_semantic_hit_within_the_same_code_scope(tmp_path):
+    embeddings = Embeddings()
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), embeddings=embeddings)
+    cache.store("review please", "class A {}", {"generation": "A review"})
+    cache.store("review please", "class B {}", {"generation": "B review"})
+
+    touched = []
+    get = cache._disk.get
+    cache._disk.get = lambda key: touched.append(key) or get(key)
+
+    cached = cache.lookup("please review", "class B {}")
+    assert cached["generation"] == "B review"
+    assert cached["question"] == "please review"
+    assert touched  # semantic hit 도 디스크의 접근 시각을 갱신
+    assert cache.lookup("test please", "class B {}") is None
+
+
+def test_no_embedding_call_when_the_scope_has_no_entries():
+    embeddings = Embeddings()
+    cache = ResponseCache(embeddings=embeddings)
+    cache.store("review please", "class A {}", {"generation": "A review"})
+    calls = embeddings.calls
+
+    assert cache.lookup("review please", "class C {}") is None
+    assert embeddings.calls == calls
+    assert cache.stats["misses"] == 1
+
+
+def test_removed_entries_leave_the_scope():
+    cache = ResponseCache(max_entries=1, embeddings=Embeddings())
+    cache.store("review please", "class A {}", {"generation": "A review"})
+    cache.store("test please", "class B {}", {"generation": "B test"})
+    assert cache.lookup("please review", "class A {}") is None
+    assert cache.lookup("please test", "class B {}")["generation"] == "B test"
@@ -0,0 +1,35 @@
+import threading
+import time
+
+from chatbot.scheduler import BATCH, INTERACTIVE, Scheduler
+
+
+def test_group_limit_serves_interactive_requests_first():
+    scheduler = Scheduler(max_concurrency=8)
+    scheduler.configure_group('gpt', 'testgen', 1)
+    release = threading.Event()
+    order = []
+
+    def job(name, priority):
+        def fn():
+            order.append(name)
+            if name == 'first':
+                release.wait(5)
+        scheduler.call('gpt', fn, priority=priority, group='testgen')
+
+    threads = [threading.Thread(target=job, args=('first', BATCH))]
+    threads[0].start()
+    while scheduler.stats()['gpt']['active'] == 0:
+        time.sleep(0.01)
+    for name, priority in (('batch', BATCH), ('interactive', INTERACTIVE)):
+        threads.append(threading.Thread(target=job, args=(name, priority)))
+        threads[-1].start()
+        while scheduler.stats()['gpt']['waiting'] < len(threads) - 1:
+            time.sleep(0.01)
+
+    # 그룹 슬롯은 가득 찼어도 그룹 밖의 채팅 요청은 바로 실행
+    scheduler.call('gpt', lambda: order.append('chat'))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['first', 'chat', 'interactive', 'batch']
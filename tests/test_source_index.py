@@ -0,0 +1,35 @@
+from chatbot.source_index import SourceIndex, _method_name, _signature
+
+CALCULATOR = """package com.example;
+
+public class Calculator {
+    /** 합계 {a + b} 를 반환 */
+    public int add(int a, int b) {
+        return a + b;
+    }
+
+    // 뺄셈 { 주석 안의 중괄호
+    public int subtract(int a, int b) {
+        return a - b;
+    }
+}
+"""
+
+
+def test_question_words_followed_by_hangul_particles(tmp_path):
+    path = tmp_path / "Calculator.java"
+    path.write_text(CALCULATOR, encoding="utf-8")
+    index = SourceIndex(str(tmp_path))
+    index.add_file(str(path))
+
+    [(entry, methods)] = index.find("Calculator를 리뷰해줘")
+    assert entry.name == "Calculator" and not methods
+    [(entry, methods)] = index.find("add를 설명해줘")
+    assert methods == {"add"}
+
+
+def test_signature_ignores_braces_in_comments():
+    member = '/** 합계 {a + b} 를 반환 */\n    public int add(int a, int b) {\n        return a + b;\n    }'
+    assert _signature(member).rstrip().endswith("public int add(int a, int b)")
+    assert _method_name(member) == "add"
+    assert _method_name('// 설정 { 값\n    private int value = 1;') is None
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from chatbot.speculation import SpeculationAborted, TokenBuffer
+
+
+async def _read(buffer, received):
+    async for token in buffer.tokens():
+        received.append(token)
+
+
+def test_retry_before_any_token_was_sent_restarts_quietly():
+    async def scenario():
+        buffer = TokenBuffer()
+        buffer.append("first ")
+        buffer.reset()
+        buffer.append("second")
+        buffer.close()
+        received = []
+        await _read(buffer, received)
+        return received
+
+    assert asyncio.run(scenario()) == ["second"]
+
+
+def test_retry_after_tokens_were_sent_is_a_hard_miss():
+    async def scenario():
+        buffer = TokenBuffer()
+        received = []
+        reader = asyncio.ensure_future(_read(buffer, received))
+        buffer.append("first ")
+        await asyncio.sleep(0)
+        buffer.reset()
+        buffer.append("second")
+        buffer.close()
+        with pytest.raises(SpeculationAborted):
+            await reader
+        return received
+
+    assert asyncio.run(scenario()) == ["first "]
+
+
+def test_failure_after_tokens_were_sent_is_a_hard_miss():
+    async def scenario():
+        buffer = TokenBuffer()
+        received = []
+        reader = asyncio.ensure_future(_read(buffer, received))
+        buffer.append("partial")
+        await asyncio.sleep(0)
+        buffer.fail()
+        buffer.close()
+        with pytest.raises(SpeculationAborted):
+            await reader
+        return received
+
+    assert asyncio.run(scenario()) == ["partial"]
@@ -0,0 +1,84 @@
+from chatbot.testcode.testcode_generator import paring_code
+
+CALCULATOR = """package com.example;
+
+public class Calculator {
+    public int add(int a, int b) {
+        return a + b;
+    }
+
+    public int subtract(int a, int b) {
+        return a - b;
+    }
+
+    public int multiply(int a, int b) {
+        return a * b;
+    }
+}"""
+
+CALCULATOR_TEST = """class CalculatorTest {
+    @Test
+    void add() {
+        assertEquals(3, new Calculator().add(1, 2));
+    }
+}"""
+
+
+def test_prefers_test_block_over_echoed_source():
+    response = f"Here is the class:\n```java\n{CALCULATOR}\n```\nAnd the test:\n```java\n{CALCULATOR_TEST}\n```\n"
+    assert paring_code(response) == CALCULATOR_TEST
+
+
+def test_single_block_with_any_language_tag():
+    assert paring_code(f"```Java\n{CALCULATOR_TEST}\n```") == CALCULATOR_TEST
+
+
+def test_truncated_block():
+    assert paring_code(f"```java\n{CALCULATOR_TEST[:40]}") == CALCULATOR_TEST[:40].strip()
+
+
+def test_no_block_and_empty_response():
+    assert paring_code(CALCULATOR_TEST) == CALCULATOR_TEST
+    assert paring_code(None) is None
+
+
+def test_tests_that_do_not_compile_are_not_served_from_cache(tmp_path, monkeypatch):
+    from chatbot.storage import SqliteLRUStore
+    from chatbot.testcode import testcode_generator
+    from chatbot.testcode.compile_check import CompileResult
+    from chatbot.testcode.model import model_response
+
+    calls = []
+
+    def backend(messages):
+        calls.append(messages)
+        return f"```java\n{CALCULATOR_TEST}\n```"
+
+    class Compiler:
+        def check(self, test_code, src_code=None, sourcepath=None):
+            return CompileResult(ok=False, errors=["CalculatorTest.java:1: error: cannot find symbol"])
+
+    monkeypatch.setitem(model_response.BACKENDS, "fake", backend)
+    monkeypatch.setattr(model_response, "_cache", SqliteLRUStore(str(tmp_path / "cache.sqlite")))
+    monkeypatch.setattr(model_response, "_call_model", lambda model, messages, priority: backend(messages))
+
+    for _ in range(2):
+        testcode_generator.generate_compiled_test(CALCULATOR, model="fake", retries=1, compiler=Compiler())
+    assert len(calls) == 4  # 두 번째 요청도 캐시가 아니라 새로 생성
+
+
+def test_batch_saves_tests_under_their_package(tmp_path, monkeypatch):
+    from chatbot.testcode import testcode_generator
+
+    source = tmp_path / "project" / "src" / "main" / "java" / "com" / "example"
+    source.mkdir(parents=True)
+    (source / "Calculator.java").write_text(CALCULATOR)
+    monkeypatch.setattr(testcode_generator, "generate_compiled_test",
+                        lambda code, *args, **kwargs: (CALCULATOR_TEST, type("Compiled", (), {"ok": True})()))
+
+    result = testcode_generator.generate_batch(str(tmp_path / "project"), test_root=str(tmp_path / "test"))
+    assert not result.failed
+    saved = result.saved[0][1]
+    assert saved == str(tmp_path / "test" / "com" / "example" / "CalculatorTest.java")
+    with open(saved) as file:
+        assert file.read().startswith("package com.example;")